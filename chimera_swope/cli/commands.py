@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class CommandQueueFullError(Exception):
+    pass
+
+
+class Command:
+    """A hardware command submitted to a CommandExecutor."""
+
+    def __init__(self, device, description, func, args, abort):
+        self.device = device
+        self.description = description
+        self.func = func
+        self.args = args
+        self.abort = abort
+        self.state = "queued"  # running, done, failed or cancelled
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.future = Future()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def __str__(self):
+        text = f"{self.device}: {self.description} ({self.state}"
+        if self.started is not None:
+            text += f" {self.elapsed:.1f}s"
+        if self.error is not None:
+            text += f": {self.error}"
+        return text + ")"
+
+
+class CommandExecutor:
+    """
+    Runs blocking hardware commands off the UI event loop.
+
+    Commands of the same device run one at a time, in submission order, while
+    different devices run concurrently on a bounded thread pool. Every change
+    of a command state is reported to the subscribers. Queued commands can be
+    cancelled; cancelling a running one calls its abort function, if any.
+    """
+
+    def __init__(self, max_workers=4, max_pending=8, log=print):
+        """
+        @param max_workers: Number of devices commanded concurrently
+        @param max_pending: Maximum number of queued commands per device
+        @param log: Function used to report failures
+        """
+        self.max_pending = max_pending
+        self.log = log
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._queues = {}  # device -> deque of queued commands
+        self._running = {}  # device -> running command
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """
+        @param callback: Called with the Command on each state change, from
+                         the executor threads
+        """
+        self._subscribers.append(callback)
+
+    def _notify(self, command):
+        for callback in self._subscribers:
+            try:
+                callback(command)
+            except Exception as e:
+                self.log(f"Command subscriber failed: {e}")
+
+    def submit(self, device, description, func, *args, abort=None):
+        """
+        Queue a command. Returns immediately.
+
+        @param device: Device name, commands of a device are serialized
+        @param description: Text shown on the progress reports
+        @param func: Blocking callable running the command
+        @param abort: Callable interrupting func while it runs, if possible
+        @return: The Command. Its future can be awaited with asyncio.wrap_future.
+        """
+        command = Command(device, description, func, args, abort)
+        with self._lock:
+            queue = self._queues.setdefault(device, deque())
+            if len(queue) >= self.max_pending:
+                raise CommandQueueFullError(f"Too many pending commands for {device}")
+            queue.append(command)
+        self._notify(command)
+        self._next(device)
+        return command
+
+    def _next(self, device):
+        with self._lock:
+            if device in self._running or not self._queues.get(device):
+                return
+            command = self._queues[device].popleft()
+            self._running[device] = command
+            command.state = "running"
+            command.started = time.time()
+        self._notify(command)
+        self._executor.submit(self._execute, command)
+
+    def _execute(self, command):
+        try:
+            result = command.func(*command.args)
+        except Exception as e:
+            command.error = f"{type(e).__name__}: {e}"
+            command.state = "cancelled" if command.state == "cancelled" else "failed"
+            command.future.set_exception(e)
+            if command.state == "failed":
+                self.log(f"{command.device}: {command.description} failed: {e}")
+        else:
+            if command.state != "cancelled":
+                command.state = "done"
+            command.future.set_result(result)
+        command.finished = time.time()
+        with self._lock:
+            del self._running[command.device]
+        self._notify(command)
+        self._next(command.device)
+
+    def busy(self, device):
+        """
+        @return: True if the device has a running or queued command
+        """
+        with self._lock:
+            return device in self._running or bool(self._queues.get(device))
+
+    def active(self):
+        """
+        @return: Running and queued commands of all devices
+        """
+        with self._lock:
+            commands = list(self._running.values())
+            for queue in self._queues.values():
+                commands.extend(queue)
+            return commands
+
+    def cancel(self, device=None):
+        """
+        Cancel the queued commands and abort the running one.
+
+        @param device: Device to cancel. None cancels all devices.
+        """
+        with self._lock:
+            devices = [device] if device is not None else list(self._queues)
+            cancelled = []
+            for name in devices:
+                queue = self._queues.get(name, deque())
+                cancelled.extend(queue)
+                queue.clear()
+            running = [self._running[name] for name in devices if name in self._running]
+        for command in cancelled:
+            command.state = "cancelled"
+            command.finished = time.time()
+            command.future.cancel()
+            self._notify(command)
+        for command in running:
+            command.state = "cancelled"
+            self._notify(command)
+            if command.abort is not None:
+                # the abort itself may block on the device
+                threading.Thread(target=self._abort, args=(command,)).start()
+
+    def _abort(self, command):
+        try:
+            command.abort()
+        except Exception as e:
+            self.log(f"{command.device}: could not abort {command.description}: {e}")
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class NudgeCoalescer:
+    """
+    Accumulates small telescope offsets (e.g. from a held arrow key) and sends
+    them as one combined offset when the device is free, instead of one
+    blocking move per key press.
+    """
+
+    def __init__(self, executor, device, move, abort=None):
+        """
+        @param executor: CommandExecutor running the moves
+        @param device: Device name on the executor
+        @param move: Blocking callable receiving the (north, east) offsets
+        @param abort: Callable interrupting a move, if possible
+        """
+        self.executor = executor
+        self.device = device
+        self.move = move
+        self.abort = abort
+        self._north = 0.0
+        self._east = 0.0
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def add(self, north=0.0, east=0.0):
+        """
+        Add an offset. A move is queued only if none is waiting to start;
+        otherwise the offset is merged into the waiting one.
+        """
+        with self._lock:
+            self._north += north
+            self._east += east
+            if self._pending is not None and self._pending.state == "queued":
+                return self._pending
+            self._pending = self.executor.submit(
+                self.device, "Offset", self._send, abort=self.abort
+            )
+            return self._pending
+
+    def cancel(self):
+        """
+        Drop the accumulated offset and cancel the device commands.
+        """
+        with self._lock:
+            self._north = self._east = 0.0
+        self.executor.cancel(self.device)
+
+    def _send(self):
+        # take the offset accumulated until the move starts
+        with self._lock:
+            north, east = self._north, self._east
+            self._north = self._east = 0.0
+        if north or east:
+            self.move(north, east)
+        return north, east
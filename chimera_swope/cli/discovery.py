@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+def config_hash(instruments, classes):
+    """
+    @param instruments: Dict of instrument name to its configuration
+    @param classes: Instrument class names used for the classification
+    @return: Hash identifying the configuration the classification depends on
+    """
+    payload = json.dumps(
+        {"instruments": instruments, "classes": list(classes)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class InstrumentDiscovery:
+    """
+    Connects to all instruments concurrently and classifies them by the
+    instrument class they implement.
+
+    Every instrument gets at most timeout seconds to answer, so unreachable
+    ones do not hold startup. They are retried in background and reported
+    through on_connect as soon as they answer.
+
+    The classification is cached on disk keyed by the configuration hash, so
+    on the next start only a ping is needed for each known instrument.
+    """
+
+    def __init__(
+        self,
+        make_proxy,
+        classes,
+        on_connect,
+        cache_file="~/.chimera/swope_ui_instruments.json",
+        timeout=5.0,
+        retry_interval=30.0,
+        log=print,
+    ):
+        """
+        @param make_proxy: Callable receiving an instrument name and returning
+                           its proxy
+        @param classes: Instrument class names, in order of precedence
+        @param on_connect: Called with (name, proxy, class name or None) for
+                           every reachable instrument, from the discovery
+                           threads
+        @param cache_file: Classification cache file. Empty disables it.
+        @param timeout: Time given to each instrument to answer, in seconds
+        @param retry_interval: Seconds between retries of the unreachable ones
+        @param log: Function used to report progress
+        """
+        self.make_proxy = make_proxy
+        self.classes = list(classes)
+        self.on_connect = on_connect
+        self.cache_file = os.path.expanduser(cache_file) if cache_file else None
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.log = log
+
+        self._hash = None
+        self._cache = {}
+        self._unreachable = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._retry_thread = None
+
+    def _load_cache(self):
+        if self.cache_file is None or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("hash") != self._hash:
+            return {}
+        return cache.get("instruments", {})
+
+    def _save_cache(self):
+        if self.cache_file is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, "w") as f:
+                json.dump({"hash": self._hash, "instruments": self._cache}, f)
+        except OSError as e:
+            self.log(f"Could not save instrument cache: {e}")
+
+    def _classify(self, proxy):
+        for cls in self.classes:
+            if proxy.features(cls):
+                return cls
+        return None
+
+    def _connect(self, name):
+        proxy = self.make_proxy(name)
+        proxy.ping()
+        with self._lock:
+            cached = name in self._cache
+            cls = self._cache.get(name)
+        if not cached:
+            cls = self._classify(proxy)
+        return proxy, cls, cached
+
+    def _connect_all(self, names, report_failures=True):
+        # one thread each, so a hung instrument does not delay the others
+        executor = ThreadPoolExecutor(max_workers=max(1, len(names)))
+        futures = {name: executor.submit(self._connect, name) for name in names}
+        executor.shutdown(wait=False)
+        deadline = time.time() + self.timeout
+
+        classified = False
+        unreachable = set()
+        for name, future in futures.items():
+            error = None
+            try:
+                proxy, cls, cached = future.result(
+                    timeout=max(0.0, deadline - time.time())
+                )
+            except FutureTimeoutError:
+                error = "timed out"
+            except Exception as e:
+                error = e
+            if error is not None:
+                if report_failures:
+                    self.log(f"✗ Could not reach {name}: {error}")
+                unreachable.add(name)
+                continue
+            self.log(f"✓ Connected to {name}")
+            if cls is None:
+                self.log(f"  Warning: {name} does not match any known instrument class")
+            if not cached:
+                with self._lock:
+                    self._cache[name] = cls
+                classified = True
+            self.on_connect(name, proxy, cls)
+
+        if classified:
+            self._save_cache()
+        return unreachable
+
+    def discover(self, instruments):
+        """
+        Connect to the instruments. Returns once every instrument answered or
+        timed out; unreachable ones keep being retried in background.
+
+        @param instruments: Dict of instrument name to its configuration
+        @return: Set of unreachable instrument names
+        """
+        self._hash = config_hash(instruments, self.classes)
+        self._cache = self._load_cache()
+        unreachable = self._connect_all(list(instruments))
+        with self._lock:
+            self._unreachable = unreachable
+        if unreachable and self._retry_thread is None:
+            self._retry_thread = threading.Thread(
+                target=self._retry, name="InstrumentDiscovery", daemon=True
+            )
+            self._retry_thread.start()
+        return set(unreachable)
+
+    @property
+    def unreachable(self):
+        with self._lock:
+            return set(self._unreachable)
+
+    def _retry(self):
+        while not self._stop.wait(self.retry_interval):
+            names = self.unreachable
+            if not names:
+                return
+            still_unreachable = self._connect_all(sorted(names), report_failures=False)
+            with self._lock:
+                self._unreachable = still_unreachable
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,143 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+SWOPE_FOCAL_LENGTH = 7000.0  # mm
+# nominal Henrietta slit, in arcsec
+HENRIETTA_SLIT_LENGTH = 60.0
+HENRIETTA_SLIT_WIDTH = 1.0
+ARCSEC_PER_RADIAN = 180.0 / np.pi * 3600.0
+
+
+def pixel_scale(pixel_size, focal_length=SWOPE_FOCAL_LENGTH):
+    """
+    @param pixel_size: Pixel size in micrometers
+    @param focal_length: Telescope focal length in mm
+    @return: Pixel scale in arcsec/pixel
+    """
+    return ARCSEC_PER_RADIAN * pixel_size * 1e-3 / focal_length
+
+
+@dataclass(frozen=True, slots=True)
+class Footprint:
+    """Rectangular instrument footprint on the sky, centered on the pointing."""
+
+    name: str
+    width: float  # arcsec, along the detector x axis
+    height: float  # arcsec, along the detector y axis
+    color: str = "#ee2345"
+
+
+def detector_footprint(name, size, pixel_size, focal_length=SWOPE_FOCAL_LENGTH):
+    """
+    @param name: Footprint name
+    @param size: Detector (width, height) in pixels
+    @param pixel_size: Pixel (x, y) size in micrometers
+    @param focal_length: Telescope focal length in mm
+    """
+    return Footprint(
+        name,
+        size[0] * pixel_scale(pixel_size[0], focal_length),
+        size[1] * pixel_scale(pixel_size[1], focal_length),
+    )
+
+
+def slit_footprint(name, length, width):
+    """
+    @param length: Slit length in arcsec, along the detector y axis
+    @param width: Slit width in arcsec
+    """
+    return Footprint(name, width, length, color="#23ee45")
+
+
+def tangent_plane_to_sky(ra, dec, east, north):
+    """
+    Sky coordinates of offsets on the tangent plane (inverse gnomonic).
+
+    @param ra: Right ascension of the tangent point in degrees
+    @param dec: Declination of the tangent point in degrees
+    @param east: Offsets towards east in degrees
+    @param north: Offsets towards north in degrees
+    @return: (ra, dec) arrays in degrees
+    """
+    ra0, dec0 = np.radians(ra), np.radians(dec)
+    xi, eta = np.radians(east), np.radians(north)
+    denominator = np.cos(dec0) - eta * np.sin(dec0)
+    ra_out = ra0 + np.arctan2(xi, denominator)
+    dec_out = np.arctan2(np.sin(dec0) + eta * np.cos(dec0), np.hypot(xi, denominator))
+    return np.degrees(ra_out) % 360.0, np.degrees(dec_out)
+
+
+class FootprintCache:
+    """
+    Footprint polygons of the instruments for a position angle.
+
+    The rotated corners depend only on the PA, so they are computed once per
+    PA (rounded to pa_resolution) and only the cheap projection to the
+    pointing center is done on every update.
+    """
+
+    def __init__(self, footprints=(), pa_resolution=0.1, max_entries=360):
+        """
+        @param footprints: Footprint instances
+        @param pa_resolution: PA rounding in degrees for the cache
+        @param max_entries: Maximum number of cached PAs
+        """
+        self.pa_resolution = pa_resolution
+        self.max_entries = max_entries
+        self._footprints = list(footprints)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def add(self, footprint):
+        with self._lock:
+            self._footprints = [
+                f for f in self._footprints if f.name != footprint.name
+            ] + [footprint]
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._footprints)
+
+    def offsets(self, pa):
+        """
+        Corners of every footprint rotated by the PA, with the detector y axis
+        pointing to the PA, measured from north through east.
+
+        @param pa: Position angle in degrees
+        @return: List of (footprint, array of (east, north) offsets in degrees)
+        """
+        key = round(pa / self.pa_resolution)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            footprints = list(self._footprints)
+
+        angle = np.radians(key * self.pa_resolution)
+        signs = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) / 2.0
+        corners = []
+        for footprint in footprints:
+            x, y = (signs * [footprint.width, footprint.height] / 3600.0).T
+            east = x * np.cos(angle) + y * np.sin(angle)
+            north = -x * np.sin(angle) + y * np.cos(angle)
+            corners.append((footprint, np.column_stack([east, north])))
+
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._cache.clear()
+            self._cache[key] = corners
+        return corners
+
+    def polygons(self, ra, dec, pa):
+        """
+        @param ra: Pointing right ascension in degrees
+        @param dec: Pointing declination in degrees
+        @param pa: Position angle in degrees
+        @return: List of (footprint, list of [ra, dec] vertices in degrees)
+        """
+        polygons = []
+        for footprint, corners in self.offsets(pa):
+            ras, decs = tangent_plane_to_sky(ra, dec, corners[:, 0], corners[:, 1])
+            polygons.append((footprint, np.column_stack([ras, decs]).tolist()))
+        return polygons
@@ -0,0 +1,244 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import jinja2
+import numpy as np
+import yaml
+from astropy import units
+from astropy.coordinates import Angle
+from astropy.table import Table
+
+from chimera_swope.ephemeris import NightEphemeris, night_date
+from chimera_swope.sky import airmass, radec_to_altaz
+
+# Swope site, as on etc/chimera.config
+SWOPE_LATITUDE = "-29:00:43.175"
+SWOPE_LONGITUDE = "-70:42:00.877"
+
+OFFSET_DIRECTIONS = ("south", "east", "north", "west")
+
+
+def read_targets(filename):
+    """
+    Read a target table.
+
+    CSV and FITS tables have one target per row; YAML files have a list of
+    targets, optionally under a "targets" key. Columns: name, ra, dec and
+    optionally pa, epoch, priority, program_name, pi_name and
+    offset_south, offset_east, offset_north, offset_west (arcsec). YAML
+    targets can also give the offsets as an "offsets" mapping.
+
+    @return: List of dicts, one per target
+    """
+    if filename.endswith((".yaml", ".yml")):
+        with open(filename) as f:
+            document = yaml.safe_load(f)
+        if isinstance(document, dict):
+            document = document.get("targets")
+        if not isinstance(document, list):
+            raise ValueError(f"{filename}: expected a list of targets")
+        return [dict(target) for target in document]
+
+    table = Table.read(
+        filename, format="ascii.csv" if filename.endswith(".csv") else None
+    )
+    targets = []
+    for row in table:
+        target = {}
+        for column in table.colnames:
+            value = row[column]
+            if np.ma.is_masked(value):
+                continue
+            target[column.lower()] = value.item() if hasattr(value, "item") else value
+        targets.append(target)
+    return targets
+
+
+def parse_coordinates(ra, dec):
+    """
+    @param ra: Sexagesimal hours ("hh:mm:ss") or degrees
+    @param dec: Sexagesimal or decimal degrees
+    @return: (ra, dec) in degrees
+    @raise ValueError: If the coordinates are not valid
+    """
+    try:
+        if isinstance(ra, str) and (":" in ra or "h" in ra):
+            ra = Angle(ra, unit=units.hourangle).deg
+        else:
+            ra = Angle(float(ra), unit=units.deg).deg
+        dec = Angle(dec, unit=units.deg).deg
+    except (TypeError, ValueError, units.UnitsError) as e:
+        raise ValueError(f"invalid coordinates {ra!r}, {dec!r}: {e}")
+    if not (0.0 <= ra < 360.0) or not (-90.0 <= dec <= 90.0):
+        raise ValueError(f"coordinates out of range: {ra!r}, {dec!r}")
+    return ra, dec
+
+
+def visibility_windows(ra, dec, lst, latitude, max_airmass=2.0):
+    """
+    Observability of all the targets over a night grid at once.
+
+    @param ra: Array with the right ascensions in degrees
+    @param dec: Array with the declinations in degrees
+    @param lst: Local sidereal times of the night grid in degrees
+    @param latitude: Site latitude in degrees
+    @param max_airmass: Maximum airmass to observe
+    @return: (first, last, best, min_airmass) arrays. The first three are
+             the grid indices of the window start, end and minimum airmass,
+             -1 when the target never gets below max_airmass.
+    """
+    ra = np.asarray(ra, dtype=float)
+    alt, _ = radec_to_altaz(
+        ra[:, None], np.asarray(dec)[:, None], lst[None, :], latitude
+    )
+    targets_airmass = airmass(alt)
+    visible = targets_airmass <= max_airmass
+    observable = visible.any(axis=1)
+    n = visible.shape[1]
+    first = np.where(observable, visible.argmax(axis=1), -1)
+    last = np.where(observable, n - 1 - visible[:, ::-1].argmax(axis=1), -1)
+    best = np.where(observable, targets_airmass.argmin(axis=1), -1)
+    min_airmass = targets_airmass.min(axis=1)
+    return first, last, best, min_airmass
+
+
+def observation(target, ra, dec, pi_name=""):
+    """
+    @return: The observation data rendered by the template for a target
+    """
+    name = str(target["name"])
+    offsets = dict(target.get("offsets") or {})
+    for direction in OFFSET_DIRECTIONS:
+        if target.get(f"offset_{direction}") is not None:
+            offsets[direction] = target[f"offset_{direction}"]
+    data = {
+        "program_name": target.get("program_name", name),
+        "pi_name": target.get("pi_name", pi_name),
+        "priority": target.get("priority", 1),
+        "target": {
+            "name": name,
+            "ra": Angle(ra, unit=units.deg).to_string(
+                unit=units.hourangle, sep=":", precision=2, pad=True
+            ),
+            "dec": Angle(dec, unit=units.deg).to_string(
+                sep=":", precision=1, pad=True, alwayssign=True
+            ),
+            "pa": target.get("pa", 0),
+            "epoch": target.get("epoch", "J2000"),
+        },
+    }
+    if offsets:
+        data["target"]["offsets"] = offsets
+    return data
+
+
+_program = None
+
+
+def _load_template(template_file):
+    # compiled once per worker process
+    global _program
+    directory, name = os.path.split(os.path.abspath(template_file))
+    environment = jinja2.Environment(loader=jinja2.FileSystemLoader(directory))
+    _program = environment.get_template(name).module.program
+
+
+def _render(observation):
+    return str(_program(observation))
+
+
+def render_programs(template_file, observations, workers=1):
+    """
+    Render the program of every observation with the template macro
+    program(observation), in parallel.
+
+    @param template_file: Jinja2 template defining the program macro
+    @param observations: Observation data, as returned by observation
+    @param workers: Number of worker processes, 1 renders in this process
+    @return: Iterator over the rendered programs, in the observations order
+    """
+    if workers <= 1:
+        _load_template(template_file)
+        yield from map(_render, observations)
+        return
+    chunksize = max(1, len(observations) // (4 * workers))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_load_template, initargs=(template_file,)
+    ) as executor:
+        yield from executor.map(_render, observations, chunksize=chunksize)
+
+
+def write_schedule(filename, programs):
+    """
+    Stream rendered programs into a schedule file loadable by the scheduler.
+
+    @return: Number of programs written
+    """
+    n = 0
+    with open(filename, "w") as f:
+        f.write("programs:\n")
+        for program in programs:
+            f.write(program.rstrip() + "\n\n")
+            n += 1
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Create the observing schedule of a night from a target table."
+    )
+    parser.add_argument("targets", help="Target table: .csv, .fits or .yaml")
+    parser.add_argument("--template", default="observing_sequence.j2")
+    parser.add_argument("--output", default="observing_sequence.yaml")
+    parser.add_argument("--date", help="Local date of the night start, default today")
+    parser.add_argument("--max-airmass", type=float, default=2.0)
+    parser.add_argument("--sun-altitude", type=float, default=-12.0)
+    parser.add_argument("--step", type=float, default=5.0, help="Grid step, minutes")
+    parser.add_argument("--latitude", default=SWOPE_LATITUDE)
+    parser.add_argument("--longitude", default=SWOPE_LONGITUDE)
+    parser.add_argument("--pi", default="", help="Default PI name")
+    parser.add_argument("--all", action="store_true", help="Keep unobservable targets")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    latitude = Angle(args.latitude, unit=units.deg).deg
+    longitude = Angle(args.longitude, unit=units.deg).deg
+    date = args.date or night_date(longitude)
+
+    targets, coordinates = [], []
+    for i, target in enumerate(read_targets(args.targets), 1):
+        try:
+            if "name" not in target:
+                raise ValueError("no name")
+            coordinates.append(parse_coordinates(target.get("ra"), target.get("dec")))
+            targets.append(target)
+        except ValueError as e:
+            print(f"Skipping target {i} ({target.get('name', '?')}): {e}")
+    if not targets:
+        parser.error("No valid targets")
+    ra, dec = np.array(coordinates).T
+
+    ephemeris = NightEphemeris(date, longitude, latitude, args.step)
+    night = ephemeris.sun_alt < args.sun_altitude
+    times, lst = ephemeris.times[night], ephemeris.lst[night]
+    if not len(times):
+        parser.error(f"No night time with the Sun below {args.sun_altitude} deg")
+    first, _, best, _ = visibility_windows(ra, dec, lst, latitude, args.max_airmass)
+
+    # observable targets in order of their best time, then the others
+    order = np.lexsort((first, np.where(best >= 0, best, len(times))))
+    observations = []
+    for i in order:
+        if first[i] < 0 and not args.all:
+            print(f"Skipping {targets[i]['name']}: airmass > {args.max_airmass}")
+            continue
+        observations.append(observation(targets[i], ra[i], dec[i], args.pi))
+
+    n = write_schedule(
+        args.output, render_programs(args.template, observations, args.workers)
+    )
+    print(
+        f"Night of {date}: {times[0].isot[:16]} to {times[-1].isot[:16]} UTC. "
+        f"Wrote {n} of {len(targets)} programs to {args.output}"
+    )
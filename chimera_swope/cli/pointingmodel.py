@@ -0,0 +1,356 @@
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from astropy import units
+from astropy.coordinates import Angle, SkyCoord
+from astropy.io import fits
+from chimera.core.bus import Bus
+from chimera.core.chimera_config import ChimeraConfig
+from chimera.core.constants import CHIMERA_CONFIG_DEFAULT_FILENAME
+from chimera.core.proxy import Proxy
+
+from chimera_swope.cli.pointingplan import (
+    Checkpoint,
+    SlewCostModel,
+    load_sessions,
+    order_points,
+    remove_measured,
+    vogel_points,
+)
+from chimera_swope.controllers.platesolver import PlateSolver
+from chimera_swope.controllers.sourcedetection import detect_sources
+from chimera_swope.sky import (
+    StarCatalog,
+    altaz_to_radec,
+    local_sidereal_time,
+)
+
+log = logging.getLogger("chimera-pointing-model")
+
+
+class PointingModelRunner:
+    """
+    Acquires the data for a pointing model talking to the telescope and
+    camera proxies directly.
+
+    For every point the telescope slews, tracks and exposes; the exposure is
+    then plate solved in background while the telescope is already slewing
+    to the next point, so the solve time is hidden behind the slew. Points
+    are visited in order of slew time from the current position and every
+    measurement goes to a checkpoint, so an interrupted session continues
+    with the missing points when run again.
+    """
+
+    def __init__(
+        self,
+        telescope,
+        camera,
+        checkpoint,
+        points,
+        cost_model,
+        longitude,
+        solver=None,
+        catalog=None,
+        filterwheel=None,
+        filter_name=None,
+        exptime=2.0,
+        fwhm=3.0,
+        threshold=5.0,
+    ):
+        """
+        @param telescope: Telescope proxy
+        @param camera: Camera proxy
+        @param checkpoint: Checkpoint of the plan
+        @param points: Array of shape (n, 2) with the planned (az, alt)
+        @param cost_model: SlewCostModel used to order the points
+        @param longitude: Site longitude in degrees
+        @param solver: PlateSolver for the exposures. None only takes them.
+        @param catalog: StarCatalog. If given, each point is replaced by the
+                        nearest star, otherwise the sky at the point is used.
+        @param filterwheel: Filter wheel proxy, if the filter has to be set
+        @param filter_name: Filter used for the exposures
+        @param exptime: Exposure time in seconds
+        @param fwhm: Expected star FWHM in pixels, for the source detection
+        @param threshold: Detection threshold in sigma above the background
+        """
+        self.telescope = telescope
+        self.camera = camera
+        self.checkpoint = checkpoint
+        self.points = np.asarray(points, dtype=float)
+        self.cost_model = cost_model
+        self.longitude = longitude
+        self.solver = solver
+        self.catalog = catalog
+        self.filterwheel = filterwheel
+        self.filter_name = filter_name
+        self.exptime = exptime
+        self.fwhm = fwhm
+        self.threshold = threshold
+
+        self._abort = threading.Event()
+        # a single worker keeps the plate solver hints in frame order
+        self._solver_executor = ThreadPoolExecutor(max_workers=1)
+
+    def target(self, az, alt):
+        """
+        @return: (name, ra, dec) to point at for a planned position, with the
+                 coordinates in degrees
+        """
+        lst = local_sidereal_time(self.longitude)
+        ra, dec = altaz_to_radec(alt, az, lst, self.cost_model.latitude)
+        if self.catalog is None:
+            return f"alt{alt:.2f}_az{az:.2f}", float(ra), float(dec)
+        (idx,), (distance,) = self.catalog.nearest(ra, dec)
+        log.debug(f"Nearest star {self.catalog.names[idx]} at {distance:.2f} deg")
+        return (
+            str(self.catalog.names[idx]),
+            float(self.catalog.ra[idx]),
+            float(self.catalog.dec[idx]),
+        )
+
+    def measure(self, name, ra, dec):
+        """
+        Slew to a target and expose it.
+
+        @return: Dict with the exposure filename and the telescope position
+                 reported after the exposure
+        """
+        self.telescope.slew_to_ra_dec(ra / 15.0, dec)
+        if self._abort.is_set():
+            raise InterruptedError("aborted")
+        images = self.camera.expose(
+            exptime=self.exptime,
+            frames=1,
+            shutter="OPEN",
+            object_name=f"{name.replace(' ', '')}_pmhelper",
+        )
+        tel_ra, tel_dec = self.telescope.get_position_ra_dec()
+        tel_alt, tel_az = self.telescope.get_position_alt_az()
+        return {
+            "name": name,
+            "filename": images[0].filename,
+            "target_ra": ra,
+            "target_dec": dec,
+            "telescope_ra": tel_ra * 15.0,
+            "telescope_dec": tel_dec,
+            "alt": tel_alt,
+            "az": tel_az,
+            "lst": local_sidereal_time(self.longitude),
+            "time": time.time(),
+        }
+
+    def solve(self, index, measurement):
+        """
+        Plate solve an exposure and record the point on the checkpoint.
+        Runs on the solver worker.
+        """
+        if self.solver is None:
+            self.checkpoint.record(index, "ok", **measurement)
+            return
+
+        try:
+            data = fits.getdata(measurement["filename"]).astype(float)
+            height, width = data.shape
+            sources = detect_sources(data, self.fwhm, self.threshold)
+            hint = SkyCoord(
+                measurement["telescope_ra"], measurement["telescope_dec"], unit="deg"
+            )
+            wcs = self.solver.solve(sources, width, height, hint=hint)
+        except Exception as e:
+            log.error(f"Point {index}: could not solve {measurement['filename']}: {e}")
+            self.checkpoint.record(index, f"error: {e}", **measurement)
+            return
+        if wcs is None:
+            log.warning(f"Point {index}: {measurement['filename']} not solved")
+            self.checkpoint.record(index, "not solved", **measurement)
+            return
+
+        center = wcs.pixel_to_world(width / 2 - 0.5, height / 2 - 0.5)
+        solved_ra, solved_dec = float(center.ra.deg), float(center.dec.deg)
+        offset = center.separation(hint).to_value(units.arcsec)
+        log.info(f"Point {index}: solved, {offset:.1f} arcsec from the telescope")
+        self.checkpoint.record(
+            index, "ok", solved_ra=solved_ra, solved_dec=solved_dec, **measurement
+        )
+
+    def run(self):
+        """
+        Measure all the points missing on the checkpoint.
+
+        @return: Number of points measured on this run
+        """
+        done = self.checkpoint.done
+        missing = [i for i in range(len(self.points)) if i not in done]
+        if not missing:
+            log.info("All points already measured")
+            return 0
+        log.info(f"{len(done)} points already measured, {len(missing)} to go")
+
+        if self.filterwheel is not None and self.filter_name:
+            self.filterwheel.set_filter(self.filter_name)
+
+        alt, az = self.telescope.get_position_alt_az()
+        order = order_points(self.points[missing], (az, alt), self.cost_model)
+        pending = []
+        measured = 0
+        try:
+            for n, index in enumerate(np.asarray(missing)[order], 1):
+                if self._abort.is_set():
+                    break
+                az, alt = self.points[index]
+                name, ra, dec = self.target(az, alt)
+                log.info(
+                    f"Point {index} ({n} of {len(missing)}): {name} alt {alt:.1f} az {az:.1f}"
+                )
+                try:
+                    measurement = self.measure(name, ra, dec)
+                except InterruptedError:
+                    break
+                except Exception as e:
+                    # not recorded, so the point is tried again on the next run
+                    log.error(f"Point {index}: {type(e).__name__}: {e}")
+                    continue
+                # solve while the telescope goes to the next point
+                pending.append(
+                    self._solver_executor.submit(self.solve, index, measurement)
+                )
+                measured += 1
+        except KeyboardInterrupt:
+            self.abort()
+            raise
+        finally:
+            for future in pending:
+                future.result()
+            self._solver_executor.shutdown()
+        return measured
+
+    def abort(self):
+        """
+        Stop after the current point, aborting the running slew.
+        """
+        self._abort.set()
+        try:
+            self.telescope.abort_slew()
+        except Exception as e:
+            log.error(f"Could not abort the slew: {e}")
+
+
+def find_instrument(names, bus, cls):
+    """
+    @param names: Instrument names of the configuration
+    @param cls: Instrument class name, e.g. Telescope
+    @return: Proxy of the first reachable instrument implementing the class
+    """
+    for name in names:
+        proxy = Proxy(name, bus)
+        try:
+            if proxy.features(cls):
+                return proxy
+        except Exception as e:
+            log.warning(f"Could not reach {name}: {e}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Acquire a pointing model talking to chimera directly. "
+        "Run it again with the same arguments to resume an interrupted session."
+    )
+    parser.add_argument("--pointings", type=int, default=50)
+    parser.add_argument("--altitude-min", type=float, default=30.0)
+    parser.add_argument("--altitude-max", type=float, default=85.0)
+    parser.add_argument("--azimuth-min", type=float, default=0.0)
+    parser.add_argument("--azimuth-max", type=float, default=360.0)
+    parser.add_argument("--checkpoint", default="pointing_model.jsonl")
+    parser.add_argument(
+        "--exclude",
+        nargs="+",
+        default=[],
+        help="Previous sessions (checkpoints, pm_helper .txt or .fits files) "
+        "whose points are not measured again",
+    )
+    parser.add_argument("--exclude-distance", type=float, default=4.0, help="deg")
+    parser.add_argument("--catalog", help=".edb star catalog, e.g. SAO.edb")
+    parser.add_argument("--mag-min", type=float)
+    parser.add_argument("--mag-max", type=float)
+    parser.add_argument("--exptime", type=float, default=2.0)
+    parser.add_argument("--filter")
+    parser.add_argument("--no-solve", action="store_true")
+    parser.add_argument("--solve-field", default="solve-field")
+    parser.add_argument("--astrometry-config")
+    parser.add_argument("--ha-rate", type=float, default=1.0, help="deg/s")
+    parser.add_argument("--dec-rate", type=float, default=1.0, help="deg/s")
+    parser.add_argument("--dome-rate", type=float, default=2.0, help="deg/s")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds")
+    parser.add_argument("--telescope", help="Telescope name, default the first one")
+    parser.add_argument("--camera", help="Camera name, default the first one")
+    parser.add_argument("--filterwheel", help="Filter wheel name")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    config_path = os.getenv("CHIMERA_CONFIG", CHIMERA_CONFIG_DEFAULT_FILENAME)
+    cfg = ChimeraConfig.from_file(config_path)
+    site = next(iter(cfg.sites.values()))
+    latitude = Angle(site["latitude"], unit=units.deg).deg
+    longitude = Angle(site["longitude"], unit=units.deg).deg
+
+    bus = Bus(f"tcp://127.0.0.1:{random.randint(10000, 60000)}")
+    threading.Thread(target=bus.run_forever, daemon=True).start()
+
+    def instrument(name, cls):
+        proxy = Proxy(name, bus) if name else find_instrument(cfg.instruments, bus, cls)
+        if proxy is None:
+            parser.error(f"No {cls} found on {config_path}")
+        proxy.ping()
+        return proxy
+
+    telescope = instrument(args.telescope, "Telescope")
+    camera = instrument(args.camera, "Camera")
+    filterwheel = instrument(args.filterwheel, "FilterWheel") if args.filter else None
+
+    points = vogel_points(args.pointings, args.altitude_min, args.altitude_max)
+    points = points[
+        (points[:, 0] >= args.azimuth_min) & (points[:, 0] <= args.azimuth_max)
+    ]
+    if args.exclude:
+        points, skipped = remove_measured(
+            points, load_sessions(args.exclude), args.exclude_distance
+        )
+        log.info(f"Skipping {len(skipped)} points measured on previous sessions")
+    checkpoint = Checkpoint(args.checkpoint, points)
+    catalog = None
+    if args.catalog:
+        catalog = StarCatalog.from_edb(args.catalog).select(args.mag_min, args.mag_max)
+    solver = None
+    if not args.no_solve:
+        solver = PlateSolver(args.solve_field, config=args.astrometry_config)
+
+    runner = PointingModelRunner(
+        telescope,
+        camera,
+        checkpoint,
+        points,
+        SlewCostModel(
+            latitude, args.ha_rate, args.dec_rate, args.dome_rate, args.settle
+        ),
+        longitude,
+        solver=solver,
+        catalog=catalog,
+        filterwheel=filterwheel,
+        filter_name=args.filter,
+        exptime=args.exptime,
+    )
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        log.info("Interrupted, run again with the same arguments to resume")
+    finally:
+        checkpoint.close()
+    done = len(checkpoint.done)
+    log.info(f"{done} of {len(points)} points measured, saved on {args.checkpoint}")
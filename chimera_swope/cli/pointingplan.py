@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from astropy.io import fits
+
+from chimera_swope.sky import altaz_to_radec, great_circle_distance
+
+
+def vogel_points(n, altitude_min=30.0, altitude_max=85.0):
+    """
+    Equally spaced points on the sky between two altitudes (Vogel's method).
+    Ref: http://blog.marmakoide.org/?p=1
+
+    @param n: Number of points
+    @return: Array of shape (n, 2) with (az, alt) in degrees
+    """
+    alt = np.sqrt(np.arange(n) / float(n)) * (altitude_min - altitude_max)
+    az = np.degrees(np.pi * (3 - np.sqrt(5)) * np.arange(n)) % 360.0
+    return np.column_stack([az, alt + altitude_max])
+
+
+def plan_id(points):
+    """
+    @return: Identifier of a list of (az, alt) points, used to tell whether a
+             checkpoint belongs to the same plan
+    """
+    rounded = np.round(np.asarray(points, dtype=float), 3)
+    return hashlib.sha256(rounded.tobytes()).hexdigest()[:16]
+
+
+def load_session(filename):
+    """
+    Read the positions measured on a previous pointing session.
+
+    @param filename: Checkpoint (.jsonl), FITS table with AZ and ALT columns
+                     or text file with the azimuth and altitude columns, as
+                     written by pm_helper
+    @return: Array of shape (n, 2) with (az, alt) in degrees
+    """
+    if filename.endswith(".jsonl"):
+        with open(filename) as f:
+            f.readline()  # plan
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        points = [(r["az"], r["alt"]) for r in records if r.get("status") == "ok"]
+        return np.array(points, dtype=float).reshape(-1, 2)
+    if filename.endswith((".fits", ".fit", ".fits.gz")):
+        data = fits.getdata(filename)
+        return np.column_stack([data["AZ"], data["ALT"]]).astype(float)
+    return np.loadtxt(filename, usecols=(0, 1), ndmin=2)
+
+
+def load_sessions(filenames):
+    """
+    @param filenames: Files of previous sessions, see load_session
+    @return: Array of shape (n, 2) with the (az, alt) of all the sessions
+    """
+    sessions = [load_session(filename) for filename in filenames]
+    return np.concatenate(sessions) if sessions else np.empty((0, 2))
+
+
+def remove_measured(points, measured, min_distance=4.0):
+    """
+    Drop the planned points already measured on previous sessions.
+
+    @param points: Array of shape (n, 2) with the planned (az, alt)
+    @param measured: Array of shape (m, 2) with the measured (az, alt)
+    @param min_distance: Planned points closer than this to a measured one,
+                         in degrees on the sky, are dropped
+    @return: (kept points, dropped points)
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    measured = np.asarray(measured, dtype=float).reshape(-1, 2)
+    if not len(points) or not len(measured):
+        return points, np.empty((0, 2))
+    distances = great_circle_distance(
+        points[:, None, 0],
+        points[:, None, 1],
+        measured[None, :, 0],
+        measured[None, :, 1],
+    )
+    close = distances.min(axis=1) < min_distance
+    return points[~close], points[close]
+
+
+@dataclass(frozen=True, slots=True)
+class SlewCostModel:
+    """
+    Time to move between two horizontal positions. The mount axes and the
+    dome move at the same time, so the slowest of them sets the time, plus
+    a fixed settling time.
+    """
+
+    latitude: float  # degrees
+    ha_rate: float = 1.0  # degrees/s
+    dec_rate: float = 1.0  # degrees/s
+    dome_rate: float = 2.0  # degrees/s, 0 if there is no dome to wait for
+    settle: float = 5.0  # seconds
+
+    def cost(self, start, targets):
+        """
+        @param start: (az, alt) of the current position in degrees
+        @param targets: Array of shape (n, 2) with (az, alt) in degrees
+        @return: Array with the slew time to each target in seconds
+        """
+        targets = np.atleast_2d(targets)
+        # with lst=0 the returned ra is minus the hour angle
+        ra0, dec0 = altaz_to_radec(start[1], start[0], 0.0, self.latitude)
+        ra, dec = altaz_to_radec(targets[:, 1], targets[:, 0], 0.0, self.latitude)
+        d_ha = np.abs((ra - ra0 + 180.0) % 360.0 - 180.0)
+        seconds = np.maximum(d_ha / self.ha_rate, np.abs(dec - dec0) / self.dec_rate)
+        if self.dome_rate > 0:
+            d_az = np.abs((targets[:, 0] - start[0] + 180.0) % 360.0 - 180.0)
+            seconds = np.maximum(seconds, d_az / self.dome_rate)
+        return seconds + self.settle
+
+
+def order_points(points, start, model):
+    """
+    Visiting order of the points, always slewing next to the cheapest one
+    from the current position.
+
+    @param points: Array of shape (n, 2) with (az, alt) in degrees
+    @param start: (az, alt) where the telescope is
+    @param model: SlewCostModel
+    @return: Array with the indices of the points in visiting order
+    """
+    points = np.asarray(points, dtype=float)
+    remaining = list(range(len(points)))
+    order = []
+    position = start
+    while remaining:
+        costs = model.cost(position, points[remaining])
+        index = remaining.pop(int(np.argmin(costs)))
+        order.append(index)
+        position = points[index]
+    return np.array(order, dtype=int)
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines file with the measured points of a pointing model
+    session. Every record is flushed to disk as soon as it is written, so an
+    interrupted session can be resumed where it stopped by running it again
+    with the same plan.
+
+    The first line identifies the plan; a file of a different plan is never
+    appended to.
+    """
+
+    def __init__(self, filename, points):
+        """
+        @param filename: Checkpoint file
+        @param points: Planned (az, alt) points
+        @raise ValueError: If the file belongs to another plan
+        """
+        self.filename = filename
+        self.plan = plan_id(points)
+        self.records = []
+        self._lock = threading.Lock()
+
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            with open(filename) as f:
+                line = f.readline()
+                if json.loads(line).get("plan") != self.plan:
+                    raise ValueError(
+                        f"{filename} belongs to another plan, use a new file"
+                    )
+                for line in f:
+                    try:
+                        self.records.append(json.loads(line))
+                    except ValueError:
+                        pass  # line truncated by an interruption
+            self._file = open(filename, "a")
+            if not line.endswith("\n"):
+                self._file.write("\n")
+        else:
+            self._file = open(filename, "w")
+            self._write(
+                {
+                    "plan": self.plan,
+                    "points": np.asarray(points, dtype=float).tolist(),
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+                }
+            )
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @property
+    def done(self):
+        """
+        @return: Set of the indices of the successfully measured points
+        """
+        with self._lock:
+            return {r["index"] for r in self.records if r.get("status") == "ok"}
+
+    def record(self, index, status, **values):
+        """
+        @param index: Index of the point on the plan
+        @param status: "ok" or the reason the point failed
+        @param values: Measurements, JSON serializable
+        """
+        record = {"index": int(index), "status": status, **values}
+        with self._lock:
+            self.records.append(record)
+            self._write(record)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,101 @@
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+import yaml
+
+
+def validate_schedule(text):
+    """
+    Check that a chimera-sched YAML file is well formed before loading it.
+
+    @param text: YAML file contents
+    @return: (number of programs, number of actions)
+    @raise ValueError: With the reason if the file is not valid
+    """
+    try:
+        document = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML: {e}")
+    if not isinstance(document, dict) or not isinstance(document.get("programs"), list):
+        raise ValueError("Expected a 'programs' list")
+    if not document["programs"]:
+        raise ValueError("No programs defined")
+
+    n_actions = 0
+    for i, program in enumerate(document["programs"], 1):
+        if not isinstance(program, dict):
+            raise ValueError(f"Program {i} is not a mapping")
+        actions = program.get("actions")
+        if not isinstance(actions, list) or not actions:
+            raise ValueError(f"Program {i} has no actions")
+        for j, action in enumerate(actions, 1):
+            if not isinstance(action, dict) or not isinstance(
+                action.get("action"), str
+            ):
+                raise ValueError(f"Program {i}, action {j} has no 'action' type")
+        n_actions += len(actions)
+    return len(document["programs"]), n_actions
+
+
+def save_schedule(text, name, directory="~/.chimera/schedules"):
+    """
+    Save an uploaded schedule to a new file, never overwriting previous ones.
+
+    @param text: File contents
+    @param name: Uploaded file name, used as part of the new file name
+    @param directory: Directory where schedules are kept
+    @return: Path of the saved file
+    """
+    directory = os.path.expanduser(directory)
+    os.makedirs(directory, exist_ok=True)
+    stem = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.splitext(name)[0]) or "sched"
+    fd, path = tempfile.mkstemp(
+        prefix=f"{time.strftime('%Y%m%dT%H%M%S')}_{stem}_",
+        suffix=".yaml",
+        dir=directory,
+    )
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    return path
+
+
+class ConsoleBuffer:
+    """
+    Bounded, thread-safe text buffer shared by the clients' scheduler
+    consoles. Writers append from any thread; each client reads everything
+    written after its own cursor in a single chunk.
+    """
+
+    def __init__(self, max_chunks=2000):
+        self._chunks = deque(maxlen=max_chunks)
+        self._next = 0  # sequence number of the next chunk
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self._chunks.append(text)
+            self._next += 1
+
+    def read(self, cursor=0):
+        """
+        @param cursor: Value returned by the previous read, 0 to read all
+        @return: (text written since cursor, new cursor)
+        """
+        with self._lock:
+            first = self._next - len(self._chunks)
+            start = max(cursor, first) - first
+            text = "".join(islice(self._chunks, start, None))
+            return text, self._next
+
+
+def format_event(name, *args):
+    """
+    @return: Console line describing a scheduler event.
+    """
+    details = " ".join(str(arg) for arg in args if arg is not None)
+    return f"{time.strftime('%H:%M:%S')} {name}: {details}\n"
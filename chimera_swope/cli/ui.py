@@ -1,7 +1,7 @@
 import asyncio
+import json
 import os
 import random
-import time
 from concurrent.futures.thread import ThreadPoolExecutor
 
 from chimera.core.bus import Bus
@@ -16,6 +16,27 @@ from nicegui.events import (
     ValueChangeEventArguments,
 )
 
+from chimera_swope.cli.commands import (
+    CommandExecutor,
+    CommandQueueFullError,
+    NudgeCoalescer,
+)
+from chimera_swope.cli.discovery import InstrumentDiscovery
+from chimera_swope.cli.footprints import (
+    HENRIETTA_SLIT_LENGTH,
+    HENRIETTA_SLIT_WIDTH,
+    FootprintCache,
+    detector_footprint,
+    slit_footprint,
+)
+from chimera_swope.cli.schedconsole import (
+    ConsoleBuffer,
+    format_event,
+    save_schedule,
+    validate_schedule,
+)
+from chimera_swope.cli.uistate import StateWorker
+
 
 class ToggleButton(ui.button):
     def __init__(self, *args, keyboard=None, **kwargs) -> None:
@@ -53,10 +74,10 @@ def setup() -> None:
         "current_focus": 0.0,
         "target_focus": 0.0,
         "current_rotator": 0.0,
-        "last_update": 0.0,
+        "last_image": "",
+        "command_status": "",
         "message": None,
-        "aladin": None,
-        "terminal": None,
+        "sched_file": "",
         "audio": None,
         "focus_min": 0,
         "focus_max": 1,
@@ -82,35 +103,6 @@ def setup() -> None:
     proxies["operator"] = []
     proxies["site"] = Proxy(next(iter(cfg.sites.keys())), bus)
 
-    # Connect to instruments from config
-    print("Connecting to instruments...")
-    for instrument in cfg.instruments.keys():
-        try:
-            proxy = Proxy(instrument, bus)
-            # Try to ping the proxy to see if it's reachable
-            try:
-                proxy.ping()
-                print(f"✓ Connected to {instrument}")
-
-                # Categorize proxy by its features
-                categorized = False
-                for cls in INSTRUMENT_CLASSES:
-                    if proxy.features(cls):
-                        proxies[cls.lower()].append(proxy)
-                        categorized = True
-                        break
-
-                if not categorized:
-                    print(
-                        f"  Warning: {instrument} does not match any known instrument class"
-                    )
-
-            except Exception as e:
-                print(f"✗ Could not reach {instrument}: {e}")
-
-        except Exception as e:
-            print(f"✗ Could not connect to {instrument}: {e}")
-
     # # Try to connect to controllers
     # for controller in cfg.controllers.keys():
     #     try:
@@ -130,90 +122,178 @@ def setup() -> None:
     #     except Exception as e:
     #         print(f"✗ Could not connect to controller {controller}: {e}")
 
-    # Set focus range if focuser is available
-    if proxies["focuser"]:
+    # All proxy I/O to keep the state up to date is done by the state worker,
+    # never on the UI event loop. Only changed values are pushed to the state.
+    state_worker = StateWorker()
+    state_worker.subscribe(state.update)
+
+    # Hardware commands never run on the UI event loop either: they are
+    # serialized per device on the command executor.
+    commands = CommandExecutor()
+
+    def command_progress(command):
+        active = commands.active()
+        status = " | ".join(str(c) for c in active) if active else str(command)
+        state_worker.publish({"command_status": status})
+
+    commands.subscribe(command_progress)
+
+    async def run_command(device, description, func, *args, abort=None):
+        """Run a hardware command off the event loop and report the outcome."""
+        try:
+            command = commands.submit(device, description, func, *args, abort=abort)
+        except CommandQueueFullError as e:
+            ui.notify(str(e), type="warning")
+            return
         try:
-            state["focus_min"], state["focus_max"] = proxies["focuser"][0].get_range()
-            print(f"Focuser range: {state['focus_min']} - {state['focus_max']}")
+            await asyncio.wrap_future(command.future)
+        except asyncio.CancelledError:
+            ui.notify(f"{description} cancelled")
         except Exception as e:
-            print(f"Could not get focuser range: {e}")
+            ui.notify(f"Error: {description}: {e}")
+        finally:
+            state_worker.refresh(device)
+
+    def commands_cancel():
+        tel_nudge.cancel()
+        commands.cancel()
 
     # Telescope methods
     def tel_slew_complete(ra=None, dec=None, status=None):
         print("Telescope slew complete callback")
-        tel_aladin_update(ra, dec)
+        state_worker.refresh("telescope")
 
-    def tel_update_coordinates():
-        if not proxies["telescope"]:
-            return
-        state["current_ra"], state["current_dec"] = proxies["telescope"][
-            0
-        ].get_position_ra_dec()
+    def tel_fetch_coordinates():
+        ra, dec = proxies["telescope"][0].get_position_ra_dec()
 
         # fixme: this should not be necessary: chimera bug
-        if not isinstance(state["current_ra"], float):
-            state["current_ra"] = float(state["current_ra"].to_d())
-        if not isinstance(state["current_dec"], float):
-            state["current_dec"] = float(state["current_dec"].to_d())
+        if not isinstance(ra, float):
+            ra = float(ra.to_d())
+        if not isinstance(dec, float):
+            dec = float(dec.to_d())
         # fixme end
 
-        state["current_ra_str"] = Coord.from_d(float(state["current_ra"])).strfcoord()
-        state["current_dec_str"] = Coord.from_d(float(state["current_dec"])).strfcoord()
-
-    def site_update_time():
-        state["current_ut_str"] = proxies["site"].ut().split(".")[0].replace("T", " ")
-        state["current_lst_str"] = proxies["site"].lst()
+        return {
+            "current_ra": ra,
+            "current_dec": dec,
+            "current_ra_str": Coord.from_d(float(ra)).strfcoord(),
+            "current_dec_str": Coord.from_d(float(dec)).strfcoord(),
+        }
+
+    def site_fetch_time():
+        return {
+            "current_ut_str": proxies["site"].ut().split(".")[0].replace("T", " "),
+            "current_lst_str": proxies["site"].lst(),
+        }
+
+    def tel_move_offset(north, east):
+        """Blocking offset move, run on the command executor."""
+        telescope = proxies["telescope"][0]
+        if north > 0:
+            telescope.move_north(north)
+        elif north < 0:
+            telescope.move_south(-north)
+        if east > 0:
+            telescope.move_east(east)
+        elif east < 0:
+            telescope.move_west(-east)
+        state_worker.refresh("telescope")
+
+    def tel_abort():
+        proxies["telescope"][0].abort_slew()
+
+    # nudges requested while the telescope moves are combined in one offset
+    tel_nudge = NudgeCoalescer(commands, "telescope", tel_move_offset, tel_abort)
 
     def tel_offset_north():
         if not proxies["telescope"]:
             return
-        proxies["telescope"][0].move_north(1)
-        tel_update_coordinates()
+        tel_nudge.add(north=1)
 
     def tel_offset_south():
         if not proxies["telescope"]:
             return
-        proxies["telescope"][0].move_south(1)
-        tel_update_coordinates()
+        tel_nudge.add(north=-1)
 
     def tel_offset_east():
         if not proxies["telescope"]:
             return
-        proxies["telescope"][0].move_east(1)
-        tel_update_coordinates()
+        tel_nudge.add(east=1)
 
     def tel_offset_west():
         if not proxies["telescope"]:
             return
-        proxies["telescope"][0].move_west(1)
-        tel_update_coordinates()
+        tel_nudge.add(east=-1)
 
-    # Chimera callbacks
-    if proxies["telescope"]:
-        proxies["telescope"][0].slew_complete += tel_slew_complete
+    def focuser_fetch():
+        return {"current_focus": proxies["focuser"][0].get_position()}
 
-    def update_rotator(*args, **kwargs):
-        """Callback for rotator slew complete."""
-        pass
+    def focuser_fetch_range():
+        focus_min, focus_max = proxies["focuser"][0].get_range()
+        print(f"Focuser range: {focus_min} - {focus_max}")
+        return {"focus_min": focus_min, "focus_max": focus_max}
 
-    if proxies["rotator"]:
-        proxies["rotator"][0].slew_complete += update_rotator
+    def rotator_fetch():
+        position = proxies["rotator"][0].get_position()
+        return {"current_rotator": position, "current_pa": f"{position:.3f}º"}
+
+    def rotator_move_complete(*args, **kwargs):
+        """Callback for rotator move complete."""
+        state_worker.refresh("rotator")
+
+    def cam_readout_complete(image, status=None):
+        state_worker.publish({"last_image": image.filename})
+
+    # Instrument footprints drawn on the sky view, filled as cameras connect
+    footprints = FootprintCache()
+
+    def cam_add_footprint(name, camera):
+        footprints.add(
+            detector_footprint(
+                name, camera.get_physical_size(), camera.get_pixel_size()
+            )
+        )
+        if "henrietta" in name.lower():
+            footprints.add(
+                slit_footprint(
+                    f"{name} slit", HENRIETTA_SLIT_LENGTH, HENRIETTA_SLIT_WIDTH
+                )
+            )
 
-    # Data update methods
-    def update_proxy_data():
-        if time.time() - state["last_update"] < 1.0:
+    def instrument_connected(name, proxy, cls):
+        if cls is None:
             return
-        state["last_update"] = time.time()
-        tel_update_coordinates()
-        focuser_update()
-        site_update_time()
-
-    def focuser_update():
-        if proxies["focuser"]:
-            state["current_focus"] = proxies["focuser"][0].get_position()
-        if proxies["rotator"]:
-            state["current_rotator"] = proxies["rotator"][0].get_position()
-            state["current_pa"] = f"{state['current_rotator']:.3f}º"
+        kind = cls.lower()
+        proxies[kind].append(proxy)
+        if kind == "camera":
+            try:
+                cam_add_footprint(name, proxy)
+            except Exception as e:
+                print(f"Could not get {name} geometry: {e}")
+        # the UI uses the first instrument of each kind
+        if len(proxies[kind]) > 1:
+            return
+        # Chimera callbacks
+        if kind == "telescope":
+            proxy.slew_complete += tel_slew_complete
+            state_worker.add_source("telescope", tel_fetch_coordinates)
+        elif kind == "rotator":
+            proxy.move_complete += rotator_move_complete
+            state_worker.add_source("rotator", rotator_fetch)
+        elif kind == "focuser":
+            state_worker.add_source("focuser", focuser_fetch)
+            state_worker.add_source("focuser_range", focuser_fetch_range, None)
+        elif kind == "camera":
+            proxy.readout_complete += cam_readout_complete
+
+    # Connect to instruments from config. Unreachable instruments are retried
+    # in background and show up on the next page load once connected.
+    print("Connecting to instruments...")
+    discovery = InstrumentDiscovery(
+        lambda name: Proxy(name, bus), INSTRUMENT_CLASSES, instrument_connected
+    )
+    discovery.discover(cfg.instruments)
+    state_worker.add_source("site", site_fetch_time)
 
     def operator_request(type, msg):
         print(f"xxx Operator request: {type} -- {msg}")
@@ -245,25 +325,27 @@ def setup() -> None:
             return
 
     # Button handlers
-    def focuser_set_btn():
+    async def focuser_set_btn():
         if not proxies["focuser"]:
             ui.notify("Focuser not connected")
             return
-        try:
-            print(f"Setting focus to {state['target_focus']}")
-            proxies["focuser"][0].move_to(int(state["target_focus"]))
-        except Exception as e:
-            ui.notify(f"Error setting focus: {e}")
-        focuser_update()
+        target = int(state["target_focus"])
+        print(f"Setting focus to {target}")
+        await run_command(
+            "focuser", f"Focus to {target}", proxies["focuser"][0].move_to, target
+        )
 
-    def rotator_move_btn():
+    async def rotator_move_btn():
         if not proxies["rotator"]:
             ui.notify("Rotator not connected")
             return
-        ui.notify(f"Offsetting rotator by {state['offset_pa']:.3f}º")
-        proxies["rotator"][0].move_by(state["offset_pa"])
+        offset = state["offset_pa"]
+        ui.notify(f"Offsetting rotator by {offset:.3f}º")
         state["offset_pa"] = 0.0
         rotator_offset_update(state["offset_pa"])
+        await run_command(
+            "rotator", f"Rotate by {offset:.3f}º", proxies["rotator"][0].move_by, offset
+        )
 
     def rotator_set_offset(event: ValueChangeEventArguments):
         state["offset_pa"] = float(event.value)
@@ -294,31 +376,76 @@ def setup() -> None:
                 ui.notify("Moving South")
                 tel_offset_south()
 
-    async def sched_run_subprocess(arg="--help"):
-        state["terminal"].clear()
-        args = arg.split()
+    # Scheduler console, shared by all clients. The scheduler controller is
+    # used directly over the bus and its events are streamed to the console.
+    sched_console = ConsoleBuffer()
+    sched = {"proxy": None}
+
+    def sched_event(name):
+        def callback(*args):
+            sched_console.write(format_event(name, *args))
+
+        return callback
+
+    def sched_connect():
+        """Scheduler proxy, connected and subscribed on first use."""
+        if sched["proxy"] is None:
+            name = next((c for c in cfg.controllers if "scheduler" in c.lower()), None)
+            if name is None:
+                raise RuntimeError("No scheduler in the configuration")
+            proxy = Proxy(name, bus)
+            proxy.ping()
+            proxy.program_begin += sched_event("program_begin")
+            proxy.program_complete += sched_event("program_complete")
+            proxy.action_begin += sched_event("action_begin")
+            proxy.action_complete += sched_event("action_complete")
+            proxy.state_changed += sched_event("state_changed")
+            sched["proxy"] = proxy
+            sched_console.write(format_event("connected", name))
+        return sched["proxy"]
+
+    async def sched_start():
+        await run_command(
+            "scheduler", "Start scheduler", lambda: sched_connect().start()
+        )
+
+    async def sched_stop():
+        await run_command("scheduler", "Stop scheduler", lambda: sched_connect().stop())
+
+    async def sched_load():
+        if not state["sched_file"]:
+            ui.notify("Upload a schedule first", type="warning")
+            return
+        # programs are stored in the scheduler database by chimera-sched
         process = await asyncio.create_subprocess_exec(
             "chimera-sched",
-            *args,
+            "--new",
+            "-f",
+            state["sched_file"],
             "--config",
             config_path,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
         )
-
-        async def sched_write_to_terminal(stream: asyncio.StreamReader) -> None:
-            while chunk := await stream.read(128):
-                state["terminal"].write(chunk)
-
-        await asyncio.gather(
-            sched_write_to_terminal(process.stdout),
-            sched_write_to_terminal(process.stderr),
-            process.wait(),
+        while chunk := await process.stdout.read(65536):
+            sched_console.write(chunk.decode(errors="replace"))
+        await process.wait()
+        sched_console.write(
+            format_event("load", state["sched_file"], process.returncode)
         )
 
     async def sched_upload(e: UploadEventArguments):
-        ui.notify(f"Uploaded {e.file.name}")
-        await e.file.save("/tmp/sched.yaml")  # fixme
+        text = await e.file.text()
+        try:
+            n_programs, n_actions = validate_schedule(text)
+        except ValueError as error:
+            ui.notify(f"{e.file.name}: {error}", type="negative")
+            return
+        state["sched_file"] = save_schedule(text, e.file.name)
+        ui.notify(f"Uploaded {e.file.name}: {n_programs} programs, {n_actions} actions")
+
+    # stream the scheduler events from startup
+    commands.submit("scheduler", "Connect scheduler", sched_connect)
 
     def tweet_handler(message: str):
         state["audio"].play()
@@ -342,6 +469,12 @@ def setup() -> None:
             proxies["operator"][0].release()
 
     def tel_aladin_show():
+        """
+        Sky view of the current pointing. Each client gets a single Aladin
+        instance; afterwards only gotoRaDec and footprint overlay updates are
+        sent, and only when the pointing or the PA changed, so the survey
+        tiles are not reloaded.
+        """
         ui.add_body_html(
             "<script src='https://aladin.cds.unistra.fr/AladinLite/api/v3/latest/aladin.js' charset='utf-8'></script>"
         )
@@ -350,47 +483,50 @@ def setup() -> None:
             .props('id="aladin-lite-div"')
             .style("width: 400px; height: 400px;")
         )
-        state["aladin"] = aladin_div
-        tel_aladin_update()
-        ui.button("Update", on_click=tel_aladin_update)
-        return aladin_div
-
-    def tel_aladin_update(ra=None, dec=None, draw_footprint=False):
-        tel_update_coordinates()
         ra = state["current_ra"] * 15  # convert RA from hours to degrees
         dec = state["current_dec"]
-
-        with state["aladin"]:
-            ui.run_javascript(
-                f"""
-                aladin = A.aladin('#aladin-lite-div', {{
+        ui.run_javascript(
+            f"""
+            A.init.then(() => {{
+                window.swopeAladin = A.aladin('#aladin-lite-div', {{
                             fov:0.5, target: '{ra} {dec}', showReticle: false,
                             showFrame: false, showLayersControl: false, showGotoControl: false, showProjectionControl: false
                             }});
-            """
-            )
+                window.swopeFootprints = A.graphicOverlay({{lineWidth: 2}});
+                window.swopeAladin.addOverlay(window.swopeFootprints);
+            }});
+        """
+        )
 
-            if draw_footprint:
-                ccd_dims = 4096 * 0.435 / 3600, 4096 * 0.435 / 3600  # degrees
-                ccd_footprint = [
-                    [ra - ccd_dims[0] / 2, dec - ccd_dims[1] / 2],
-                    [ra + ccd_dims[0] / 2, dec - ccd_dims[1] / 2],
-                    [ra + ccd_dims[0] / 2, dec + ccd_dims[1] / 2],
-                    [ra - ccd_dims[0] / 2, dec + ccd_dims[1] / 2],
-                ]
-                print("CCD footprint:", ccd_footprint)
-                ui.run_javascript(
-                    f"""
-                    var overlay = A.graphicOverlay({{color: '#ee2345', lineWidth: 3}});
-                    aladin.addOverlay(overlay);
-                    overlay.add(A.polygon({ccd_footprint}));                            
-                """
+        shown = {"view": None}
+
+        def tel_aladin_update(force=False):
+            ra = state["current_ra"] * 15
+            dec = state["current_dec"]
+            pa = state["current_rotator"]
+            view = (round(ra, 6), round(dec, 6), round(pa, 1), len(footprints))
+            if view == shown["view"] and not force:
+                return
+            shown["view"] = view
+
+            commands = [
+                f"window.swopeAladin.gotoRaDec({ra}, {dec});",
+                "window.swopeFootprints.removeAll();",
+            ]
+            for footprint, vertices in footprints.polygons(ra, dec, pa):
+                commands.append(
+                    f"window.swopeFootprints.add(A.polygon({json.dumps(vertices)}, "
+                    f"{{color: '{footprint.color}'}}));"
                 )
+            ui.run_javascript(f"A.init.then(() => {{ {' '.join(commands)} }});")
+
+        ui.timer(1.0, tel_aladin_update)
+        ui.button("Update", on_click=lambda: tel_aladin_update(force=True))
+        return aladin_div
 
     @ui.page("/")
     def page():
         """Main page definition."""
-        update_proxy_data()
         keyboard = ui.keyboard(on_key=tel_handle_key_input)
 
         tweet.subscribe(tweet_handler)
@@ -491,32 +627,26 @@ def setup() -> None:
                 with ui.grid(columns=2):
                     ui.upload(on_upload=sched_upload, auto_upload=True, max_files=1)
                     with ui.button_group():
-                        ui.button(
-                            "Load file",
-                            on_click=lambda: sched_run_subprocess(
-                                "--new -f /tmp/sched.yaml"
-                            ),
-                            color="blue",
-                        )
-                        ui.button(
-                            "Start",
-                            on_click=lambda: sched_run_subprocess("--start"),
-                            color="green",
-                        )
-                        ui.button(
-                            "Stop",
-                            on_click=lambda: sched_run_subprocess("--stop"),
-                            color="red",
-                        )
-                        ui.button(
-                            "Monitor",
-                            on_click=lambda: sched_run_subprocess("--monitor"),
-                            color="blue",
-                        )
-                state["terminal"] = ui.xterm(
-                    {"cols": 120, "rows": 40, "convertEol": True}
+                        ui.button("Load file", on_click=sched_load, color="blue")
+                        ui.button("Start", on_click=sched_start, color="green")
+                        ui.button("Stop", on_click=sched_stop, color="red")
+                ui.label().bind_text_from(
+                    state, "sched_file", backward=lambda f: f"Schedule: {f}"
                 )
-                state["terminal"].on_bell(lambda: ui.notify("🔔 scheduler 🔔"))
+                terminal = ui.xterm({"cols": 120, "rows": 40, "convertEol": True})
+                terminal.on_bell(lambda: ui.notify("🔔 scheduler 🔔"))
+
+                # write what arrived since the last flush in a single chunk
+                console_cursor = {"value": 0}
+
+                def sched_console_flush():
+                    text, console_cursor["value"] = sched_console.read(
+                        console_cursor["value"]
+                    )
+                    if text:
+                        terminal.write(text)
+
+                ui.timer(0.5, sched_console_flush)
 
             with ui.tab_panel("Settings"):
                 ui.label("Alert Sounds:")
@@ -535,10 +665,17 @@ def setup() -> None:
         # ui.button("Release", on_click=release_operator)
 
         with ui.footer():
-            ui.label("This is a label at the bottom of the page.")
-
-    # Start periodic updates
-    app.timer(1, update_proxy_data)
+            ui.label().bind_text_from(
+                state, "last_image", backward=lambda f: f"Last image: {f}"
+            )
+            ui.label().bind_text_from(state, "command_status")
+            ui.button("Abort", on_click=commands_cancel, color="red")
+
+    # Start background updates
+    state_worker.start()
+    app.on_shutdown(state_worker.stop)
+    app.on_shutdown(discovery.stop)
+    app.on_shutdown(commands.shutdown)
 
 
 # All the setup is only done when the server starts, following the nicegui pattern
@@ -0,0 +1,152 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StateWorker:
+    """
+    Background worker doing all the proxy I/O needed to keep the UI state.
+
+    Each source is a function returning a dict of state values. Sources are
+    fetched in background every interval seconds, or right away when
+    refresh() is called (e.g. from a chimera event callback). Only the values
+    that changed are published to the subscribers.
+
+    A slow or unreachable source never holds the caller nor the other
+    sources: a source is not fetched again while its previous fetch is still
+    running.
+    """
+
+    def __init__(self, max_workers=4, log=print):
+        """
+        @param max_workers: Number of sources fetched concurrently
+        @param log: Function used to report fetch errors
+        """
+        self.log = log
+        self._sources = {}  # name -> (fetch, interval)
+        self._next_due = {}
+        self._running_fetches = set()
+        self._errors = {}
+        self._values = {}
+        self._subscribers = []
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._running = False
+        self._thread = None
+
+    def add_source(self, name, fetch, interval=1.0):
+        """
+        @param name: Source name, used with refresh()
+        @param fetch: Callable returning a dict of state values
+        @param interval: Seconds between fetches. None only fetches on refresh.
+        """
+        with self._condition:
+            self._sources[name] = (fetch, interval)
+            self._next_due[name] = 0.0
+            self._condition.notify()
+
+    def subscribe(self, callback):
+        """
+        @param callback: Called with a dict of the changed values. It is
+                         called from the worker threads.
+        """
+        with self._condition:
+            self._subscribers.append(callback)
+
+    def snapshot(self):
+        """
+        @return: Copy of all current values.
+        """
+        with self._condition:
+            return dict(self._values)
+
+    def refresh(self, *names):
+        """
+        Fetch the given sources as soon as possible. Returns immediately.
+        """
+        with self._condition:
+            for name in names:
+                if name in self._next_due:
+                    self._next_due[name] = 0.0
+            self._condition.notify()
+
+    def publish(self, values):
+        """
+        Publish values known without proxy I/O, e.g. received on an event.
+        """
+        with self._condition:
+            changed = {
+                k: v
+                for k, v in values.items()
+                if k not in self._values or self._values[k] != v
+            }
+            self._values.update(changed)
+            subscribers = list(self._subscribers)
+        if changed:
+            for callback in subscribers:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    self.log(f"State subscriber failed: {e}")
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="StateWorker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch(self, name, fetch):
+        try:
+            values = fetch()
+        except Exception as e:
+            # report each new error once
+            message = f"{type(e).__name__}: {e}"
+            if self._errors.get(name) != message:
+                self.log(f"Could not update {name}: {message}")
+            self._errors[name] = message
+        else:
+            self._errors.pop(name, None)
+            if values:
+                self.publish(values)
+        finally:
+            with self._condition:
+                self._running_fetches.discard(name)
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                now = time.time()
+                due = [
+                    name
+                    for name, next_due in self._next_due.items()
+                    if next_due <= now and name not in self._running_fetches
+                ]
+                for name in due:
+                    fetch, interval = self._sources[name]
+                    self._next_due[name] = (
+                        now + interval if interval is not None else float("inf")
+                    )
+                    self._running_fetches.add(name)
+                    self._executor.submit(self._fetch, name, fetch)
+                waiting = [
+                    next_due
+                    for name, next_due in self._next_due.items()
+                    if name not in self._running_fetches
+                ]
+                timeout = max(0.0, min(waiting) - now) if waiting else None
+                if timeout is None or timeout > 0:
+                    self._condition.wait(
+                        None if timeout in (None, float("inf")) else timeout
+                    )
@@ -1,65 +1,115 @@
 # This is an example of an simple instrument.
 
 import numpy as np
-
-# todo: move to another class
+from astropy import units
+from astropy.coordinates import SkyCoord
 from astropy.io import fits
-from astropy.samp import SAMPHubError, SAMPIntegratedClient
-from astropy.stats import sigma_clipped_stats
+from astropy.samp import SAMPIntegratedClient
 from chimera.core.chimeraobject import ChimeraObject
 from chimera.core.event import event
 from chimera.interfaces.camera import CameraStatus
-from photutils.detection import DAOStarFinder
 
-# todo: move to another class
+from chimera_swope.controllers.ds9dispatcher import Ds9Dispatcher
+from chimera_swope.controllers.platesolver import PlateSolver, pair_offsets
+from chimera_swope.controllers.sourcedetection import (
+    SourceDetector,
+    detect_sources_around,
+    detect_sources_tiled,
+)
 
 
 class Ds9AutoDisplay(ChimeraObject):
-    __config__ = {"camera": "127.0.0.1:6379/FakeCamera/fake"}
+    __config__ = {
+        "camera": "127.0.0.1:6379/FakeCamera/fake",
+        "ds9_timeout": 10,  # seconds for each DS9 command
+        "ds9_health_interval": 5.0,  # seconds between SAMP connection checks
+        "detection_fwhm": 3.0,  # pixels
+        "detection_threshold": 5.0,  # sigma above background
+        "detection_timeout": 60.0,  # seconds to wait for a running detection
+        "catalog_cache_size": 8,  # frames
+        # "full" builds the whole frame catalog in background after readout,
+        # "window" detects only around the imexam points when asked for the PA,
+        # reading the frame again on every call
+        "detection_mode": "full",
+        "detection_window": 50,  # half size of the windows in pixels
+        "detection_tile_size": 1024,  # pixels, full mode
+        "detection_workers": 0,  # full mode threads, 0 = one per CPU
+        "background_step": 4,  # subsampling step for the background estimate
+        # local astrometry.net, config file listing the index files to use
+        "solve_field": "solve-field",
+        "astrometry_config": "",
+        "pixel_scale_low": 0.1,  # arcsec/pixel
+        "pixel_scale_high": 2.0,  # arcsec/pixel
+        "solve_timeout": 60,  # seconds
+        "slit_x": -1,  # slit center in pixels, -1 is the frame center
+        "slit_y": -1,
+    }
     # __config__ = {"camera": "/Camera/0"}
 
     def __init__(self):
         ChimeraObject.__init__(self)
         self.ds9_client = SAMPIntegratedClient()
+        self.ds9_dispatcher = None
         self.image_fname = None
+        self.source_detector = None
+        self.plate_solver = None
 
     def connect_ds9(self):
-        # Try pinging DS9 first
-        try:
-            if self.ds9_client.client is not None and self.ds9_client.ping() == "OK":
-                return True
-        except ConnectionRefusedError:
-            pass
-        # Connect to DS9 via SAMP
-        try:
-            self.ds9_client.connect()
-            self.log.info("Connected to DS9 via SAMP")
-            return True
-        except (ConnectionRefusedError, SAMPHubError):
-            self.log.error(
-                "Failed to connect to DS9. Is DS9 running with SAMP enabled?"
-            )
-            return False
+        return self.ds9_dispatcher.ensure_connected(force=True)
 
     def __start__(self):
+        self.ds9_dispatcher = Ds9Dispatcher(
+            self.ds9_client,
+            self.log,
+            timeout=self["ds9_timeout"],
+            health_interval=self["ds9_health_interval"],
+        )
+        self.ds9_dispatcher.start()
+
+        self.source_detector = SourceDetector(
+            lambda data: detect_sources_tiled(
+                data,
+                self["detection_fwhm"],
+                self["detection_threshold"],
+                tile_size=self["detection_tile_size"],
+                workers=self["detection_workers"] or None,
+                background_step=self["background_step"],
+            ),
+            cache_size=self["catalog_cache_size"],
+            log=self.log,
+        )
+        self.source_detector.start()
+        self.plate_solver = PlateSolver(
+            solve_field=self["solve_field"],
+            config=self["astrometry_config"] or None,
+            scale_low=self["pixel_scale_low"],
+            scale_high=self["pixel_scale_high"],
+            timeout=self["solve_timeout"],
+        )
+
         def ds9_clbk(image, status):
-            if status != CameraStatus.OK:
-                return
-            if not self.connect_ds9():
-                return
-
-            self.log.info("Sending image to DS9")
-            self.image_fname = image.filename
-            self.ds9_client.ecall_and_wait("c1", "ds9.set", "10", cmd="frame clear")
-            self.ds9_client.ecall_and_wait(
-                "c1", "ds9.set", "10", cmd=f"url file://{self.image_fname}"
-            )
-            self.ds9_client.ecall_and_wait("c1", "ds9.set", "10", cmd="zscale")
+            self._on_readout(image, status)
 
         cam = self.get_proxy(self["camera"])
         cam.ping()
         cam.readout_complete += ds9_clbk
 
+    def _on_readout(self, image, status):
+        if status != CameraStatus.OK:
+            return
+        self.image_fname = image.filename
+        if self["detection_mode"] == "full":
+            # detect stars in background so they are ready when asked for
+            self.source_detector.submit(self.image_fname, self.image_fname)
+        # never block the camera event delivery on DS9
+        self.ds9_dispatcher.display(self.image_fname)
+
+    def __stop__(self):
+        if self.ds9_dispatcher is not None:
+            self.ds9_dispatcher.stop()
+        if self.source_detector is not None:
+            self.source_detector.stop()
+
     def get_pa(self, detect_stars=True):
         if not self.connect_ds9():
             self.log.error("Cannot get PA: not connected to DS9")
@@ -79,23 +129,29 @@ class Ds9AutoDisplay(ChimeraObject):
             self.update_pa(np.atan2(y2 - y1, x2 - x1) * 180 / np.pi)
             return
 
-        data = fits.getdata(self.image_fname)
-        _, median, std = sigma_clipped_stats(data, sigma=3.0)
-        daofind = DAOStarFinder(fwhm=3.0, threshold=5.0 * std)
-        sources = daofind(data - median)
+        if self["detection_mode"] == "full":
+            # catalog is usually ready, detected in background after readout
+            sources = self.source_detector.get(
+                self.image_fname, self.image_fname, timeout=self["detection_timeout"]
+            )
+        else:
+            sources = detect_sources_around(
+                fits.getdata(self.image_fname),
+                pts,
+                radius=self["detection_window"],
+                fwhm=self["detection_fwhm"],
+                threshold=self["detection_threshold"],
+                background_step=self["background_step"],
+            )
 
-        if sources is None:
+        if not sources:
             self.log.info("No stars found")
             return
 
         self.log.info(f"Found {len(sources)} stars")
 
         for i, pt in enumerate(pts):
-            idx = np.argmin(
-                (pt[0] - sources["xcentroid"]) ** 2
-                + (pt[1] - sources["ycentroid"]) ** 2
-            )
-            x, y = sources["xcentroid"][idx], sources["ycentroid"][idx]
+            x, y = sources.nearest(*pt)
             self.ds9_client.ecall_and_wait(
                 "c1",
                 "ds9.set",
@@ -109,12 +165,47 @@ class Ds9AutoDisplay(ChimeraObject):
         self.update_pa(np.atan2(y2 - y1, x2 - x1) * 180 / np.pi)
 
     def calculate_offsets(self, ra_east, dec_east, ra_west, dec_west):
-        # 1 - run astrometry.net on the image to get WCS solution
-        # self.image_fname
-        # 2 - convert ra/dec to x/y using WCS
-        # 3 - calculate PA from x/y
-        # 4 - calculate center offset
-        pass
+        """
+        Solve the astrometry of the last image and calculate the rotation and
+        pointing offset needed to place a pair of stars along the slit.
+
+        @param ra_east: RA of the east star in hours
+        @param dec_east: Dec of the east star in degrees
+        @param ra_west: RA of the west star in hours
+        @param dec_west: Dec of the west star in degrees
+        @return: (pa, offset_ra, offset_dec) with pa in degrees and the offsets
+                 of the pair middle point from the slit center in arcseconds,
+                 or None if the image could not be solved
+        """
+        if self.image_fname is None:
+            self.log.info("No image to process")
+            return
+
+        east = SkyCoord(ra_east, dec_east, unit=(units.hourangle, units.deg))
+        west = SkyCoord(ra_west, dec_west, unit=(units.hourangle, units.deg))
+
+        sources = self.source_detector.get(
+            self.image_fname, self.image_fname, timeout=self["detection_timeout"]
+        )
+        if not sources:
+            self.log.info("No stars found")
+            return
+
+        header = fits.getheader(self.image_fname)
+        width, height = header["NAXIS1"], header["NAXIS2"]
+        wcs = self.plate_solver.solve(sources, width, height, hint=east)
+        if wcs is None:
+            self.log.error(f"Could not solve astrometry of {self.image_fname}")
+            return
+
+        slit_x = self["slit_x"] if self["slit_x"] >= 0 else (width - 1) / 2
+        slit_y = self["slit_y"] if self["slit_y"] >= 0 else (height - 1) / 2
+        pa, offset_ra, offset_dec = pair_offsets(wcs, east, west, slit_x, slit_y)
+        self.log.info(
+            f"PA: {pa:.2f} deg, offset: {offset_ra:.2f}, {offset_dec:.2f} arcsec"
+        )
+        self.update_pa(pa)
+        return pa, offset_ra, offset_dec
 
     @event
     def update_pa(self, pa):
@@ -0,0 +1,165 @@
+import threading
+import time
+
+from astropy.samp import SAMPHubError
+
+
+class Ds9Dispatcher:
+    """
+    Dedicated thread sending frames to DS9 through SAMP.
+
+    display() only records the frame and returns, so a slow or dead DS9 never
+    holds the caller. Bursts are coalesced: only the newest frame is
+    displayed and the commands left of a frame that became stale are dropped.
+    While idle, the SAMP connection is health checked and re-established with
+    an exponential backoff.
+    """
+
+    def __init__(
+        self,
+        client,
+        log,
+        timeout=10,
+        health_interval=5.0,
+        reconnect_max=60.0,
+    ):
+        """
+        @param client: SAMPIntegratedClient used to talk to DS9
+        @param log: Logger
+        @param timeout: Timeout of each DS9 command in seconds
+        @param health_interval: Interval between connection checks in seconds
+        @param reconnect_max: Maximum delay between reconnections in seconds
+        """
+        self.client = client
+        self.log = log
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.reconnect_max = reconnect_max
+
+        self._next_frame = None
+        self._condition = threading.Condition()
+        self._connection_lock = threading.Lock()
+        self._connected = False
+        self._reconnect_delay = 0.0
+        self._next_reconnect = 0.0
+        self._running = False
+        self._thread = None
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="Ds9Dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        with self._connection_lock:
+            if self._connected:
+                try:
+                    self.client.disconnect()
+                except Exception:
+                    pass
+            self._connected = False
+
+    def display(self, filename):
+        """
+        Queue a frame to be displayed, replacing any frame not yet displayed.
+        Returns immediately.
+        """
+        with self._condition:
+            self._next_frame = filename
+            self._condition.notify()
+
+    def _ping(self):
+        try:
+            return self.client.client is not None and self.client.ping() == "OK"
+        except Exception:
+            return False
+
+    def ensure_connected(self, force=False):
+        """
+        Check the SAMP connection, reconnecting if needed.
+
+        @param force: Try to reconnect even during the reconnection backoff
+        @return: True if connected to the SAMP hub
+        """
+        with self._connection_lock:
+            if self._ping():
+                self._set_connected(True)
+                return True
+            if not force and time.time() < self._next_reconnect:
+                return False
+            try:
+                if self.client.is_connected:
+                    self.client.disconnect()
+            except Exception:
+                pass
+            try:
+                self.client.connect()
+            except (ConnectionRefusedError, SAMPHubError, OSError):
+                self._set_connected(False)
+                self._reconnect_delay = min(
+                    self.reconnect_max,
+                    max(self.health_interval, 2 * self._reconnect_delay),
+                )
+                self._next_reconnect = time.time() + self._reconnect_delay
+                return False
+            self._set_connected(True)
+            return True
+
+    def _set_connected(self, connected):
+        if connected and not self._connected:
+            self.log.info("Connected to DS9 via SAMP")
+        elif not connected and self._connected:
+            self.log.error("Lost SAMP connection to DS9")
+        elif not connected and self._reconnect_delay == 0.0:
+            self.log.error(
+                "Failed to connect to DS9. Is DS9 running with SAMP enabled?"
+            )
+        if connected:
+            self._reconnect_delay = 0.0
+            self._next_reconnect = 0.0
+        self._connected = connected
+
+    def _stale(self):
+        # a newer frame arrived while the current one was being sent
+        return self._next_frame is not None
+
+    def _send(self, filename):
+        commands = ["frame clear", f"url file://{filename}", "zscale"]
+        self.log.info("Sending image to DS9")
+        for cmd in commands:
+            with self._condition:
+                if self._stale() or not self._running:
+                    return
+            try:
+                self.client.ecall_and_wait("c1", "ds9.set", str(self.timeout), cmd=cmd)
+            except Exception as e:
+                self.log.error(f"DS9 command '{cmd}' failed: {e}")
+                with self._connection_lock:
+                    if not self._ping():
+                        self._set_connected(False)
+                return
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._running and self._next_frame is None:
+                    self._condition.wait(self.health_interval)
+                if not self._running:
+                    return
+                filename, self._next_frame = self._next_frame, None
+
+            if not self.ensure_connected(force=filename is not None):
+                continue
+            if filename is not None:
+                self._send(filename)
@@ -0,0 +1,277 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+OFFSET_DIRECTIONS = ("south", "east", "north", "west")
+# image types taken with the shutter closed
+DARK_TYPES = ("DARK", "BIAS")
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    """
+    One step of an exposure sequence: the instrument setup, the telescope
+    offset from the pointing and nexp exposures of exptime seconds.
+    """
+
+    setup: dict = field(default_factory=dict)  # mechanism -> position
+    offset: tuple = (0.0, 0.0)  # (east, north) arcsec from the pointing
+    exptime: float = 0.0  # seconds
+    nexp: int = 1
+    image_type: str = "OBJECT"
+    object_name: str = ""
+
+    @property
+    def shutter(self):
+        """
+        @return: Shutter state for the camera, CLOSE for darks and biases
+        """
+        return "CLOSE" if self.image_type.upper() in DARK_TYPES else "OPEN"
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """
+    One exposure of a sequence, with only the moves needed since the
+    previous frame.
+    """
+
+    step_index: int
+    exposure: int  # exposure number inside the step, from 0
+    step: Step
+    moves: dict  # mechanism -> position, the mechanisms that change
+    offset: tuple  # (east, north) arcsec to move the telescope by
+
+
+def parse_offset(offset):
+    """
+    @param offset: None, (east, north) arcsec or a mapping with any of south,
+                   east, north and west in arcsec, as the observation blocks
+    @return: (east, north) arcsec
+    """
+    if offset is None:
+        return 0.0, 0.0
+    if isinstance(offset, dict):
+        unknown = set(offset) - set(OFFSET_DIRECTIONS)
+        if unknown:
+            raise ValueError(f"unknown offset directions: {sorted(unknown)}")
+        offset = {d: float(offset.get(d) or 0.0) for d in OFFSET_DIRECTIONS}
+        return offset["east"] - offset["west"], offset["north"] - offset["south"]
+    east, north = offset
+    return float(east), float(north)
+
+
+def read_steps(steps):
+    """
+    Read a sequence definition.
+
+    @param steps: (setup, offset, exptime, nexp) tuples or dicts with setup,
+                  offset, exptime, nexp, image_type and object_name keys
+    @return: List of Step
+    @raise ValueError: If a step is not valid
+    """
+    sequence = []
+    for n, step in enumerate(steps):
+        if not isinstance(step, dict):
+            step = dict(zip(("setup", "offset", "exptime", "nexp"), step))
+        unknown = set(step) - set(Step.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"step {n}: unknown keys {sorted(unknown)}")
+        try:
+            step = Step(
+                setup=dict(step.get("setup") or {}),
+                offset=parse_offset(step.get("offset")),
+                exptime=float(step.get("exptime", 0.0)),
+                nexp=int(step.get("nexp", 1)),
+                image_type=str(step.get("image_type", "OBJECT")),
+                object_name=str(step.get("object_name", "")),
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"step {n}: {e}")
+        if step.exptime < 0 or step.nexp < 1:
+            raise ValueError(f"step {n}: invalid exptime or nexp")
+        sequence.append(step)
+    return sequence
+
+
+def plan_frames(steps, setup=None, offset=(0.0, 0.0)):
+    """
+    Expand a sequence into frames, keeping on each frame only the moves that
+    change something.
+
+    @param steps: List of Step
+    @param setup: Known mechanism positions before the sequence, None if
+                  unknown, so the first step sets all its mechanisms
+    @param offset: (east, north) arcsec telescope offset before the sequence
+    @return: List of Frame
+    """
+    current = dict(setup or {})
+    east, north = offset
+    frames = []
+    for index, step in enumerate(steps):
+        for exposure in range(step.nexp):
+            moves = {
+                mechanism: position
+                for mechanism, position in step.setup.items()
+                if mechanism not in current or current[mechanism] != position
+            }
+            current.update(moves)
+            delta = (step.offset[0] - east, step.offset[1] - north)
+            east, north = step.offset
+            frames.append(Frame(index, exposure, step, moves, delta))
+    return frames
+
+
+class SequenceEngine:
+    """
+    Runs the frames of a sequence overlapping the setup of each frame with
+    the readout and write of the previous one.
+
+    expose(frame) takes one exposure and returns when the frame is written;
+    exposure_finished() should be called when the shutter closes (e.g. from
+    the camera expose_complete event) so the next setup starts during the
+    readout. Without it the next setup only starts when expose returns.
+    The setups are called with each frame and run in parallel, each one
+    moving a group of mechanisms that can move independently of the others.
+
+    Progress is reported to listener(name, info) as "frame_complete",
+    "step_complete" and "sequence_complete", with the timings in seconds.
+    """
+
+    def __init__(self, expose, setups, listener=None, poll=0.05):
+        """
+        @param expose: Callable taking a Frame and returning its result
+        @param setups: Callables taking a Frame, moving what it needs
+        @param listener: Callable(name, info) receiving the progress
+        @param poll: Seconds between checks while waiting for the shutter
+        """
+        self.expose = expose
+        self.setups = list(setups)
+        self.listener = listener
+        self.poll = poll
+        self._exposed = threading.Event()
+        self._abort = threading.Event()
+        self._frame = None  # frame being exposed
+
+    def exposure_finished(self, frame=None):
+        """
+        The running exposure is done and the mechanisms are free to move.
+
+        @param frame: Frame whose exposure is done. Calls for another frame,
+                      as a late event of the previous one, are ignored. None
+                      is the running one.
+        """
+        if frame is None or frame is self._frame:
+            self._exposed.set()
+
+    def abort(self):
+        """
+        Stop before the next exposure. The running exposure is finished.
+        """
+        self._abort.set()
+
+    def _notify(self, name, info):
+        if self.listener is None:
+            return
+        try:
+            self.listener(name, info)
+        except Exception:
+            pass  # a listener must not stop the sequence
+
+    @staticmethod
+    def _timed(setup, frame):
+        start = time.time()
+        setup(frame)
+        return time.time() - start
+
+    def _setup(self, executor, frame):
+        return [executor.submit(self._timed, setup, frame) for setup in self.setups]
+
+    def _wait_setup(self, futures):
+        """
+        @return: Time the slowest setup took
+        """
+        wait(futures)
+        return max((future.result() for future in futures), default=0.0)
+
+    def run(self, frames):
+        """
+        @param frames: List of Frame
+        @return: List with the result of expose for each frame taken
+        """
+        self._abort.clear()
+        results = []
+        step_info = None
+        status = "completed"
+        t0 = time.time()
+        setup_executor = ThreadPoolExecutor(max_workers=max(1, len(self.setups)))
+        camera_executor = ThreadPoolExecutor(max_workers=1)
+        setup = self._setup(setup_executor, frames[0]) if frames else None
+        try:
+            for n, frame in enumerate(frames):
+                ready = time.time()
+                setup_time = self._wait_setup(setup)
+                setup = None
+                if self._abort.is_set():
+                    status = "aborted"
+                    break
+
+                start = time.time()
+                self._exposed.clear()
+                self._frame = frame
+                exposure = camera_executor.submit(self.expose, frame)
+                while not self._exposed.wait(self.poll) and not exposure.done():
+                    pass
+                self._frame = None
+                exposed = time.time()
+                if n + 1 < len(frames) and not self._abort.is_set():
+                    # the next frame moves while this one is read and written
+                    setup = self._setup(setup_executor, frames[n + 1])
+                results.append(exposure.result())
+                end = time.time()
+
+                info = {
+                    "step": frame.step_index,
+                    "exposure": frame.exposure,
+                    "result": results[-1],
+                    "setup": setup_time,
+                    # setup time not hidden behind the previous readout
+                    "setup_wait": start - ready,
+                    "exposure_time": exposed - start,
+                    "readout": end - exposed,
+                    "start": start,
+                    "end": end,
+                }
+                self._notify("frame_complete", info)
+
+                if step_info is None or step_info["step"] != frame.step_index:
+                    step_info = {
+                        "step": frame.step_index,
+                        "start": ready,
+                        "frames": 0,
+                        "setup_wait": 0.0,
+                    }
+                step_info["frames"] += 1
+                step_info["setup_wait"] += info["setup_wait"]
+                if frame.exposure == frame.step.nexp - 1:
+                    step_info["end"] = end
+                    step_info["duration"] = end - step_info["start"]
+                    self._notify("step_complete", step_info)
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if setup is not None:
+                wait(setup)
+            camera_executor.shutdown()
+            setup_executor.shutdown()
+            self._notify(
+                "sequence_complete",
+                {
+                    "status": status,
+                    "frames": len(results),
+                    "duration": time.time() - t0,
+                },
+            )
+        return results
@@ -0,0 +1,188 @@
+import threading
+
+from chimera.core.chimeraobject import ChimeraObject
+from chimera.core.event import event
+
+from chimera_swope.controllers.exposuresequence import (
+    SequenceEngine,
+    plan_frames,
+    read_steps,
+)
+
+WHEELS = ("slit", "grism", "diffuser", "filter", "slide")
+
+
+class ExposureSequencer(ChimeraObject):
+    """
+    Runs exposure sequences on the Henrietta camera: a list of (instrument
+    setup, telescope offset, exptime, nexp) steps.
+
+    The wheel and rotator moves and the telescope offsets of each frame run
+    while the previous frame is read out and written, so dither patterns do
+    not pay the whole setup time on every step. The wheels share the
+    Henrietta connection and move one after the other; the rotator and the
+    telescope move at the same time as them.
+
+    Setups are mappings of slit, grism, diffuser, filter, slide (wheel
+    position names) and rotator (degrees) to positions. Offsets are (east,
+    north) arcsec or a south/east/north/west mapping in arcsec, relative to
+    the telescope position when the sequence starts.
+
+    The image headers are collected when each exposure begins, before the
+    next frame moves. Metadata read at readout time, as from a
+    MetadataCollector, can show the next frame setup; turn overlap off if
+    that matters.
+    """
+
+    __config__ = {
+        "camera": "/HenriettaCamera/0",
+        "telescope": "/Telescope/0",
+        "rotator": "/Rotator/0",
+        "slit_wheel": "/HenriettaSlitWheel/slit_wheel",
+        "grism_wheel": "/HenriettaGrismWheel/grism_wheel",
+        "diffuser_wheel": "/HenriettaDiffuserWheel/diffuser_wheel",
+        "filter_wheel": "/HenriettaFilterWheel/filter_wheel",
+        "slide_wheel": "/HenriettaSlideWheel/slide_wheel",
+        "overlap": True,  # move during the readout of the previous frame
+    }
+
+    def __init__(self):
+        ChimeraObject.__init__(self)
+        self._engine = None
+        self._exposing = None  # frame whose exposure the camera is taking
+        self._lock = threading.Lock()
+
+    def __start__(self):
+        def expose_clbk(request, status):
+            self._exposure_complete(request)
+
+        cam = self.get_proxy(self["camera"])
+        cam.ping()
+        cam.expose_complete += expose_clbk
+
+    def _exposure_complete(self, request):
+        # the camera is shared, only the exposures of the sequence move it on
+        engine, frame = self._engine, self._exposing
+        if engine is None or frame is None or not self["overlap"]:
+            return
+        if request.get("object_name") != frame.step.object_name:
+            return
+        if str(request.get("type", "")).upper() != frame.step.image_type.upper():
+            return
+        self._exposing = None  # once per frame
+        engine.exposure_finished(frame)
+
+    def _expose(self, frame):
+        step = frame.step
+        self._exposing = frame
+        try:
+            images = self.get_proxy(self["camera"]).expose(
+                exptime=step.exptime,
+                frames=1,
+                shutter=step.shutter,
+                type=step.image_type,
+                object_name=step.object_name,
+            )
+        finally:
+            self._exposing = None
+        if not images:
+            raise RuntimeError("Camera returned no image")
+        return images[0].filename
+
+    def _move_wheels(self, frame):
+        for wheel in WHEELS:
+            if wheel in frame.moves:
+                self.log.debug(f"{wheel} wheel to {frame.moves[wheel]}")
+                self.get_proxy(self[f"{wheel}_wheel"]).set_filter(frame.moves[wheel])
+
+    def _move_rotator(self, frame):
+        if "rotator" in frame.moves:
+            self.get_proxy(self["rotator"]).move_to(float(frame.moves["rotator"]))
+
+    def _move_telescope(self, frame):
+        east, north = frame.offset
+        if east == 0 and north == 0:
+            return
+        telescope = self.get_proxy(self["telescope"])
+        if east:
+            telescope.move_east(east)
+        if north:
+            telescope.move_north(north)
+
+    def _progress(self, name, info):
+        if name == "frame_complete":
+            self.log.info(
+                f"Step {info['step']} exposure {info['exposure']}: {info['result']}, "
+                f"setup {info['setup']:.1f} s ({info['setup_wait']:.1f} s waited)"
+            )
+            self.frame_complete(info)
+        elif name == "step_complete":
+            self.step_complete(info)
+        elif name == "sequence_complete":
+            self.sequence_complete(info)
+
+    def run_sequence(self, steps, setup=None):
+        """
+        Run an exposure sequence. Blocks until it ends.
+
+        @param steps: (setup, offset, exptime, nexp) tuples or dicts with
+                      setup, offset, exptime, nexp, image_type and
+                      object_name keys
+        @param setup: Known mechanism positions, which are not moved again.
+                      None sets all the mechanisms of the first step.
+        @return: Filenames of the frames taken
+        @raise ValueError: If a step is not valid
+        """
+        steps = read_steps(steps)
+        unknown = {
+            mechanism
+            for step in steps
+            for mechanism in step.setup
+            if mechanism not in WHEELS + ("rotator",)
+        }
+        if unknown:
+            raise ValueError(f"Unknown mechanisms: {sorted(unknown)}")
+        frames = plan_frames(steps, setup=setup)
+
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A sequence is already running")
+        try:
+            self._engine = SequenceEngine(
+                self._expose,
+                [self._move_wheels, self._move_rotator, self._move_telescope],
+                listener=self._progress,
+            )
+            self.log.info(f"Starting sequence of {len(frames)} frames")
+            return self._engine.run(frames)
+        finally:
+            self._engine = None
+            self._lock.release()
+
+    def abort_sequence(self):
+        """
+        Stop the running sequence before its next exposure and abort the
+        current one.
+        """
+        engine = self._engine
+        if engine is None:
+            return
+        engine.abort()
+        try:
+            self.get_proxy(self["camera"]).abort_exposure()
+        except Exception as e:
+            self.log.error(f"Could not abort the exposure: {e}")
+
+    def is_running(self):
+        return self._engine is not None
+
+    @event
+    def frame_complete(self, info):
+        pass
+
+    @event
+    def step_complete(self, info):
+        pass
+
+    @event
+    def sequence_complete(self, info):
+        pass
@@ -0,0 +1,116 @@
+import numpy as np
+from astropy.io import fits
+from astropy.stats import sigma_clipped_stats
+from scipy.ndimage import maximum_filter
+
+GAUSSIAN_SIGMA_TO_FWHM = 2.0 * np.sqrt(2.0 * np.log(2.0))
+
+
+def read_subsample(filename, step=4, region=1024):
+    """
+    Read a strided subsample of the frame and a full resolution central region
+    without loading the whole image. Scaled integer data (BZERO/BSCALE) is
+    only converted on the pixels read.
+
+    @param filename: FITS file name
+    @param step: Take one pixel every step pixels on each axis
+    @param region: Size of the central full resolution region in pixels
+    @return: (subsample, center) as float arrays
+    """
+    with fits.open(filename, memmap=True, do_not_scale_image_data=True) as hdul:
+        hdu = next(h for h in hdul if h.data is not None)
+        bscale = hdu.header.get("BSCALE", 1.0)
+        bzero = hdu.header.get("BZERO", 0.0)
+        data = hdu.data
+        ny, nx = data.shape
+        y0, x0 = max(0, (ny - region) // 2), max(0, (nx - region) // 2)
+        subsample = data[::step, ::step].astype(float) * bscale + bzero
+        center = data[y0 : y0 + region, x0 : x0 + region].astype(float)
+        center = center * bscale + bzero
+    return subsample, center
+
+
+def quadrant_stats(data):
+    """
+    Sigma clipped median and standard deviation of each image quadrant.
+
+    @return: Array of shape (4, 2) with (median, std) of the lower left, lower
+             right, upper left and upper right quadrants.
+    """
+    ny, nx = data.shape
+    my, mx = ny // 2, nx // 2
+    quadrants = [data[:my, :mx], data[:my, mx:], data[my:, :mx], data[my:, mx:]]
+    return np.array([sigma_clipped_stats(q, sigma=3.0)[1:] for q in quadrants])
+
+
+def find_stars(data, sky, noise, threshold=5.0, box=7, saturation=None):
+    """
+    Find stars as local maxima above the background and measure their FWHM
+    from second moments, all vectorized over the stars.
+
+    @param data: Image data
+    @param sky: Background level
+    @param noise: Background standard deviation
+    @param threshold: Detection threshold in units of noise
+    @param box: Size of the cutout used for the moments, odd, in pixels
+    @param saturation: Stars with pixels at or above this level are not
+                       used for the FWHM
+    @return: (number of stars, FWHM of each unsaturated star in pixels)
+    """
+    r = box // 2
+    ny, nx = data.shape
+    peaks = (data == maximum_filter(data, size=box)) & (data > sky + threshold * noise)
+    # only stars whose cutout fits inside the image
+    peaks[:r, :] = peaks[-r:, :] = peaks[:, :r] = peaks[:, -r:] = False
+    ys, xs = np.nonzero(peaks)
+    if len(ys) == 0:
+        return 0, np.empty(0)
+
+    offsets = np.arange(-r, r + 1)
+    cutouts = data[
+        ys[:, None, None] + offsets[None, :, None],
+        xs[:, None, None] + offsets[None, None, :],
+    ]
+    if saturation is not None:
+        cutouts = cutouts[(cutouts < saturation).all(axis=(1, 2))]
+    weights = np.clip(cutouts - sky, 0, None)
+    total = weights.sum(axis=(1, 2))
+    weights = weights[total > 0]
+    total = total[total > 0]
+
+    dy, dx = np.meshgrid(offsets, offsets, indexing="ij")
+    cy = (weights * dy).sum(axis=(1, 2)) / total
+    cx = (weights * dx).sum(axis=(1, 2)) / total
+    var_y = (weights * dy**2).sum(axis=(1, 2)) / total - cy**2
+    var_x = (weights * dx**2).sum(axis=(1, 2)) / total - cx**2
+    sigma = np.sqrt(np.clip((var_x + var_y) / 2, 0, None))
+    return len(ys), GAUSSIAN_SIGMA_TO_FWHM * sigma
+
+
+def frame_statistics(subsample, center, saturation=65000.0, threshold=5.0):
+    """
+    Quick-look quality statistics of a frame.
+
+    @param subsample: Strided subsample of the whole frame
+    @param center: Full resolution region used for the star measurements
+    @param saturation: Saturation level in ADU
+    @param threshold: Star detection threshold in units of the background std
+    @return: Dict with the sky level and noise, per quadrant median and std,
+             saturated pixel fraction, star count and median FWHM (pixels,
+             NaN without stars) measured on the center region.
+    """
+    _, sky, noise = sigma_clipped_stats(subsample, sigma=3.0)
+    quadrants = quadrant_stats(subsample)
+    n_stars, fwhm = find_stars(center, sky, noise, threshold, saturation=saturation)
+    stats = {
+        "sky": float(sky),
+        "noise": float(noise),
+        "saturated_fraction": float(np.count_nonzero(subsample >= saturation))
+        / subsample.size,
+        "n_stars": int(n_stars),
+        "fwhm": float(np.median(fwhm)) if len(fwhm) else float("nan"),
+    }
+    for name, (median, std) in zip(("ll", "lr", "ul", "ur"), quadrants):
+        stats[f"median_{name}"] = float(median)
+        stats[f"std_{name}"] = float(std)
+    return stats
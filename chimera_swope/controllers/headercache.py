@@ -0,0 +1,95 @@
+import threading
+import time
+import warnings
+
+from astropy.io import fits
+from astropy.io.fits.verify import VerifyWarning
+
+# keywords that can be repeated on a header
+REPEATABLE = {"COMMENT", "HISTORY", ""}
+
+
+def render_cards(cards):
+    """
+    Validate metadata cards as FITS cards.
+
+    @param cards: (keyword, value, comment) tuples, as returned by get_metadata
+    @return: (valid cards as (keyword, value, comment) tuples, invalid cards)
+    """
+    valid, invalid = [], []
+    for card in cards:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", VerifyWarning)
+                rendered = fits.Card(*card)
+                rendered.verify("exception")
+                str(rendered)  # fails if the value cannot be formatted
+        except Exception:
+            invalid.append(card)
+            continue
+        valid.append((rendered.keyword, rendered.value, rendered.comment))
+    return valid, invalid
+
+
+class HeaderCache:
+    """
+    Latest metadata cards of a set of sources, merged in source order into
+    one header, ready to be added to an image.
+
+    Cards are validated when they arrive, so reading the header only has to
+    join them. When two sources give the same keyword, the first source
+    wins. Sources not updated for max_age seconds are left out.
+    """
+
+    def __init__(self, sources, max_age=30.0):
+        """
+        @param sources: Source names, in header order
+        @param max_age: Seconds after which the cards of a source are stale
+        """
+        self.sources = list(sources)
+        self.max_age = max_age
+        self._cards = {}  # source -> (cards, update time)
+        self._lock = threading.Lock()
+
+    def update(self, source, cards, timestamp=None):
+        """
+        @param source: Source name
+        @param cards: Already validated (keyword, value, comment) tuples
+        @param timestamp: Unix time the cards were read, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._cards[source] = (list(cards), timestamp)
+
+    def stale(self, now=None):
+        """
+        @return: Sources without cards updated in the last max_age seconds
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                source
+                for source in self.sources
+                if source not in self._cards
+                or now - self._cards[source][1] > self.max_age
+            ]
+
+    def header(self, now=None):
+        """
+        @return: Merged (keyword, value, comment) cards of the sources that
+                 are not stale
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            sources = [self._cards.get(source) for source in self.sources]
+        seen = set()
+        header = []
+        for cards, timestamp in filter(None, sources):
+            if now - timestamp > self.max_age:
+                continue
+            for card in cards:
+                if card[0] in seen and card[0] not in REPEATABLE:
+                    continue
+                seen.add(card[0])
+                header.append(card)
+        return header
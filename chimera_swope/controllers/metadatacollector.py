@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from chimera.controllers.imageserver.imagerequest import ImageRequest
+from chimera.core.chimeraobject import ChimeraObject
+
+from chimera_swope.controllers.headercache import HeaderCache, render_cards
+
+
+class MetadataCollector(ChimeraObject):
+    """
+    Keeps the FITS metadata of all the Swope devices up to date in the
+    background and serves it merged in a single call, so cameras do not have
+    to ask every device over the bus at readout time.
+
+    Cameras with metadata_collector configured add get_metadata() of this
+    controller to their images and turn off chimera's own per-device
+    collection, so only the devices listed here reach their headers.
+    """
+
+    __config__ = {
+        "devices": [
+            "/Site/0",
+            "/SwopeTelescope/0",
+            "/SwopeDome/0",
+            "/SwopeFocuser/0",
+            "/SwopeRotator/0",
+            "/SwopeWeatherStation/0",
+            "/HenriettaSlitWheel/0",
+            "/HenriettaGrismWheel/0",
+            "/HenriettaDiffuserWheel/0",
+            "/HenriettaFilterWheel/0",
+            "/HenriettaSlideWheel/0",
+        ],
+        "refresh_interval": 2.0,  # seconds
+        "max_age": 30.0,  # seconds before the cards of a device are dropped
+    }
+
+    def __init__(self):
+        ChimeraObject.__init__(self)
+        self._cache = None
+        self._proxies = {}
+        self._request = None
+        self._executor = None
+
+    def __start__(self):
+        self._cache = HeaderCache(self["devices"], max_age=self["max_age"])
+        # every device is asked concurrently, a slow one does not hold the others
+        self._executor = ThreadPoolExecutor(max_workers=len(self["devices"]) or 1)
+        self._request = ImageRequest()
+        self.set_hz(1.0 / self["refresh_interval"])
+
+    def __stop__(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def control(self):
+        self.refresh()
+        return True
+
+    def _refresh_device(self, location):
+        if location not in self._proxies:
+            self._proxies[location] = self.get_proxy(location)
+        read_time = time.time()
+        cards, invalid = render_cards(
+            self._proxies[location].get_metadata(self._request)
+        )
+        for card in invalid:
+            self.log.warning(f"{location}: invalid metadata card {card!r} dropped")
+        self._cache.update(location, cards, read_time)
+
+    def refresh(self):
+        """
+        Read the metadata of all devices now.
+        """
+        futures = {
+            location: self._executor.submit(self._refresh_device, location)
+            for location in self["devices"]
+        }
+        for location, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                self._proxies.pop(location, None)
+                self.log.debug(f"Could not read metadata of {location}: {e}")
+
+    def get_stale_devices(self):
+        """
+        @return: Devices whose metadata is older than max_age
+        """
+        return self._cache.stale()
+
+    def get_metadata(self, request=None):
+        """
+        @return: Merged (keyword, value, comment) cards of all devices
+        """
+        header = self._cache.header()
+        stale = self._cache.stale()
+        if stale:
+            header.append(
+                ("MDSTALE", " ".join(stale)[:68], "Devices missing from the metadata")
+            )
+        return header
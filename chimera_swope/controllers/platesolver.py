@@ -0,0 +1,201 @@
+import os
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+from astropy import units
+from astropy.coordinates import SkyCoord
+from astropy.io import fits
+from astropy.table import Table
+from astropy.wcs import WCS
+
+
+class PlateSolveError(Exception):
+    pass
+
+
+class PlateSolver:
+    """
+    Local astrometric solver running astrometry.net solve-field on a list of
+    already detected sources. Only the local index files configured for
+    solve-field are used, nothing is fetched from the network.
+
+    After a successful solve, its pixel scale is used as hint for the next
+    ones, and its center too while the frames stay on the same field, which
+    makes solving consecutive frames much faster. If a hinted solve fails, a
+    blind solve is tried.
+    """
+
+    def __init__(
+        self,
+        solve_field="solve-field",
+        config=None,
+        scale_low=0.1,
+        scale_high=2.0,
+        hint_radius=1.0,
+        max_sources=200,
+        timeout=60,
+    ):
+        """
+        @param solve_field: Path of the solve-field executable
+        @param config: astrometry.net backend config file listing the local
+                       index files. None uses the solve-field default.
+        @param scale_low: Lower bound of the pixel scale in arcsec/pixel
+        @param scale_high: Upper bound of the pixel scale in arcsec/pixel
+        @param hint_radius: Search radius around the hint center in degrees
+        @param max_sources: Number of brightest sources given to the solver
+        @param timeout: Maximum time to spend solving in seconds
+        """
+        self.solve_field = solve_field
+        self.config = config
+        self.scale_low = scale_low
+        self.scale_high = scale_high
+        self.hint_radius = hint_radius
+        self.max_sources = max_sources
+        self.timeout = timeout
+
+        self.last_wcs = None
+        self._lock = threading.Lock()
+
+    def _command(self, xylist, wcs_file, width, height, hint=None, scale=None):
+        cmd = [
+            self.solve_field,
+            xylist,
+            "--overwrite",
+            "--no-plots",
+            "--no-remove-lines",
+            "--no-verify",
+            "--crpix-center",
+            "--new-fits",
+            "none",
+            "--index-xyls",
+            "none",
+            "--axy",
+            "none",
+            "--rdls",
+            "none",
+            "--match",
+            "none",
+            "--corr",
+            "none",
+            "--solved",
+            "none",
+            "--wcs",
+            wcs_file,
+            "--width",
+            str(width),
+            "--height",
+            str(height),
+            "--x-column",
+            "X",
+            "--y-column",
+            "Y",
+            "--sort-column",
+            "FLUX",
+            "--objs",
+            str(self.max_sources),
+            "--cpulimit",
+            str(self.timeout),
+            "--scale-units",
+            "arcsecperpix",
+        ]
+        if scale is not None:
+            # the scale of a previous solve is known to a few percent
+            cmd += ["--scale-low", str(scale * 0.95), "--scale-high", str(scale * 1.05)]
+        else:
+            cmd += ["--scale-low", str(self.scale_low)]
+            cmd += ["--scale-high", str(self.scale_high)]
+        if hint is not None:
+            cmd += ["--ra", str(hint.ra.deg), "--dec", str(hint.dec.deg)]
+            cmd += ["--radius", str(self.hint_radius)]
+        if self.config:
+            cmd += ["--config", self.config]
+        return cmd
+
+    def _run(self, catalog, width, height, hint, scale):
+        with tempfile.TemporaryDirectory(prefix="platesolve") as tmp:
+            xylist = os.path.join(tmp, "sources.xyls")
+            wcs_file = os.path.join(tmp, "sources.wcs")
+            # solve-field uses 1-based FITS pixel coordinates
+            Table(
+                [catalog.x + 1, catalog.y + 1, catalog.flux],
+                names=["X", "Y", "FLUX"],
+            ).write(xylist, format="fits")
+            cmd = self._command(xylist, wcs_file, width, height, hint, scale)
+            try:
+                subprocess.run(
+                    cmd, capture_output=True, check=False, timeout=self.timeout + 10
+                )
+            except subprocess.TimeoutExpired:
+                return None
+            except OSError as e:
+                raise PlateSolveError(f"Cannot run {self.solve_field}: {e}")
+            if not os.path.exists(wcs_file):
+                return None
+            return WCS(fits.getheader(wcs_file))
+
+    def solve(self, catalog, width, height, hint=None):
+        """
+        Solve the astrometry of a frame from its detected sources.
+
+        @param catalog: SourceCatalog with 0-based pixel positions
+        @param width: Frame width in pixels
+        @param height: Frame height in pixels
+        @param hint: Approximate SkyCoord of the frame center. The center of
+                     the previous solution is used instead when there is no
+                     hint or the hint is within hint_radius of it.
+        @return: The astropy WCS of the frame or None if it could not be solved
+        """
+        if len(catalog) < 4:
+            return None
+        with self._lock:
+            scale = None
+            if self.last_wcs is not None:
+                scale = pixel_scale(self.last_wcs)
+                center = self.last_wcs.pixel_to_world(width / 2 - 0.5, height / 2 - 0.5)
+                # after a slew to another field the given hint is the good one
+                if hint is None or hint.separation(center).deg <= self.hint_radius:
+                    hint = center
+
+            wcs = None
+            if hint is not None:
+                wcs = self._run(catalog, width, height, hint, scale)
+            if wcs is None:
+                wcs = self._run(catalog, width, height, None, None)
+            if wcs is not None:
+                self.last_wcs = wcs
+            return wcs
+
+
+def pixel_scale(wcs):
+    """
+    @return: Mean pixel scale of a celestial WCS in arcsec/pixel
+    """
+    return float(np.sqrt(abs(np.linalg.det(wcs.pixel_scale_matrix))) * 3600)
+
+
+def pair_offsets(wcs, east, west, slit_x, slit_y):
+    """
+    Rotation and pointing offset needed to place a pair of stars along the
+    slit with the middle point of the pair on the slit center.
+
+    @param wcs: WCS of the frame
+    @param east: SkyCoord of the east star
+    @param west: SkyCoord of the west star
+    @param slit_x: Slit center x position in 0-based pixels
+    @param slit_y: Slit center y position in 0-based pixels
+    @return: (pa, offset_ra, offset_dec) with pa the angle of the line from
+             the east to the west star on the detector in degrees, like
+             Ds9AutoDisplay.get_pa, and the offsets in arcseconds of the pair
+             middle point from the slit center
+    """
+    (x1, x2), (y1, y2) = wcs.world_to_pixel(SkyCoord([east, west]))
+    pa = float(np.degrees(np.arctan2(y2 - y1, x2 - x1)))
+
+    middle = east.directional_offset_by(
+        east.position_angle(west), east.separation(west) / 2
+    )
+    slit = wcs.pixel_to_world(slit_x, slit_y)
+    offset_ra, offset_dec = slit.spherical_offsets_to(middle)
+    return pa, offset_ra.to_value(units.arcsec), offset_dec.to_value(units.arcsec)
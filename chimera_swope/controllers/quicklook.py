@@ -0,0 +1,93 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from chimera.core.chimeraobject import ChimeraObject
+from chimera.core.event import event
+from chimera.interfaces.camera import CameraStatus
+
+from chimera_swope.controllers.framestats import frame_statistics, read_subsample
+
+
+class QuickLook(ChimeraObject):
+    """
+    Computes quick-look quality statistics of every frame read out by the
+    camera and publishes them with the statistics_ready event.
+    """
+
+    __config__ = {
+        "camera": "/Camera/0",
+        "subsample_step": 4,  # pixels
+        "star_region": 1024,  # central region used to find stars, pixels
+        "detection_threshold": 5.0,  # sigma above background
+        "saturation_level": 65000.0,  # ADU
+        "history_size": 100,  # frames kept on the rolling table
+    }
+
+    def __init__(self):
+        ChimeraObject.__init__(self)
+        self._history = deque()
+        self._history_lock = threading.Lock()
+        self._executor = None
+
+    def __start__(self):
+        # the configuration is only applied after __init__
+        self._history = deque(maxlen=self["history_size"])
+        # statistics are computed out of the camera event delivery
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        def readout_clbk(image, status):
+            if status != CameraStatus.OK:
+                return
+            self._executor.submit(self._process, image.filename)
+
+        cam = self.get_proxy(self["camera"])
+        cam.ping()
+        cam.readout_complete += readout_clbk
+
+    def __stop__(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _process(self, filename):
+        try:
+            subsample, center = read_subsample(
+                filename, self["subsample_step"], self["star_region"]
+            )
+            stats = frame_statistics(
+                subsample,
+                center,
+                saturation=self["saturation_level"],
+                threshold=self["detection_threshold"],
+            )
+        except Exception as e:
+            self.log.error(f"Quick-look statistics failed on {filename}: {e}")
+            return
+        stats["filename"] = filename
+        with self._history_lock:
+            self._history.append(stats)
+        self.log.info(
+            f"{filename}: sky {stats['sky']:.1f} noise {stats['noise']:.1f} "
+            f"stars {stats['n_stars']} FWHM {stats['fwhm']:.2f} px"
+        )
+        self.statistics_ready(stats)
+
+    def get_statistics(self, n=None):
+        """
+        @param n: Number of most recent frames to return. None returns all.
+        @return: List of statistics dicts, oldest first.
+        """
+        with self._history_lock:
+            history = list(self._history)
+        return history if n is None else history[-n:]
+
+    def get_last_statistics(self):
+        """
+        @return: Statistics dict of the last processed frame or None.
+        """
+        with self._history_lock:
+            return self._history[-1] if self._history else None
+
+    @event
+    def statistics_ready(self, stats):
+        pass
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from astropy import units
+from astropy.coordinates import Angle
+from chimera.core.chimeraobject import ChimeraObject
+
+from chimera_swope.ephemeris import EphemerisCache
+from chimera_swope.sky import altaz_to_radec
+
+
+class SiteEphemeris(ChimeraObject):
+    """
+    Sky geometry of the site precomputed for the night and served by
+    interpolation: sidereal time, twilight times, Moon and the alt/az,
+    airmass and Moon separation of registered targets.
+
+    Instruments, scripts and the UI query it instead of doing the astronomy
+    on every call. Times are unix times; None means now.
+    """
+
+    __config__ = {
+        "latitude": "-29:00:43.175",  # as the site configuration
+        "longitude": "-70:42:00.877",
+        "grid_step": 5.0,  # minutes
+        "max_nights": 3,  # nights kept in cache
+    }
+
+    def __init__(self):
+        ChimeraObject.__init__(self)
+        self._cache = None
+
+    def __start__(self):
+        self._cache = EphemerisCache(
+            Angle(self["longitude"], unit=units.deg).deg,
+            Angle(self["latitude"], unit=units.deg).deg,
+            step=self["grid_step"],
+            max_nights=self["max_nights"],
+        )
+        # tonight is ready before the first query
+        threading.Thread(target=self._cache.get, daemon=True).start()
+
+    def _night(self, t):
+        t = time.time() if t is None else t
+        return self._cache.get(t=t), t
+
+    def get_lst(self, t=None):
+        """
+        @return: Local sidereal time in hours
+        """
+        night, t = self._night(t)
+        return float(night.lst_at(t)) / 15.0
+
+    def alt_az_to_ra_dec(self, alt, az, t=None):
+        """
+        @param alt: Altitude in degrees
+        @param az: Azimuth in degrees, from north through east
+        @return: (ra, dec) of date, ra in hours and dec in degrees
+        """
+        night, t = self._night(t)
+        ra, dec = altaz_to_radec(alt, az, night.lst_at(t), self._cache.latitude)
+        return float(ra) / 15.0, float(dec)
+
+    def get_twilights(self, date=None):
+        """
+        @param date: Local date of the night start, "YYYY-MM-DD". None is the
+                     current night.
+        @return: Dict with the (evening, morning) unix times of the civil,
+                 nautical and astronomical twilights, None if they do not
+                 happen
+        """
+        return dict(self._cache.get(date=date).twilights)
+
+    def is_night(self, t=None, twilight="nautical"):
+        night, t = self._night(t)
+        return night.is_night(t, twilight)
+
+    def get_moon(self, t=None):
+        """
+        @return: Dict with the Moon ra, dec, alt in degrees and its
+                 illuminated fraction
+        """
+        night, t = self._night(t)
+        return night.moon(t)
+
+    def add_targets(self, names, ra, dec):
+        """
+        Register targets, computing their night grids at once.
+
+        @param names: Target names
+        @param ra: Right ascensions in hours
+        @param dec: Declinations in degrees
+        """
+        self._cache.add_targets(names, [15.0 * r for r in ra], dec)
+
+    def get_target(self, name, t=None):
+        """
+        @param name: Target registered with add_targets
+        @return: Dict with alt, az, airmass and moon_separation, angles in
+                 degrees
+        """
+        night, t = self._night(t)
+        return night.target(name, t)
@@ -0,0 +1,272 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from astropy.io import fits
+from astropy.stats import sigma_clipped_stats
+from photutils.detection import DAOStarFinder
+from scipy.spatial import cKDTree
+
+
+@dataclass(frozen=True, slots=True)
+class SourceCatalog:
+    """Pixel positions and fluxes of the sources detected on a frame."""
+
+    x: np.ndarray
+    y: np.ndarray
+    flux: np.ndarray
+    _tree: cKDTree | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if len(self.x):
+            object.__setattr__(
+                self, "_tree", cKDTree(np.column_stack([self.x, self.y]))
+            )
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0), np.empty(0), np.empty(0))
+
+    def __len__(self):
+        return len(self.x)
+
+    def nearest(self, x, y):
+        """
+        @return: (x, y) of the source closest to the given pixel position.
+        """
+        _, idx = self._tree.query([x, y])
+        return float(self.x[idx]), float(self.y[idx])
+
+
+def _to_catalog(sources, x0=0, y0=0):
+    if sources is None:
+        return SourceCatalog.empty()
+    return SourceCatalog(
+        np.asarray(sources["xcentroid"], dtype=float) + x0,
+        np.asarray(sources["ycentroid"], dtype=float) + y0,
+        np.asarray(sources["flux"], dtype=float),
+    )
+
+
+def _concatenate(catalogs):
+    if not catalogs:
+        return SourceCatalog.empty()
+    return SourceCatalog(
+        np.concatenate([c.x for c in catalogs]),
+        np.concatenate([c.y for c in catalogs]),
+        np.concatenate([c.flux for c in catalogs]),
+    )
+
+
+def estimate_background(data, step=4):
+    """
+    Sigma clipped background level and noise estimated on a strided
+    subsample of the image.
+
+    @param data: Image data
+    @param step: Take one pixel every step pixels on each axis
+    @return: (median, std)
+    """
+    _, median, std = sigma_clipped_stats(data[::step, ::step], sigma=3.0)
+    return median, std
+
+
+def detect_sources(data, fwhm=3.0, threshold=5.0):
+    """
+    Detect stars on a full frame with DAOStarFinder.
+
+    @param data: Image data
+    @param fwhm: Expected FWHM of the stars in pixels
+    @param threshold: Detection threshold in units of the background std
+    @return: A SourceCatalog, empty if no stars were found
+    """
+    _, median, std = sigma_clipped_stats(data, sigma=3.0)
+    daofind = DAOStarFinder(fwhm=fwhm, threshold=threshold * std)
+    return _to_catalog(daofind(data - median))
+
+
+def detect_sources_around(
+    data, points, radius=50, fwhm=3.0, threshold=5.0, background_step=4
+):
+    """
+    Detect stars only on square windows around the given pixel positions.
+    Much faster than a full frame detection when only a few stars matter.
+
+    @param data: Image data
+    @param points: Sequence of (x, y) pixel positions (0-based)
+    @param radius: Half size of the windows in pixels
+    @param fwhm: Expected FWHM of the stars in pixels
+    @param threshold: Detection threshold in units of the background std
+    @param background_step: Subsampling step for the background estimate
+    @return: A SourceCatalog with the stars found on all windows
+    """
+    median, std = estimate_background(data, background_step)
+    daofind = DAOStarFinder(fwhm=fwhm, threshold=threshold * std)
+    catalogs = []
+    ny, nx = data.shape
+    for x, y in points:
+        x0, y0 = max(0, int(x) - radius), max(0, int(y) - radius)
+        x1, y1 = min(nx, int(x) + radius + 1), min(ny, int(y) + radius + 1)
+        if x1 <= x0 or y1 <= y0:
+            continue
+        window = np.asarray(data[y0:y1, x0:x1], dtype=float)
+        catalogs.append(_to_catalog(daofind(window - median), x0, y0))
+    return _concatenate(catalogs)
+
+
+def detect_sources_tiled(
+    data, fwhm=3.0, threshold=5.0, tile_size=1024, workers=None, background_step=4
+):
+    """
+    Detect stars on a full frame, processing tiles in parallel.
+
+    Tiles overlap by a margin of a few FWHM so stars on the tile borders are
+    measured whole; each star is kept only by the tile whose core contains it.
+
+    @param data: Image data
+    @param fwhm: Expected FWHM of the stars in pixels
+    @param threshold: Detection threshold in units of the background std
+    @param tile_size: Size of the tile cores in pixels
+    @param workers: Number of threads. None uses one per CPU.
+    @param background_step: Subsampling step for the background estimate
+    @return: A SourceCatalog, empty if no stars were found
+    """
+    median, std = estimate_background(data, background_step)
+    daofind = DAOStarFinder(fwhm=fwhm, threshold=threshold * std)
+    margin = int(np.ceil(3 * fwhm))
+    ny, nx = data.shape
+
+    def detect_tile(origin):
+        cy0, cx0 = origin
+        cy1, cx1 = min(ny, cy0 + tile_size), min(nx, cx0 + tile_size)
+        y0, x0 = max(0, cy0 - margin), max(0, cx0 - margin)
+        y1, x1 = min(ny, cy1 + margin), min(nx, cx1 + margin)
+        tile = np.asarray(data[y0:y1, x0:x1], dtype=float)
+        catalog = _to_catalog(daofind(tile - median), x0, y0)
+        core = (
+            (catalog.x >= cx0 - 0.5)
+            & (catalog.x < cx1 - 0.5)
+            & (catalog.y >= cy0 - 0.5)
+            & (catalog.y < cy1 - 0.5)
+        )
+        return SourceCatalog(catalog.x[core], catalog.y[core], catalog.flux[core])
+
+    origins = [(y, x) for y in range(0, ny, tile_size) for x in range(0, nx, tile_size)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        return _concatenate(list(executor.map(detect_tile, origins)))
+
+
+class SourceDetector:
+    """
+    Background worker that detects sources on new frames and caches the
+    catalogs by frame id.
+
+    Frames are submitted as they are read out. When frames arrive faster than
+    they can be processed, older frames nobody is waiting for are skipped in
+    favour of the newest one; they are detected on demand if asked for with
+    get().
+    """
+
+    def __init__(self, detect=detect_sources, cache_size=8, log=None):
+        """
+        @param detect: Function receiving the image data and returning a
+                       SourceCatalog
+        @param cache_size: Number of catalogs kept
+        @param log: Logger for detection errors
+        """
+        self.detect = detect
+        self.cache_size = cache_size
+        self.log = log
+
+        self._cache = OrderedDict()
+        self._pending = {}  # frame id -> Event set when detection finishes
+        self._waiters = {}  # frame id -> number of threads waiting on get()
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="SourceDetector", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, frame_id, filename):
+        """
+        Queue a frame for detection. Returns immediately.
+        """
+        with self._condition:
+            if frame_id in self._cache or frame_id in self._pending:
+                return
+            self._pending[frame_id] = threading.Event()
+            self._queue.append((frame_id, filename))
+            self._condition.notify()
+
+    def get(self, frame_id, filename=None, timeout=None):
+        """
+        Get the catalog of a frame, waiting for a running detection.
+
+        @param frame_id: Frame identifier used on submit
+        @param filename: If given and the frame is unknown, it is detected now
+        @param timeout: Maximum time to wait for the detection in seconds
+        @return: The SourceCatalog or None if not available
+        """
+        with self._condition:
+            if frame_id in self._cache:
+                self._cache.move_to_end(frame_id)
+                return self._cache[frame_id]
+            if frame_id not in self._pending and filename is not None:
+                self.submit(frame_id, filename)
+            done = self._pending.get(frame_id)
+            if done is None:
+                return None
+            self._waiters[frame_id] = self._waiters.get(frame_id, 0) + 1
+        done.wait(timeout)
+        with self._condition:
+            self._waiters[frame_id] -= 1
+            if self._waiters[frame_id] == 0:
+                del self._waiters[frame_id]
+            return self._cache.get(frame_id)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                frame_id, filename = self._queue.pop()
+                # skip the older frames unless someone is waiting for them
+                queue = deque()
+                for item in self._queue:
+                    if item[0] in self._waiters:
+                        queue.append(item)
+                    else:
+                        self._pending.pop(item[0]).set()
+                self._queue = queue
+
+            catalog = None
+            try:
+                catalog = self.detect(fits.getdata(filename))
+            except Exception as e:
+                if self.log is not None:
+                    self.log.error(f"Source detection failed on {filename}: {e}")
+
+            with self._condition:
+                if catalog is not None:
+                    self._cache[frame_id] = catalog
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                self._pending.pop(frame_id).set()
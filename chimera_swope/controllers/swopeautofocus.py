@@ -0,0 +1,29 @@
+from chimera.controllers.autofocus import Autofocus
+
+
+class SwopeAutofocus(Autofocus):
+    """
+    Chimera autofocus that stores every successful run on the SwopeFocuser
+    focus model, so the model keeps learning from the night's focus runs.
+    """
+
+    __config__ = {
+        "focus_model": True,  # store the results on the focuser focus model
+    }
+
+    def focus(self, filter=None, *args, **kwargs):
+        fit = Autofocus.focus(self, filter, *args, **kwargs)
+        if self["focus_model"]:
+            try:
+                self._store(fit, filter)
+            except Exception as e:
+                self.log.warning(f"Could not store the focus measurement: {e}")
+        return fit
+
+    def _store(self, fit, filter_name):
+        position, fwhm = fit.best_focus
+        # the focuser asks its filter wheel when no filter was given
+        self.get_proxy(self["focuser"]).add_focus_measurement(
+            int(round(position)), float(fwhm), filter_name
+        )
+        self.log.info(f"Focus model updated: {position:.0f} steps, FWHM {fwhm:.2f}")
@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from astropy import units
+from astropy.coordinates import Longitude, get_body, get_sun
+from astropy.time import Time
+
+from chimera_swope.sky import airmass, great_circle_distance, radec_to_altaz
+
+# Sun altitude at the end of each twilight, in degrees
+TWILIGHTS = {"civil": -6.0, "nautical": -12.0, "astronomical": -18.0}
+
+
+def night_date(longitude, t=None):
+    """
+    @param longitude: Site longitude in degrees, east positive
+    @param t: Unix time, defaults to now
+    @return: Local date, "YYYY-MM-DD", of the night a time belongs to. Nights
+             go from local noon to local noon.
+    """
+    t = time.time() if t is None else t
+    local = t + (longitude / 15.0 - 12.0) * 3600.0
+    return time.strftime("%Y-%m-%d", time.gmtime(local))
+
+
+def _crossings(t, values, level):
+    # times where values cross the level downwards and upwards
+    above = values >= level
+    down = np.flatnonzero(above[:-1] & ~above[1:])
+    up = np.flatnonzero(~above[:-1] & above[1:])
+
+    def interpolate(i):
+        fraction = (values[i] - level) / (values[i] - values[i + 1])
+        return t[i] + fraction * (t[i + 1] - t[i])
+
+    return [interpolate(i) for i in down], [interpolate(i) for i in up]
+
+
+class NightEphemeris:
+    """
+    Sky geometry of a night of the site, computed once on a time grid from
+    local noon to the next local noon: sidereal time, Sun and Moon positions,
+    twilight times and the alt/az, airmass and Moon separation of a list of
+    targets. Values in between the grid points are interpolated.
+
+    The Moon position is geocentric, good to about a degree.
+    """
+
+    def __init__(self, date, longitude, latitude, step=5.0):
+        """
+        @param date: Local date when the night starts, "YYYY-MM-DD"
+        @param longitude: Site longitude in degrees, east positive
+        @param latitude: Site latitude in degrees
+        @param step: Grid step in minutes
+        """
+        self.date = date
+        self.longitude = longitude
+        self.latitude = latitude
+
+        noon = Time(f"{date}T12:00:00", scale="utc") - longitude / 15.0 * units.hour
+        times = noon + np.arange(0.0, 24 * 60 + step, step) * units.min
+        self.times = times
+        self.t = times.unix
+        self.lst = times.sidereal_time("mean", Longitude(longitude * units.deg)).deg
+        # continuous, for the interpolation
+        self._lst = np.degrees(np.unwrap(np.radians(self.lst)))
+
+        sun = get_sun(times)
+        self.sun_alt, _ = radec_to_altaz(sun.ra.deg, sun.dec.deg, self.lst, latitude)
+        moon = get_body("moon", times)
+        self.moon_ra, self.moon_dec = moon.ra.deg, moon.dec.deg
+        self._moon_ra = np.unwrap(self.moon_ra, period=360.0)
+        self.moon_alt, _ = radec_to_altaz(
+            self.moon_ra, self.moon_dec, self.lst, latitude
+        )
+        elongation = great_circle_distance(
+            sun.ra.deg, sun.dec.deg, self.moon_ra, self.moon_dec
+        )
+        self.moon_illumination = (1.0 - np.cos(np.radians(elongation))) / 2.0
+
+        self.twilights = {}
+        for name, level in TWILIGHTS.items():
+            down, up = _crossings(self.t, self.sun_alt, level)
+            self.twilights[name] = (
+                down[0] if down else None,
+                up[-1] if up else None,
+            )
+
+        self._index = {}
+        self._ra = np.empty(0)
+        self._dec = np.empty(0)
+        self._alt = np.empty((0, len(self.t)))
+        self._az = np.empty((0, len(self.t)))
+        self._moon_separation = np.empty((0, len(self.t)))
+        self._lock = threading.Lock()
+
+    def contains(self, t):
+        return self.t[0] <= t <= self.t[-1]
+
+    def add_targets(self, names, ra, dec):
+        """
+        Compute the grids of new targets, all at once. Targets already known
+        are updated.
+
+        @param names: Target names
+        @param ra: Right ascensions in degrees
+        @param dec: Declinations in degrees
+        """
+        ra = np.atleast_1d(np.asarray(ra, dtype=float))
+        dec = np.atleast_1d(np.asarray(dec, dtype=float))
+        alt, az = radec_to_altaz(ra[:, None], dec[:, None], self.lst, self.latitude)
+        separation = great_circle_distance(
+            ra[:, None], dec[:, None], self.moon_ra, self.moon_dec
+        )
+        # unwrapped, for the interpolation
+        az = np.degrees(np.unwrap(np.radians(az), axis=1))
+        with self._lock:
+            for i, name in enumerate(names):
+                row = self._index.get(name)
+                if row is None:
+                    self._index[name] = len(self._ra)
+                    self._ra = np.append(self._ra, ra[i])
+                    self._dec = np.append(self._dec, dec[i])
+                    self._alt = np.vstack([self._alt, alt[i]])
+                    self._az = np.vstack([self._az, az[i]])
+                    self._moon_separation = np.vstack(
+                        [self._moon_separation, separation[i]]
+                    )
+                else:
+                    self._ra[row], self._dec[row] = ra[i], dec[i]
+                    self._alt[row], self._az[row] = alt[i], az[i]
+                    self._moon_separation[row] = separation[i]
+
+    @property
+    def targets(self):
+        with self._lock:
+            return list(self._index)
+
+    def lst_at(self, t):
+        """
+        @param t: Unix time, or array of them
+        @return: Local sidereal time in degrees
+        """
+        return np.interp(t, self.t, self._lst) % 360.0
+
+    def sun_altitude(self, t):
+        return np.interp(t, self.t, self.sun_alt)
+
+    def is_night(self, t, twilight="nautical"):
+        """
+        @return: True if the Sun is below the end of the given twilight
+        """
+        return bool(self.sun_altitude(t) < TWILIGHTS[twilight])
+
+    def moon(self, t):
+        """
+        @return: Dict with the Moon ra, dec, alt in degrees and illuminated
+                 fraction
+        """
+        return {
+            "ra": float(np.interp(t, self.t, self._moon_ra)) % 360.0,
+            "dec": float(np.interp(t, self.t, self.moon_dec)),
+            "alt": float(np.interp(t, self.t, self.moon_alt)),
+            "illumination": float(np.interp(t, self.t, self.moon_illumination)),
+        }
+
+    def target(self, name, t):
+        """
+        @param name: Target name, added with add_targets
+        @param t: Unix time
+        @return: Dict with the target alt, az, airmass and Moon separation,
+                 angles in degrees
+        @raise KeyError: If the target is unknown
+        """
+        with self._lock:
+            row = self._index[name]
+            alt = float(np.interp(t, self.t, self._alt[row]))
+            az = float(np.interp(t, self.t, self._az[row])) % 360.0
+            separation = float(np.interp(t, self.t, self._moon_separation[row]))
+        return {
+            "alt": alt,
+            "az": az,
+            "airmass": float(airmass(alt)),
+            "moon_separation": separation,
+        }
+
+    def airmass_grid(self, names=None):
+        """
+        @param names: Target names, None for all in the order they were added
+        @return: Array of shape (n_targets, n_times) with the airmass on the
+                 grid
+        """
+        with self._lock:
+            if names is None:
+                rows = list(self._index.values())
+            else:
+                rows = [self._index[name] for name in names]
+            return airmass(self._alt[rows])
+
+
+class EphemerisCache:
+    """
+    NightEphemeris of the site kept by date, computed on first use. Targets
+    added to the cache are computed on the nights already cached and on the
+    ones computed later.
+    """
+
+    def __init__(self, longitude, latitude, step=5.0, max_nights=3):
+        """
+        @param longitude: Site longitude in degrees, east positive
+        @param latitude: Site latitude in degrees
+        @param step: Grid step in minutes
+        @param max_nights: Number of nights kept
+        """
+        self.longitude = longitude
+        self.latitude = latitude
+        self.step = step
+        self.max_nights = max_nights
+        self._nights = OrderedDict()
+        self._targets = {}  # name -> (ra, dec)
+        self._lock = threading.Lock()
+
+    def get(self, date=None, t=None):
+        """
+        @param date: Local date of the night start. None is the night of t.
+        @param t: Unix time, defaults to now
+        @return: The NightEphemeris
+        """
+        if date is None:
+            date = night_date(self.longitude, t)
+        # computing a night takes a while, one at a time is enough
+        with self._lock:
+            if date in self._nights:
+                self._nights.move_to_end(date)
+                return self._nights[date]
+            night = NightEphemeris(date, self.longitude, self.latitude, self.step)
+            if self._targets:
+                names = list(self._targets)
+                ra, dec = np.array([self._targets[name] for name in names]).T
+                night.add_targets(names, ra, dec)
+            self._nights[date] = night
+            while len(self._nights) > self.max_nights:
+                self._nights.popitem(last=False)
+            return night
+
+    def add_targets(self, names, ra, dec):
+        """
+        @param names: Target names
+        @param ra: Right ascensions in degrees
+        @param dec: Declinations in degrees
+        """
+        ra, dec = np.atleast_1d(ra), np.atleast_1d(dec)
+        with self._lock:
+            for i, name in enumerate(names):
+                self._targets[name] = (float(ra[i]), float(dec[i]))
+            nights = list(self._nights.values())
+        for night in nights:
+            night.add_targets(names, ra, dec)
@@ -0,0 +1,143 @@
+import os
+import threading
+from time import time
+
+import numpy as np
+
+# One fixed-size binary record per focus measurement. The store is a plain
+# append-only file of these records, so it can be read back with np.fromfile.
+FOCUS_RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),  # unix time
+        ("position", "<f8"),  # focuser steps
+        ("temperature", "<f8"),  # Celsius
+        ("altitude", "<f8"),  # degrees
+        ("fwhm", "<f8"),  # measured FWHM at position
+        ("filter", "S16"),
+    ]
+)
+
+
+class FocusModel:
+    """
+    Focus position model fitted from a persistent history of focus measurements.
+
+    The model is linear on ambient temperature and sin(altitude), with one
+    additive offset per filter relative to the most used one:
+
+        position = p0 + a * temperature + b * sin(altitude) + offset[filter]
+
+    Measurements are weighted by 1 / fwhm**2 so that sharper focus runs
+    dominate the fit.
+    """
+
+    def __init__(self, filename, max_age=None, min_records=5):
+        """
+        @param filename: Path of the append-only history store
+        @param max_age: Ignore records older than this (seconds). None uses all.
+        @param min_records: Minimum number of valid records needed to fit
+        """
+        self.filename = os.path.expanduser(filename)
+        self.max_age = max_age
+        self.min_records = min_records
+        self._lock = threading.Lock()
+        self._records = self._load()
+        self._coefficients = None
+        self._filter_offsets = {}
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return np.zeros(0, dtype=FOCUS_RECORD_DTYPE)
+        # ignore a partially written trailing record
+        n_records = os.path.getsize(self.filename) // FOCUS_RECORD_DTYPE.itemsize
+        return np.fromfile(self.filename, dtype=FOCUS_RECORD_DTYPE, count=n_records)
+
+    @property
+    def records(self):
+        return self._records
+
+    @property
+    def is_fitted(self):
+        return self._coefficients is not None
+
+    def add(self, position, temperature, filter_name, altitude, fwhm, timestamp=None):
+        """
+        Append a measurement to the on-disk store and to the in-memory history.
+        """
+        record = np.zeros(1, dtype=FOCUS_RECORD_DTYPE)
+        record["timestamp"] = time() if timestamp is None else timestamp
+        record["position"] = position
+        record["temperature"] = temperature
+        record["altitude"] = altitude
+        record["fwhm"] = fwhm
+        record["filter"] = (filter_name or "").encode()[:16]
+
+        with self._lock:
+            directory = os.path.dirname(self.filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.filename, "ab") as f:
+                f.write(record.tobytes())
+            self._records = np.concatenate([self._records, record])
+
+    def fit(self):
+        """
+        Fit the model to the stored measurements.
+
+        @return: True if the model could be fitted, False otherwise.
+        """
+        with self._lock:
+            records = self._records
+
+        mask = (
+            np.isfinite(records["position"])
+            & np.isfinite(records["temperature"])
+            & np.isfinite(records["altitude"])
+            & np.isfinite(records["fwhm"])
+            & (records["fwhm"] > 0)
+        )
+        if self.max_age is not None:
+            mask &= records["timestamp"] > time() - self.max_age
+        records = records[mask]
+
+        filters, counts = np.unique(records["filter"], return_counts=True)
+        # reference filter (offset 0) is the most measured one
+        filters = filters[np.argsort(-counts, kind="stable")]
+        other_filters = list(filters[1:])
+        n_params = 3 + len(other_filters)
+        if len(records) < max(self.min_records, n_params + 1):
+            return False
+
+        design = np.empty((len(records), n_params))
+        design[:, 0] = 1.0
+        design[:, 1] = records["temperature"]
+        design[:, 2] = np.sin(np.radians(records["altitude"]))
+        for i, f in enumerate(other_filters):
+            design[:, 3 + i] = records["filter"] == f
+
+        weights = 1.0 / records["fwhm"]
+        solution, _, rank, _ = np.linalg.lstsq(
+            design * weights[:, None], records["position"] * weights, rcond=None
+        )
+        if rank < n_params:
+            return False
+
+        self._coefficients = solution[:3]
+        self._filter_offsets = {
+            f.decode(): solution[3 + i] for i, f in enumerate(other_filters)
+        }
+        self._filter_offsets[filters[0].decode()] = 0.0
+        return True
+
+    def predict(self, temperature, filter_name, altitude):
+        """
+        @return: Predicted best focus position or None if the model is not fitted
+                 or the filter was never measured.
+        """
+        if self._coefficients is None:
+            return None
+        offset = self._filter_offsets.get(filter_name or "")
+        if offset is None:
+            return None
+        p0, a, b = self._coefficients
+        return p0 + a * temperature + b * np.sin(np.radians(altitude)) + offset
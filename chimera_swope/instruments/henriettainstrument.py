@@ -11,6 +11,8 @@ from chimera.interfaces.camera import CameraFeature, CameraStatus
 from chimera.util.image import Image
 from henrietta.henrietta import Henrietta
 
+from chimera_swope.instruments.util import merge_cards
+
 
 class HenriettaBase(Henrietta, ChimeraObject):
     __config__ = {"henrietta_host": "127.0.0.1", "henrietta_port": 52801}
@@ -72,6 +74,16 @@ class HenriettaWheel(FilterWheelBase):
         fn = self["filters_gui"].upper().split().index(current_wheel_value.upper())
         return self["filters"].split()[fn]
 
+    def get_metadata(self, request):
+        # one keyword per wheel, FILTER from all of them would collide
+        return [
+            (
+                self.wheel_name.upper(),
+                self.get_filter(),
+                f"Henrietta {self.wheel_name} wheel position",
+            )
+        ]
+
 
 class HenriettaSlitWheel(HenriettaWheel):
     pass
@@ -101,6 +113,8 @@ class HenriettaCamera(CameraBase):
         "ccd_height": 2048,
         "pixel_size_x": 18.0,
         "pixel_size_y": 18.0,
+        "metadata_collector": "",  # e.g. /MetadataCollector/0, empty to disable
+        "focuser": "",  # focuser to apply the focus model before each exposure
     }
 
     def __init__(self):
@@ -126,6 +140,15 @@ class HenriettaCamera(CameraBase):
     def __start__(self):
         self.henrietta: Henrietta = self.get_proxy(self["henrietta"])
 
+    def expose(self, request=None, **kwargs):
+        if self["metadata_collector"]:
+            # the collector is the only source of the device metadata, chimera
+            # does not ask every device again when the exposure begins
+            if not isinstance(request, ImageRequest):
+                request = ImageRequest(**(request or kwargs))
+            request.auto_collect_metadata = False
+        return CameraBase.expose(self, request, **kwargs)
+
     def get_current_ccd(self):
         return self._my_ccd
 
@@ -152,6 +175,15 @@ class HenriettaCamera(CameraBase):
             self.extra_header_info.update(extras)
 
         image_request.headers += self.get_metadata(image_request)
+        if self["metadata_collector"]:
+            # the whole system metadata in one call
+            try:
+                collector = self.get_proxy(self["metadata_collector"])
+                merge_cards(
+                    image_request.headers, collector.get_metadata(image_request)
+                )
+            except Exception as e:
+                self.log.warning(f"Could not get the collected metadata: {e}")
         img = Image.create(image_data, image_request)
 
         # register image on ImageServer
@@ -187,6 +219,13 @@ class HenriettaCamera(CameraBase):
         return proxy
 
     def _expose(self, request: ImageRequest):
+        if self["focuser"]:
+            # the focuser settles on the model position before the shutter opens
+            try:
+                self.get_proxy(self["focuser"]).apply_focus_model()
+            except Exception as e:
+                self.log.warning(f"Could not apply the focus model: {e}")
+
         self.__last_frame_start = datetime.datetime.now(datetime.UTC)
         status = CameraStatus.OK
         print("Request:", request)
@@ -0,0 +1,172 @@
+import http.client
+import json
+import threading
+import urllib.parse
+from dataclasses import dataclass
+from time import time
+
+
+@dataclass(frozen=True, slots=True)
+class FetchResult:
+    """
+    Result of a fetch. When the endpoint is unreachable the last good data is
+    returned with stale=True and the error that prevented the refresh.
+    """
+
+    data: object
+    fetched_at: float | None  # unix time of the last successful fetch
+    stale: bool
+    error: str | None = None
+
+    @property
+    def age(self):
+        """Seconds since the last successful fetch or None if never fetched."""
+        if self.fetched_at is None:
+            return None
+        return time() - self.fetched_at
+
+
+class SingleFlightFetcher:
+    """
+    Thread-safe JSON fetcher for a single HTTP endpoint.
+
+    - Single-flight: only one request is in flight at a time. Callers arriving
+      while a request is running get the cached data right away, or wait for
+      the running request if there is nothing cached yet.
+    - Keeps a persistent keep-alive connection to the endpoint host.
+    - After a failure, no new request is made until an exponentially growing
+      backoff delay has passed; meanwhile the last good data is served as stale.
+    """
+
+    def __init__(
+        self,
+        url_builder,
+        handler=None,
+        timeout=10.0,
+        backoff_initial=5.0,
+        backoff_max=300.0,
+    ):
+        """
+        @param url_builder: Callable returning the URL to request. Called on
+                            every request, so it can depend on what is cached.
+        @param handler: Callable receiving the decoded JSON and returning the
+                        data to cache. Raising rejects the data.
+        @param timeout: Socket timeout for connection and reads in seconds
+        @param backoff_initial: First delay after a failure in seconds
+        @param backoff_max: Maximum delay between attempts in seconds
+        """
+        self.url_builder = url_builder
+        self.handler = handler
+        self.timeout = timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self._flight_lock = threading.Lock()
+        self._connection = None
+        self._connection_key = None
+        self._data = None
+        self._fetched_at = None
+        self._error = None
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+
+    def _result(self, stale):
+        return FetchResult(self._data, self._fetched_at, stale, self._error)
+
+    def _is_fresh(self, max_age):
+        return self._fetched_at is not None and time() - self._fetched_at < max_age
+
+    def fetch(self, max_age=60.0):
+        """
+        Returns the cached data if it is younger than max_age, otherwise
+        requests it from the endpoint.
+
+        @param max_age: Maximum age of the cached data in seconds
+        @return: A FetchResult
+        """
+        if self._is_fresh(max_age):
+            return self._result(stale=False)
+
+        # serve what we have instead of queueing behind a running request
+        blocking = self._fetched_at is None
+        if not self._flight_lock.acquire(blocking=blocking):
+            return self._result(stale=True)
+        try:
+            # another thread may have refreshed or failed while we waited
+            if self._is_fresh(max_age):
+                return self._result(stale=False)
+            if time() < self._next_attempt:
+                return self._result(stale=True)
+
+            try:
+                data = self._request(self.url_builder())
+                if self.handler is not None:
+                    data = self.handler(data)
+            except Exception as e:
+                self._error = f"{type(e).__name__}: {e}"
+                self._backoff = min(
+                    self.backoff_max, max(self.backoff_initial, 2 * self._backoff)
+                )
+                self._next_attempt = time() + self._backoff
+                return self._result(stale=True)
+
+            self._data = data
+            self._fetched_at = time()
+            self._error = None
+            self._backoff = 0.0
+            self._next_attempt = 0.0
+            return self._result(stale=False)
+        finally:
+            self._flight_lock.release()
+
+    def _get_connection(self, parsed):
+        key = (parsed.scheme, parsed.netloc)
+        if self._connection is None or self._connection_key != key:
+            self.close()
+            connection_class = (
+                http.client.HTTPSConnection
+                if parsed.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self._connection = connection_class(parsed.netloc, timeout=self.timeout)
+            self._connection_key = key
+        return self._connection
+
+    def _request(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        path = urllib.parse.urlunsplit(("", "", parsed.path or "/", parsed.query, ""))
+
+        # a reused keep-alive connection may have been closed by the server,
+        # in that case retry once on a fresh connection
+        for attempt in range(2):
+            reused = self._connection is not None
+            connection = self._get_connection(parsed)
+            try:
+                connection.request("GET", path, headers={"Connection": "keep-alive"})
+                response = connection.getresponse()
+                body = response.read()
+            except (
+                http.client.RemoteDisconnected,
+                ConnectionResetError,
+                BrokenPipeError,
+            ):
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self.close()
+                raise
+            if response.will_close:
+                self.close()
+            if response.status != 200:
+                raise http.client.HTTPException(
+                    f"HTTP {response.status} {response.reason} from {url}"
+                )
+            return json.loads(body.decode("utf-8"))
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+        self._connection_key = None
@@ -6,8 +6,8 @@ from swope.tcs.swope_tcs import SwopeTCS
 class SwopeBase:
     def __init__(self):
         self.tcs: SwopeTCS | None = None
-        self._status: dict | None = None
-        self._last_update: float | None = None
+        # (status, unix time it was read), replaced as a whole
+        self._timed_status: tuple[dict, float] | None = None
         self._update_interval: float = 1.0  # seconds
 
     def __start__(self):
@@ -18,12 +18,20 @@ class SwopeBase:
         return self.get_status(force=force)
     
     def get_status(self, force=False):
+        return self.get_timed_status(force=force)[0]
+
+    def get_timed_status(self, force=False):
+        """
+        @return: (status, unix time it was read), always from the same read
+        """
+        timed_status = self._timed_status
         if (
             not force
-            and self._last_update is not None
-            and (time() - self._last_update) < self._update_interval
+            and timed_status is not None
+            and (time() - timed_status[1]) < self._update_interval
         ):
-            return self._status
-        self._last_update = time()
-        self._status = self.tcs.get_status()
-        return self._status
+            return timed_status
+        read_time = time()
+        timed_status = (self.tcs.get_status(), read_time)
+        self._timed_status = timed_status
+        return timed_status
@@ -10,7 +10,7 @@ from chimera.instruments.filterwheel import FilterWheelBase
 from chimera.interfaces.camera import CameraStatus, ReadoutMode
 from henrietta.swope_ccd import SwopeCCD
 
-from chimera_swope.instruments.util import concatenate_quad_arrays
+from chimera_swope.instruments.util import concatenate_quad_arrays, merge_cards
 
 
 class SwopeCamera(CameraBase, FilterWheelBase):
@@ -21,6 +21,8 @@ class SwopeCamera(CameraBase, FilterWheelBase):
         "ccd_height": 2048 * 2,
         "pixel_size_x": 15.0,
         "pixel_size_y": 15.0,
+        "metadata_collector": "",  # e.g. /MetadataCollector/0, empty to disable
+        "focuser": "",  # focuser to apply the focus model before each exposure
     }
 
     def __init__(self):
@@ -89,7 +91,23 @@ class SwopeCamera(CameraBase, FilterWheelBase):
     def set_filter(self, filter_name: str):
         self.swope_ccd.move_filter(filter_name)
 
+    def expose(self, request=None, **kwargs):
+        if self["metadata_collector"]:
+            # the collector is the only source of the device metadata, chimera
+            # does not ask every device again when the exposure begins
+            if not isinstance(request, ImageRequest):
+                request = ImageRequest(**(request or kwargs))
+            request.auto_collect_metadata = False
+        return CameraBase.expose(self, request, **kwargs)
+
     def _expose(self, image_request: ImageRequest):
+        if self["focuser"]:
+            # the focuser settles on the model position before the shutter opens
+            try:
+                self.get_proxy(self["focuser"]).apply_focus_model()
+            except Exception as e:
+                self.log.warning(f"Could not apply the focus model: {e}")
+
         self.expose_begin(image_request)
 
         status = CameraStatus.OK
@@ -156,6 +174,18 @@ class SwopeCamera(CameraBase, FilterWheelBase):
             if c not in image_request.headers:
                 image_request.headers.append(tuple(c))
 
+        if self["metadata_collector"]:
+            # chimera left out the camera metadata along with the other devices
+            merge_cards(image_request.headers, self.get_metadata(image_request))
+            # the whole system metadata in one call
+            try:
+                collector = self.get_proxy(self["metadata_collector"])
+                merge_cards(
+                    image_request.headers, collector.get_metadata(image_request)
+                )
+            except Exception as e:
+                self.log.warning(f"Could not get the collected metadata: {e}")
+
         image = self._save_image(
             image_request,
             pix,
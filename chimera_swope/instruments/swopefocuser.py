@@ -1,13 +1,23 @@
+import threading
 import time
 
 from chimera.instruments.focuser import FocuserBase
 from chimera.interfaces.focuser import FocuserAxis, InvalidFocusPositionException
 
+from chimera_swope.instruments.focusmodel import FocusModel
 from chimera_swope.instruments.swopebase import SwopeBase
 
 
 class SwopeFocuser(FocuserBase, SwopeBase):
-    __config__ = {"tcs_host": "127.0.0.1"}
+    __config__ = {
+        "tcs_host": "127.0.0.1",
+        "telescope": "/Telescope/0",
+        "filterwheel": "/FilterWheel/0",
+        "weatherstation": "/WeatherStation/0",
+        "focus_model_file": "~/.chimera/swope_focus_model.dat",
+        "focus_model_max_age": 90 * 86400,  # seconds
+        "focus_model_tolerance": 10,  # steps
+    }
     __config__["device"] = __config__["tcs_host"]
 
     def __init__(self):
@@ -17,10 +27,20 @@ class SwopeFocuser(FocuserBase, SwopeBase):
         self._status = None
         self._last_update = None
         self._update_interval = 1.0  # seconds
+        self._focus_model: FocusModel | None = None
+        self._focus_model_lock = threading.Lock()
 
     def __start__(self):
         SwopeBase.__start__(self)
 
+        self._focus_model = FocusModel(
+            self["focus_model_file"], max_age=self["focus_model_max_age"]
+        )
+        if self._focus_model.fit():
+            self.log.info(
+                f"Focus model fitted with {len(self._focus_model.records)} records"
+            )
+
     def move_in(self, n, axis=FocuserAxis.Z):
         current_pos = self.get_position(axis)
         return self.move_to(current_pos - n, axis)
@@ -50,5 +70,72 @@ class SwopeFocuser(FocuserBase, SwopeBase):
     def get_range(self, axis=FocuserAxis.Z):
         return 20000, 28000
 
-    # def get_temperature(self):
+    def get_temperature(self):
+        return self.get_proxy(self["weatherstation"]).temperature()
+
+    def _get_filter(self):
+        try:
+            return self.get_proxy(self["filterwheel"]).get_filter()
+        except Exception as e:
+            self.log.warning(f"Could not get current filter: {e}")
+            return ""
+
+    def add_focus_measurement(self, position, fwhm, filter_name=None):
+        """
+        Store a best focus measurement taken under the current conditions and
+        refit the focus model.
+
+        @param position: Best focus position in steps
+        @param fwhm: Measured FWHM at the best focus position
+        @param filter_name: Filter used. If None, asks the filterwheel.
+        """
+        if filter_name is None:
+            filter_name = self._get_filter()
+        temperature = self.get_temperature()
+        altitude = self.get_proxy(self["telescope"]).get_alt()
+        self._focus_model.add(position, temperature, filter_name, altitude, fwhm)
+        self.log.info(
+            f"Focus measurement stored: pos={position} T={temperature:.2f} "
+            f"filter={filter_name} alt={altitude:.2f} fwhm={fwhm:.2f}"
+        )
+        return self._focus_model.fit()
+
+    def get_model_position(self, filter_name=None):
+        """
+        @return: Model predicted focus position for the current conditions or
+                 None if there is no model for them.
+        """
+        if filter_name is None:
+            filter_name = self._get_filter()
+        position = self._focus_model.predict(
+            self.get_temperature(),
+            filter_name,
+            self.get_proxy(self["telescope"]).get_alt(),
+        )
+        if position is None:
+            return None
+        limits = self.get_range()
+        return int(round(min(max(position, limits[0]), limits[1])))
+
+    def apply_focus_model(self, filter_name=None):
+        """
+        Move the focuser to the model position if it differs from the current
+        position by more than focus_model_tolerance steps.
+
+        @return: True if the focuser was moved, False otherwise.
+        """
+        # skip if another trigger is already applying the model
+        if not self._focus_model_lock.acquire(blocking=False):
+            return False
+        try:
+            position = self.get_model_position(filter_name)
+            if position is None:
+                return False
+            if abs(position - self.get_position()) <= self["focus_model_tolerance"]:
+                return False
+            self.log.debug(f"Applying focus model: moving to {position}")
+            return self.move_to(position)
+        finally:
+            self._focus_model_lock.release()
+
     # def get_metadata(self, request):
@@ -1,23 +1,56 @@
 from chimera.instruments.rotator import RotatorBase
 
+from chimera_swope.instruments.util import (
+    normalize_angle,
+    rotator_move_time,
+    rotator_path,
+)
+
 
 class SwopeRotator(RotatorBase):
+    # The TCS does not expose the rotator yet (no position or moving flag on
+    # its status, no command to move it), so the mechanical angle is only
+    # kept here. Moves follow the cable-wrap path the hardware will take.
+    __config__ = {
+        "min_angle": -270.0,  # degrees, cable-wrap lower limit
+        "max_angle": 270.0,  # degrees, cable-wrap upper limit
+        "speed": 2.0,  # degrees/second
+        "acceleration": 1.0,  # degrees/second^2
+        "settle_time": 1.0,  # seconds
+    }
+
     def __init__(self):
         RotatorBase.__init__(self)
-        self._pos = 0.0
+        self._pos = 0.0  # mechanical angle, within the cable-wrap limits
 
     def __start__(self):
         pass
 
     def get_position(self):
-        return self._pos
+        return normalize_angle(self._pos)
+
+    def _get_target(self, angle):
+        return rotator_path(self._pos, angle, self["min_angle"], self["max_angle"])
+
+    def predict_move_time(self, angle):
+        """
+        Returns the predicted time to move the rotator to angle, following the
+        same path that move_to would take.
+        @param angle: The target angle in degrees.
+        @return: The predicted move time in seconds.
+        """
+        return rotator_move_time(
+            self._get_target(angle) - self._pos,
+            self["speed"],
+            self["acceleration"],
+            self["settle_time"],
+        )
 
     def move_to(self, angle):
+        target = self._get_target(angle)
         self.move_begin()
-        self._pos = angle
+        self._pos = target
         self.move_complete()
 
     def move_by(self, offset):
-        self.move_begin()
-        self._pos += offset  # todo: wrap around 360, make sure within limits, use actual hardware
-        self.move_complete()
+        self.move_to(self._pos + offset)
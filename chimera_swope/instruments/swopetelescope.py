@@ -1,9 +1,11 @@
+import threading
 import time
 
 from chimera.instruments.telescope import TelescopeBase
 from chimera.interfaces.telescope import TelescopeStatus
 
 from chimera_swope.instruments.swopebase import SwopeBase
+from chimera_swope.instruments.telescopesnapshot import TelescopeSnapshot
 
 
 class SwopeTelescope(TelescopeBase, SwopeBase):
@@ -15,38 +17,60 @@ class SwopeTelescope(TelescopeBase, SwopeBase):
         "aperture": 1000.0,  # mm
         "focal_length": 7000.0,  # mm unit (ex., 0.5 for a half length focal reducer)
         "focal_reduction": 1.0,
+        "site": "/Site/0",
+        "ephemeris": "",  # SiteEphemeris for the alt/az conversions, instead of the site
     }
 
     def __init__(self):
         TelescopeBase.__init__(self)
         SwopeBase.__init__(self)
+        self._snapshot = (None, None)  # (status, TelescopeSnapshot) pair
+        self._site = None
+        self._site_lock = threading.Lock()
 
     def __start__(self):
         SwopeBase.__start__(self)
 
+    def _get_snapshot(self, force=False):
+        status, timestamp = self.get_timed_status(force=force)
+        cached_status, snapshot = self._snapshot
+        if cached_status is not status:
+            snapshot = TelescopeSnapshot.from_status(status, timestamp)
+            self._snapshot = (status, snapshot)
+        return snapshot
+
+    def get_position_snapshot(self):
+        """
+        @return: Dict with ra (hours), dec, alt, az (degrees), tracking,
+                 slewing and the unix timestamp of the status they come from
+        """
+        return self._get_snapshot().as_dict()
+
     def get_alt(self):
-        return self.status["Alt"]
+        return self._get_snapshot().alt
 
     def get_az(self):
-        return self.status["Azi"]
+        return self._get_snapshot().az
 
     def get_ra(self):
-        return self.status["RA_ICRS"] / 15.0
+        return self._get_snapshot().ra
 
     def get_dec(self):
-        return self.status["Dec_ICRS"]
+        return self._get_snapshot().dec
 
     def get_position_ra_dec(self):
-        return self.get_ra(), self.get_dec()
+        snapshot = self._get_snapshot()
+        return snapshot.ra, snapshot.dec
 
     def get_position_alt_az(self):
-        return self.get_alt(), self.get_az()
+        snapshot = self._get_snapshot()
+        return snapshot.alt, snapshot.az
 
     def is_tracking(self):
-        return self.status["Tracking"]
+        return self._get_snapshot().tracking
 
     def is_slewing(self):
-        return self.status["Slewing"]
+        return self._get_snapshot().slewing
 
     def start_tracking(self):
         ret = self.tcs.set_track(True)
@@ -61,12 +85,16 @@ class SwopeTelescope(TelescopeBase, SwopeBase):
         return ret
 
     def set_offset(self, ha: float, dec: float):
-        self.slew_begin(self.get_ra() + ha, self.get_dec() + dec, 2000)
+        ra, current_dec = self.get_position_ra_dec()
+        self.slew_begin(ra + ha, current_dec + dec, 2000)
         self.tcs.set_offset(ha, dec)
+        self._wait_slew()
+
+    def _wait_slew(self):
         self.get_status(force=True)
         while self.is_slewing():
             time.sleep(0.01)
-        self.slew_complete(self.get_ra(), self.get_dec(), TelescopeStatus.OK)
+        self.slew_complete(*self.get_position_ra_dec(), TelescopeStatus.OK)
 
     def move_east(self, offset, rate=None):
         self.set_offset(offset, 0)
@@ -86,18 +114,18 @@ class SwopeTelescope(TelescopeBase, SwopeBase):
         time.sleep(2)  # wait for TCS to process
         self.tcs.set_slew()
         time.sleep(1)  # wait for slew to start
-        self.get_status(force=True)
-        while self.is_slewing():
-            time.sleep(0.01)
-        self.slew_complete(self.get_ra(), self.get_dec(), TelescopeStatus.OK)
+        self._wait_slew()
 
     def _get_site(self):
-        # FIXME: create the proxy directly and cache it
-        return self.get_proxy("/Site/0")
+        # created once, the site does not change while running
+        if self._site is None:
+            self._site = self.get_proxy(self["ephemeris"] or self["site"])
+        return self._site
 
     def slew_to_alt_az(self, alt: float, az: float):
         self._validate_alt_az(alt, az)
-        ra, dec = self._get_site().alt_az_to_ra_dec(alt, az)
+        with self._site_lock:
+            ra, dec = self._get_site().alt_az_to_ra_dec(alt, az)
         self.slew_to_ra_dec(ra, dec, epoch=2000)
         self.stop_tracking()
 
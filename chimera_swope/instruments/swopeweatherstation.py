@@ -1,10 +1,9 @@
-import json
 import math
-import urllib.error
-import urllib.request
+import os
 from datetime import UTC, datetime, timedelta
 from time import time
 
+import numpy as np
 from chimera.instruments.weatherstation import WeatherStationBase
 from chimera.interfaces.weatherstation import (
     WeatherHumidity,
@@ -15,6 +14,19 @@ from chimera.interfaces.weatherstation import (
     WeatherWind,
 )
 
+from chimera_swope.instruments.httpfetcher import SingleFlightFetcher
+from chimera_swope.instruments.timeseries import (
+    TimeSeriesArchive,
+    TimeSeriesBuffer,
+    trend_slope,
+)
+from chimera_swope.instruments.weathersnapshot import (
+    SeeingSnapshot,
+    WeatherSnapshot,
+    fahrenheit_to_celsius,
+    magnus_dew_point,
+)
+
 # N 	V 	field 	format
 # 1 	tm 	Datetime 	YYYY-MM-DD hh:mm:ss
 # 2 	sn* 	Wind speed lull 	Mph
@@ -28,6 +40,29 @@ from chimera.interfaces.weatherstation import (
 # 10 	ua* 	Relative humidity 	percentage
 # 11 	ri* 	Rain intensity 	mm/h
 
+WEATHER_FIELDS = (
+    "temperature",
+    "air_pressure",
+    "wind_speed_avg",
+    "wind_dir_avg",
+    "relative_humidity",
+    "rain_intensity",
+)
+SEEING_FIELDS = ("seeing", "counts", "azimuth", "elevation")
+
+
+def _parse_timestamp(ts):
+    """Convert an API ISO timestamp to unix time. Naive timestamps are UTC."""
+    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.timestamp()
+
+
+def _format_timestamp(ts):
+    """Convert unix time to a FITS formatted UTC date/time string."""
+    return datetime.fromtimestamp(ts, UTC).strftime("%Y-%m-%dT%H:%M:%S")
+
 
 class SwopeWeatherStation(
     WeatherStationBase,
@@ -44,36 +79,105 @@ class SwopeWeatherStation(
         "swope_weather_host": "http://env-api.lco.cl/metrics/weather?source=swope&start_ts=",
         "swope_seeing_host": "http://env-api.lco.cl/metrics/seeing?source=dimm&start_ts=",
         "update_interval": 60.0,  # seconds - how often to fetch fresh data
+        "weather_history_size": 10080,  # readings kept in memory
+        "seeing_history_size": 10080,  # readings kept in memory
+        "archive_dir": "~/.chimera/swope_weather",  # on-disk history, "" disables
+        "max_backfill_minutes": 24 * 60,  # longest gap requested after a restart
+        "http_timeout": 10.0,  # seconds
+        "http_backoff_initial": 5.0,  # seconds - first retry delay after a failure
+        "http_backoff_max": 300.0,  # seconds - maximum retry delay
     }
 
     def __init__(self):
         WeatherStationBase.__init__(self)
         self._status = None
-        self._last_update = None
         self._seeing_status = None
-        self._seeing_last_update = None
-        # Set control loop frequency to update every 5 minutes
-        # Hz = 1/300 seconds = 0.00333... Hz
-        self.set_hz(1.0 / 300.0)
+        self._weather_history = None
+        self._seeing_history = None
+        self._weather_fetcher = None
+        self._seeing_fetcher = None
+        self._weather_result = None
+        self._seeing_result = None
+        self._weather_snapshot = WeatherSnapshot()
+        self._seeing_snapshot = SeeingSnapshot()
+
+    def __start__(self):
+        # The configuration is only applied after __init__, so everything that
+        # depends on it is built here.
+        # Warm start: reload the most recent readings from the local archive
+        weather_archive = seeing_archive = None
+        if self["archive_dir"]:
+            archive_dir = os.path.expanduser(self["archive_dir"])
+            weather_archive = TimeSeriesArchive(
+                os.path.join(archive_dir, "weather.dat"), WEATHER_FIELDS
+            )
+            seeing_archive = TimeSeriesArchive(
+                os.path.join(archive_dir, "seeing.dat"), SEEING_FIELDS
+            )
+        self._weather_history = TimeSeriesBuffer(
+            WEATHER_FIELDS, self["weather_history_size"], archive=weather_archive
+        )
+        self._seeing_history = TimeSeriesBuffer(
+            SEEING_FIELDS, self["seeing_history_size"], archive=seeing_archive
+        )
+        self._weather_fetcher = SingleFlightFetcher(
+            lambda: self._build_url("swope_weather_host", 5, self._weather_history),
+            lambda data: self._ingest_data(
+                data,
+                "weather",
+                "_status",
+                self._weather_history,
+                "_weather_snapshot",
+                WeatherSnapshot,
+                self._validate_weather_data,
+            ),
+            timeout=self["http_timeout"],
+            backoff_initial=self["http_backoff_initial"],
+            backoff_max=self["http_backoff_max"],
+        )
+        self._seeing_fetcher = SingleFlightFetcher(
+            lambda: self._build_url(
+                "swope_seeing_host", 24 * 60, self._seeing_history
+            ),  # 24 hours
+            lambda data: self._ingest_data(
+                data,
+                "seeing",
+                "_seeing_status",
+                self._seeing_history,
+                "_seeing_snapshot",
+                SeeingSnapshot,
+                self._validate_seeing_data,
+            ),
+            timeout=self["http_timeout"],
+            backoff_initial=self["http_backoff_initial"],
+            backoff_max=self["http_backoff_max"],
+        )
+        self._weather_snapshot = WeatherSnapshot.from_reading(
+            self._weather_history.latest()
+        )
+        self._seeing_snapshot = SeeingSnapshot.from_reading(
+            self._seeing_history.latest()
+        )
+        # The control loop keeps the snapshots up to date, so getters never
+        # wait on HTTP. Run it every update_interval seconds.
+        self.set_hz(1.0 / self["update_interval"])
 
     def control(self) -> bool:
         """
         Control loop that periodically updates weather and seeing data.
         This method is called automatically by the chimera framework at the frequency
-        set by set_hz() (every 5 minutes = 300 seconds).
+        set by set_hz() (every update_interval seconds).
 
         @return: True to continue the control loop, False to stop it
         """
         try:
             # Force update of weather data
             self.log.debug("Control loop: fetching weather data")
-            self._last_update = None  # Force fresh fetch
-            self.get_status()
+            self.get_status(force=True)
 
             # Force update of seeing data
             self.log.debug("Control loop: fetching seeing data")
-            self._seeing_last_update = None  # Force fresh fetch
-            self.get_seeing_status()
+            self.get_seeing_status(force=True)
 
         except Exception as e:
             self.log.error(f"Error in control loop: {e}")
@@ -81,35 +185,31 @@ class SwopeWeatherStation(
         # Return True to keep the control loop running
         return True
 
-    def _get_latest_reading(self):
-        """Get the most recent weather reading from the cached status"""
-        status = self.get_status()
-        if not status or "results" not in status or not status["results"]:
-            return None
-        # Return the most recent reading (last in the list)
-        return status["results"][-1]
+    def _get_weather_snapshot(self) -> WeatherSnapshot:
+        """
+        Get the snapshot of the most recent weather reading. It is rebuilt on
+        every fetch by the control loop; only fetch here if there is none yet.
+        """
+        if self._weather_snapshot.timestamp is None:
+            self.get_status()
+        return self._weather_snapshot
 
     def get_last_measurement_time(self) -> str:
         """
         Returns the timestamp of the last measurement taken by the weather station.
         @return: The UTC time of the last measurement as a string in FITS format.
         """
-        reading = self._get_latest_reading()
-        if not reading or "ts" not in reading:
+        timestamp = self._get_weather_snapshot().timestamp
+        if timestamp is None:
             raise RuntimeError("No valid weather measurement timestamp available")
-        return reading["ts"]
+        return _format_timestamp(timestamp)
 
     def temperature(self) -> float:
         """
         Returns the temperature in Celsius.
         @return: the temperature.
         """
-        reading = self._get_latest_reading()
-        if reading and "temperature" in reading:
-            # Convert from Fahrenheit to Celsius: (F - 32) * 5/9
-            fahrenheit = reading["temperature"]
-            return (fahrenheit - 32) * 5.0 / 9.0
-        return 0.0
+        return self._get_weather_snapshot().temperature
 
     def dew_point(self) -> float:
         """
@@ -117,72 +217,42 @@ class SwopeWeatherStation(
         Note: This is calculated from temperature and humidity since it's not directly provided.
         @return: the dew point temperature.
         """
-        reading = self._get_latest_reading()
-        if reading and "temperature" in reading and "relative_humidity" in reading:
-            # Convert temp to Celsius first
-            temp_c = self.temperature()
-            humidity = reading["relative_humidity"]
-
-            # Magnus formula approximation for dew point
-            a, b = 17.27, 237.7
-            alpha = ((a * temp_c) / (b + temp_c)) + math.log(humidity / 100.0)
-            dew_point = (b * alpha) / (a - alpha)
-            return dew_point
-        return 0.0
+        return self._get_weather_snapshot().dew_point
 
     def humidity(self) -> float:
         """
         Returns the relative humidity in percentage.
         @return: the humidity.
         """
-        reading = self._get_latest_reading()
-        if reading and "relative_humidity" in reading:
-            return reading["relative_humidity"]
-        return 0.0
+        return self._get_weather_snapshot().humidity
 
     def pressure(self) -> float:
         """
         Returns the atmospheric pressure in Pascals.
         @return: the pressure.
         """
-        reading = self._get_latest_reading()
-        if reading and "air_pressure" in reading:
-            # Convert from inHg to Pascals: 1 inHg = 3386.389 Pa
-            inhg = reading["air_pressure"]
-            return inhg * 3386.389
-        return 0.0
+        return self._get_weather_snapshot().pressure
 
     def wind_speed(self) -> float:
         """
         Returns the wind speed in meters per second.
         @return: the wind speed.
         """
-        reading = self._get_latest_reading()
-        if reading and "wind_speed_avg" in reading:
-            # Convert from mph to m/s: 1 mph = 0.44704 m/s
-            mph = reading["wind_speed_avg"]
-            return mph * 0.44704
-        return 0.0
+        return self._get_weather_snapshot().wind_speed
 
     def wind_direction(self) -> float:
         """
         Returns the wind direction in Degrees.
         @return: the wind direction.
         """
-        reading = self._get_latest_reading()
-        if reading and "wind_dir_avg" in reading:
-            return reading["wind_dir_avg"]
-        return 0.0
+        return self._get_weather_snapshot().wind_direction
 
     def rain_rate(self) -> float:
         """
         Returns the precipitation rate in mm/hour.
         @return: the precipitation rate.
         """
-        reading = self._get_latest_reading()
-        if reading and "rain_intensity" in reading:
-            return reading["rain_intensity"]
-        return 0.0
+        return self._get_weather_snapshot().rain_rate
 
     def is_raining(self) -> bool:
         """
@@ -190,23 +260,21 @@ class SwopeWeatherStation(
         """
         return self.rain_rate() > 0.0
 
-    def _get_latest_seeing_reading(self):
-        """Get the most recent seeing reading from the cached seeing status"""
-        status = self.get_seeing_status()
-        if not status or "results" not in status or not status["results"]:
-            return None
-        # Return the most recent reading (last in the list)
-        return status["results"][-1]
+    def _get_seeing_snapshot(self) -> SeeingSnapshot:
+        """
+        Get the snapshot of the most recent seeing reading. It is rebuilt on
+        every fetch by the control loop; only fetch here if there is none yet.
+        """
+        if self._seeing_snapshot.timestamp is None:
+            self.get_seeing_status()
+        return self._seeing_snapshot
 
     def seeing(self) -> float:
         """
         Returns the current seeing measurement in arcseconds.
         @return: the seeing value.
         """
-        reading = self._get_latest_seeing_reading()
-        if reading and "seeing" in reading:
-            return reading["seeing"]
-        return 0.0
+        return self._get_seeing_snapshot().seeing
 
     def seeing_at_zenith(self) -> float:
         """
@@ -214,31 +282,14 @@ class SwopeWeatherStation(
         Uses the formula: seeing_zenith = seeing * (airmass)^(-3/5)
         @return: the seeing at zenith value.
         """
-        reading = self._get_latest_seeing_reading()
-        if reading and "seeing" in reading and "elevation" in reading:
-            seeing_measured = reading["seeing"]
-            elevation = reading["elevation"]
-
-            # Calculate airmass from elevation using simple sec(z) approximation
-            # where z is the zenith angle (90 - elevation)
-            if elevation > 0:
-                zenith_angle_rad = math.radians(90.0 - elevation)
-                airmass = 1.0 / math.cos(zenith_angle_rad)
-
-                # Correct seeing to zenith using the -3/5 power law
-                seeing_zenith = seeing_measured * (airmass ** (-3.0 / 5.0))
-                return seeing_zenith
-        return 0.0
+        return self._get_seeing_snapshot().seeing_at_zenith
 
     def flux(self) -> float:
         """
         Returns the flux of the source being used for measuring seeing in counts.
         @return: the flux value.
         """
-        reading = self._get_latest_seeing_reading()
-        if reading and "counts" in reading:
-            return reading["counts"]
-        return 0.0
+        return self._get_seeing_snapshot().flux
 
     def airmass(self) -> float:
         """
@@ -246,16 +297,93 @@ class SwopeWeatherStation(
         Calculated from elevation using sec(z) approximation.
         @return: the airmass value.
         """
-        reading = self._get_latest_seeing_reading()
-        if reading and "elevation" in reading:
-            elevation = reading["elevation"]
-            if elevation > 0:
-                # Calculate airmass from elevation using simple sec(z) approximation
-                # where z is the zenith angle (90 - elevation)
-                zenith_angle_rad = math.radians(90.0 - elevation)
-                airmass = 1.0 / math.cos(zenith_angle_rad)
-                return airmass
-        return 0.0
+        return self._get_seeing_snapshot().airmass
+
+    def _weather_window(self, fields, minutes):
+        """Refresh weather data and return the readings of the last minutes."""
+        self.get_status()
+        return self._weather_history.get(fields, since=time() - minutes * 60.0)
+
+    def _seeing_window(self, fields, minutes):
+        """Refresh seeing data and return the readings of the last minutes."""
+        self.get_seeing_status()
+        return self._seeing_history.get(fields, since=time() - minutes * 60.0)
+
+    def wind_speed_mean(self, minutes: float = 10.0) -> float | None:
+        """
+        Returns the mean wind speed over the last minutes in meters per second.
+        @param minutes: Time window in minutes.
+        @return: the mean wind speed or None if there is no data in the window.
+        """
+        _, columns = self._weather_window(["wind_speed_avg"], minutes)
+        mph = columns["wind_speed_avg"]
+        if not np.isfinite(mph).any():
+            return None
+        return float(np.nanmean(mph)) * 0.44704
+
+    def wind_speed_max(self, minutes: float = 10.0) -> float | None:
+        """
+        Returns the maximum wind speed over the last minutes in meters per second.
+        @param minutes: Time window in minutes.
+        @return: the maximum wind speed or None if there is no data in the window.
+        """
+        _, columns = self._weather_window(["wind_speed_avg"], minutes)
+        mph = columns["wind_speed_avg"]
+        if not np.isfinite(mph).any():
+            return None
+        return float(np.nanmax(mph)) * 0.44704
+
+    def seeing_percentile(
+        self, percentile: float = 50.0, minutes: float = 60.0
+    ) -> float | None:
+        """
+        Returns a percentile of the seeing over the last minutes in arcseconds.
+        @param percentile: Percentile to compute, between 0 and 100.
+        @param minutes: Time window in minutes.
+        @return: the seeing percentile or None if there is no data in the window.
+        """
+        _, columns = self._seeing_window(["seeing"], minutes)
+        seeing = columns["seeing"]
+        if not np.isfinite(seeing).any():
+            return None
+        return float(np.nanpercentile(seeing, percentile))
+
+    def humidity_trend(self, minutes: float = 30.0) -> float | None:
+        """
+        Returns the relative humidity trend over the last minutes.
+        @param minutes: Time window in minutes.
+        @return: the humidity slope in percentage per hour or None if there is
+                 not enough data in the window.
+        """
+        ts, columns = self._weather_window(["relative_humidity"], minutes)
+        slope = trend_slope(ts, columns["relative_humidity"])
+        if np.isnan(slope):
+            return None
+        return slope * 3600.0
+
+    def time_to_dew_point(self, minutes: float = 30.0) -> float | None:
+        """
+        Returns the time until the temperature reaches the dew point,
+        extrapolating the dew point depression trend over the last minutes.
+        @param minutes: Time window used for the trend in minutes.
+        @return: the time in seconds (0 if already at the dew point, infinity
+                 if the depression is not decreasing) or None if there is not
+                 enough data in the window.
+        """
+        ts, columns = self._weather_window(
+            ["temperature", "relative_humidity"], minutes
+        )
+        temp_c = fahrenheit_to_celsius(columns["temperature"])
+        depression = temp_c - magnus_dew_point(temp_c, columns["relative_humidity"])
+        slope = trend_slope(ts, depression)
+        if np.isnan(slope):
+            return None
+        current = depression[np.isfinite(depression)][-1]
+        if current <= 0:
+            return 0.0
+        if slope >= 0:
+            return math.inf
+        return float(current / -slope)
 
     def _validate_data(self, data, data_type, required_fields):
         """
@@ -304,77 +432,92 @@ class SwopeWeatherStation(
         self.log.debug(f"{data_type.capitalize()} data validation passed")
         return True
 
-    def _fetch_data(
+    def _build_url(self, url_config_key, time_window_minutes, history):
+        """
+        Build the API URL requesting only data newer than the last buffered
+        reading, or the last time_window_minutes if the buffer is empty. After
+        a long downtime, at most max_backfill_minutes are requested.
+        """
+        if history.last_timestamp is not None:
+            start_time = max(
+                datetime.fromtimestamp(history.last_timestamp, UTC),
+                datetime.now(UTC) - timedelta(minutes=self["max_backfill_minutes"]),
+            )
+        else:
+            start_time = datetime.now(UTC) - timedelta(minutes=time_window_minutes)
+        start_ts = start_time.strftime("%Y-%m-%dT%H:%M:%S")
+        return f"{self[url_config_key]}{start_ts}"
+
+    def _ingest_data(
         self,
-        url_config_key,
-        time_window_minutes,
+        data,
         data_type,
         status_attr,
-        last_update_attr,
+        history,
+        snapshot_attr,
+        snapshot_class,
         validator_func,
     ):
         """
-        Generic method to fetch and cache data from FastAPI endpoint.
+        Validate data fetched from the FastAPI endpoint, append it to the
+        history buffer and rebuild the snapshot of the latest reading. Raises
+        ValueError if the data is invalid, so the fetcher keeps serving the
+        previous data.
 
-        @param url_config_key: Configuration key for the API URL
-        @param time_window_minutes: How many minutes of historical data to request
+        @param data: The decoded JSON data
         @param data_type: Type of data ('weather' or 'seeing') for logging
         @param status_attr: Name of the status attribute (e.g., '_status')
-        @param last_update_attr: Name of the last update attribute (e.g., '_last_update')
+        @param history: TimeSeriesBuffer to append the readings to
+        @param snapshot_attr: Name of the snapshot attribute (e.g., '_weather_snapshot')
+        @param snapshot_class: WeatherSnapshot or SeeingSnapshot
         @param validator_func: Validation function to use
-        @return: Cached or newly fetched data
+        @return: Last non-empty data received from the endpoint
         """
-        current_time = time()
-
-        # Get current cached values
-        cached_status = getattr(self, status_attr)
-        last_update = getattr(self, last_update_attr)
-
-        # Return cached data if it's still fresh
         if (
-            cached_status is not None
-            and last_update is not None
-            and (current_time - last_update) < self["update_interval"]
+            history.last_timestamp is not None
+            and isinstance(data, dict)
+            and data.get("results") == []
         ):
-            return cached_status
+            # Nothing new since the last buffered reading
+            self.log.debug(f"No new {data_type} data")
+            return getattr(self, status_attr)
 
-        # Fetch fresh data from API
-        try:
-            # Create start time for the requested time window
-            start_time = datetime.now(UTC) - timedelta(minutes=time_window_minutes)
-            start_ts = start_time.strftime("%Y-%m-%dT%H:%M:%S")
-
-            # Build URL with time parameter
-            url = f"{self[url_config_key]}{start_ts}"
-
-            # Make HTTP request
-            with urllib.request.urlopen(url, timeout=10) as response:
-                data = response.read()
-                fetched_data = json.loads(data.decode("utf-8"))
-
-            # Validate the new data before updating status
-            if validator_func(fetched_data):
-                # Update status and timestamp only if validation passes
-                setattr(self, status_attr, fetched_data)
-                setattr(self, last_update_attr, current_time)
-                self.log.debug(
-                    f"Successfully fetched and validated {data_type} data from {url}"
-                )
-            else:
-                self.log.warning(
-                    f"Received invalid {data_type} data from {url}, keeping previous data"
-                )
+        if not validator_func(data):
+            raise ValueError(f"Received invalid {data_type} data")
 
-        except urllib.error.URLError as e:
-            self.log.error(f"Failed to fetch {data_type} data from {url}: {e}")
-        except json.JSONDecodeError as e:
-            self.log.error(f"Failed to parse {data_type} data JSON: {e}")
-        except Exception as e:
-            self.log.error(f"Unexpected error fetching {data_type} data: {e}")
+        results = data["results"]
+        n_new = history.append(
+            [_parse_timestamp(r["ts"]) for r in results],
+            {f: [r.get(f, math.nan) for r in results] for f in history.fields},
+        )
+        setattr(self, status_attr, data)
+        setattr(self, snapshot_attr, snapshot_class.from_reading(history.latest()))
+        self.log.debug(
+            f"Successfully fetched and validated {data_type} data, {n_new} new readings"
+        )
+        return data
+
+    def _fetch_data(self, fetcher, data_type, result_attr, force=False):
+        """
+        Fetch data through the single-flight fetcher. Only one thread requests
+        a given endpoint at a time; the others get the cached data. While the
+        endpoint is failing, the previous data is served and flagged as stale.
 
-        # Return current status (either updated with new valid data, or previous data)
-        cached_status = getattr(self, status_attr)
-        return cached_status if cached_status is not None else {}
+        @param fetcher: SingleFlightFetcher of the endpoint
+        @param data_type: Type of data ('weather' or 'seeing') for logging
+        @param result_attr: Name of the attribute keeping the last FetchResult
+        @param force: Ignore the update interval and fetch new data
+        @return: Last non-empty data received from the endpoint
+        """
+        result = fetcher.fetch(max_age=0.0 if force else self["update_interval"])
+        previous = getattr(self, result_attr)
+        setattr(self, result_attr, result)
+        # log each new failure once, not every call served from cache
+        if result.error is not None and (
+            previous is None or previous.error != result.error
+        ):
+            self.log.error(f"Failed to fetch {data_type} data: {result.error}")
+        return result.data if result.data is not None else {}
 
     def _validate_weather_data(self, data):
         """Validate weather data structure and required fields."""
@@ -389,19 +532,14 @@ class SwopeWeatherStation(
         ]
         return self._validate_data(data, "weather", required_fields)
 
-    def get_status(self):
+    def get_status(self, force=False):
         """
-        Fetch the most recent weather data from FastAPI endpoint and cache it.
+        Fetch new weather data from FastAPI endpoint into the history buffer.
         Only updates status if the new data passes validation checks.
         Returns cached data if it's within the update interval.
         """
         return self._fetch_data(
-            url_config_key="swope_weather_host",
-            time_window_minutes=5,
-            data_type="weather",
-            status_attr="_status",
-            last_update_attr="_last_update",
-            validator_func=self._validate_weather_data,
+            self._weather_fetcher, "weather", "_weather_result", force=force
         )
 
     def _validate_seeing_data(self, data):
@@ -409,21 +547,31 @@ class SwopeWeatherStation(
         required_fields = ["ts", "seeing", "counts", "azimuth", "elevation"]
         return self._validate_data(data, "seeing", required_fields)
 
-    def get_seeing_status(self):
+    def get_seeing_status(self, force=False):
         """
-        Fetch the most recent seeing data from FastAPI endpoint and cache it.
+        Fetch new seeing data from FastAPI endpoint into the history buffer.
         Only updates status if the new data passes validation checks.
         Returns cached data if it's within the update interval.
         """
         return self._fetch_data(
-            url_config_key="swope_seeing_host",
-            time_window_minutes=24 * 60,  # 24 hours
-            data_type="seeing",
-            status_attr="_seeing_status",
-            last_update_attr="_seeing_last_update",
-            validator_func=self._validate_seeing_data,
+            self._seeing_fetcher, "seeing", "_seeing_result", force=force
         )
 
+    def get_data_age(self) -> dict:
+        """
+        Returns how old the weather and seeing data served are.
+        @return: dict with the seconds since the last successful fetch
+                 (weather_age, seeing_age; None if never fetched) and whether
+                 the data is being served stale because the endpoint is failing
+                 (weather_stale, seeing_stale).
+        """
+        age = {}
+        for data_type in ("weather", "seeing"):
+            result = getattr(self, f"_{data_type}_result")
+            age[f"{data_type}_age"] = result.age if result else None
+            age[f"{data_type}_stale"] = result.stale if result else True
+        return age
+
     def get_metadata(self, request):
         """
         Get metadata including weather station data and seeing measurement timestamp.
@@ -432,14 +580,18 @@ class SwopeWeatherStation(
         # Get base metadata from WeatherStationBase
         md = WeatherStationBase.get_metadata(self, request)
 
+        # Flag data not refreshed since startup (archive) or failing to refresh
+        if self._weather_result is None or self._weather_result.stale:
+            md += [("WXSTALE", True, "Weather data is stale, not refreshed")]
+
         # Add seeing measurement timestamp if seeing data is available
         if self.features("WeatherSeeing"):
-            reading = self._get_latest_seeing_reading()
-            if reading and "ts" in reading:
+            timestamp = self._get_seeing_snapshot().timestamp
+            if timestamp is not None:
                 md += [
                     (
                         "SEEDATE",
-                        reading["ts"],
+                        _format_timestamp(timestamp),
                         "Seeing measurement date/time",
                     )
                 ]
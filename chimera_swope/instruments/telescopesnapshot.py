@@ -0,0 +1,36 @@
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class TelescopeSnapshot:
+    """
+    Telescope position and state taken from a single TCS status read, so all
+    the values refer to the same instant.
+    """
+
+    timestamp: float  # unix time of the status read
+    ra: float  # hours, ICRS
+    dec: float  # degrees, ICRS
+    alt: float  # degrees
+    az: float  # degrees
+    tracking: bool
+    slewing: bool
+
+    @classmethod
+    def from_status(cls, status, timestamp):
+        """
+        @param status: TCS status dict
+        @param timestamp: Unix time the status was read
+        """
+        return cls(
+            timestamp=timestamp,
+            ra=status["RA_ICRS"] / 15.0,
+            dec=status["Dec_ICRS"],
+            alt=status["Alt"],
+            az=status["Azi"],
+            tracking=bool(status["Tracking"]),
+            slewing=bool(status["Slewing"]),
+        )
+
+    def as_dict(self):
+        return asdict(self)
@@ -0,0 +1,219 @@
+import os
+import threading
+
+import numpy as np
+
+
+class TimeSeriesBuffer:
+    """
+    Bounded columnar ring buffer of time stamped readings.
+
+    Timestamps (unix time) and every field are kept on preallocated float64
+    NumPy arrays. Once the buffer is full the oldest readings are overwritten.
+    Readings must be appended in chronological order; readings not newer than
+    the last stored one are dropped, so overlapping fetches can be appended
+    as they come.
+
+    If an archive is given, the buffer is filled with its most recent readings
+    on creation and every new reading is also appended to it.
+    """
+
+    def __init__(self, fields, capacity, archive=None):
+        """
+        @param fields: Names of the fields stored for each reading
+        @param capacity: Maximum number of readings kept
+        @param archive: Optional TimeSeriesArchive with the same fields
+        """
+        self.fields = tuple(fields)
+        self.capacity = int(capacity)
+        self._ts = np.full(self.capacity, np.nan)
+        self._columns = {f: np.full(self.capacity, np.nan) for f in self.fields}
+        self._head = 0  # next write position
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.archive = None
+        if archive is not None:
+            records = archive.tail(self.capacity)
+            self.append(records["ts"], {f: records[f] for f in self.fields})
+            self.archive = archive
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_timestamp(self):
+        """Timestamp of the most recent reading or None if empty."""
+        if self._size == 0:
+            return None
+        return float(self._ts[(self._head - 1) % self.capacity])
+
+    def append(self, timestamps, columns):
+        """
+        Append readings to the buffer.
+
+        @param timestamps: Sequence of unix timestamps, in increasing order
+        @param columns: Dict of field name to sequence of values. Missing fields
+                        are stored as NaN.
+        @return: Number of readings appended
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        with self._lock:
+            last = self.last_timestamp
+            new = np.ones(len(timestamps), dtype=bool)
+            if last is not None:
+                new = timestamps > last
+            n = int(np.count_nonzero(new))
+            if n == 0:
+                return 0
+
+            if self.archive is not None:
+                self.archive.append(timestamps, columns)
+
+            # keep only the readings that fit in the buffer
+            skip = max(0, n - self.capacity)
+            idx = (self._head + np.arange(n - skip)) % self.capacity
+            self._ts[idx] = timestamps[new][skip:]
+            for field in self.fields:
+                if field in columns:
+                    values = np.asarray(columns[field], dtype=float)[new][skip:]
+                else:
+                    values = np.nan
+                self._columns[field][idx] = values
+
+            self._head = (self._head + n - skip) % self.capacity
+            self._size = min(self._size + n, self.capacity)
+            return n
+
+    def _indices(self):
+        # chronological order of the stored readings
+        return (self._head - self._size + np.arange(self._size)) % self.capacity
+
+    def latest(self):
+        """
+        @return: Dict with "ts" and all fields of the most recent reading or None.
+        """
+        with self._lock:
+            if self._size == 0:
+                return None
+            i = (self._head - 1) % self.capacity
+            reading = {f: float(self._columns[f][i]) for f in self.fields}
+            reading["ts"] = float(self._ts[i])
+            return reading
+
+    def get(self, fields=None, since=None):
+        """
+        Returns the stored readings in chronological order.
+
+        @param fields: Field names to return. None returns all fields.
+        @param since: Only return readings newer than this unix timestamp.
+        @return: (timestamps, dict of field name to values) as NumPy arrays.
+        """
+        fields = self.fields if fields is None else fields
+        with self._lock:
+            idx = self._indices()
+            ts = self._ts[idx]
+            if since is not None:
+                start = np.searchsorted(ts, since, side="right")
+                idx, ts = idx[start:], ts[start:]
+            return ts, {f: self._columns[f][idx] for f in fields}
+
+
+class TimeSeriesArchive:
+    """
+    Append-only on-disk archive of time stamped readings.
+
+    Readings are stored as fixed-size records of little-endian float64 values,
+    the unix timestamp followed by the fields in order, so the file can be
+    memory-mapped for offline analysis:
+
+        np.memmap(filename, dtype=archive.dtype, mode="r")
+    """
+
+    def __init__(self, filename, fields):
+        """
+        @param filename: Path of the archive file, created if needed
+        @param fields: Names of the fields stored for each reading
+        """
+        self.filename = os.path.expanduser(filename)
+        self.fields = tuple(fields)
+        self.dtype = np.dtype([("ts", "<f8")] + [(f, "<f8") for f in self.fields])
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # drop a partially written trailing record
+        n_records = self._n_records()
+        if os.path.exists(self.filename):
+            os.truncate(self.filename, n_records * self.dtype.itemsize)
+        tail = self.tail(1)
+        self._last_timestamp = float(tail["ts"][0]) if len(tail) else None
+
+    def _n_records(self):
+        if not os.path.exists(self.filename):
+            return 0
+        return os.path.getsize(self.filename) // self.dtype.itemsize
+
+    def read(self):
+        """
+        @return: All archived readings as a read-only memory-mapped structured
+                 array.
+        """
+        n_records = self._n_records()
+        if n_records == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.filename, dtype=self.dtype, mode="r", shape=(n_records,))
+
+    def tail(self, n):
+        """
+        @return: A copy of the last n archived readings.
+        """
+        return np.array(self.read()[-n:])
+
+    def append(self, timestamps, columns):
+        """
+        Append readings to the archive, dropping the ones not newer than the
+        last archived reading.
+
+        @param timestamps: Sequence of unix timestamps, in increasing order
+        @param columns: Dict of field name to sequence of values. Missing fields
+                        are stored as NaN.
+        @return: Number of readings appended
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        with self._lock:
+            new = np.ones(len(timestamps), dtype=bool)
+            if self._last_timestamp is not None:
+                new = timestamps > self._last_timestamp
+            records = np.full(int(np.count_nonzero(new)), np.nan, dtype=self.dtype)
+            if len(records) == 0:
+                return 0
+            records["ts"] = timestamps[new]
+            for field in self.fields:
+                if field in columns:
+                    records[field] = np.asarray(columns[field], dtype=float)[new]
+            with open(self.filename, "ab") as f:
+                f.write(records.tobytes())
+            self._last_timestamp = float(records["ts"][-1])
+            return len(records)
+
+
+def trend_slope(timestamps, values):
+    """
+    Least squares slope of values against time, ignoring NaNs.
+
+    @param timestamps: Unix timestamps
+    @param values: Values at each timestamp
+    @return: The slope in value units per second or NaN if there are fewer
+             than two valid points.
+    """
+    mask = np.isfinite(values)
+    if np.count_nonzero(mask) < 2:
+        return np.nan
+    t = timestamps[mask] - timestamps[mask].mean()
+    v = values[mask]
+    denominator = np.dot(t, t)
+    if denominator == 0:
+        return np.nan
+    return float(np.dot(t, v - v.mean()) / denominator)
@@ -49,3 +49,71 @@ def concatenate_quad_arrays(
     outimage = np.rot90(outimage)
 
     return outimage
+
+
+def normalize_angle(angle):
+    """
+    Normalize an angle in degrees to the [0, 360) interval.
+    """
+    return angle % 360.0
+
+
+def rotator_path(current, target, min_angle, max_angle):
+    """
+    Choose the mechanical rotator angle equivalent to target (modulo 360) that
+    is closest to the current mechanical angle and within the cable-wrap limits.
+
+    @param current: Current mechanical angle in degrees
+    @param target: Desired angle in degrees
+    @param min_angle: Lower mechanical limit in degrees
+    @param max_angle: Upper mechanical limit in degrees
+    @return: The mechanical angle to move to
+    """
+    target = normalize_angle(target)
+    k_min = int(np.ceil((min_angle - target) / 360.0))
+    k_max = int(np.floor((max_angle - target) / 360.0))
+    if k_min > k_max:
+        raise ValueError(
+            f"Angle {target} not reachable within limits [{min_angle}, {max_angle}]"
+        )
+    candidates = target + 360.0 * np.arange(k_min, k_max + 1)
+    return float(candidates[np.argmin(np.abs(candidates - current))])
+
+
+def rotator_move_time(distance, speed, acceleration, settle_time=0.0):
+    """
+    Predicted duration of a rotator move using a trapezoidal velocity profile.
+
+    @param distance: Move distance in degrees
+    @param speed: Maximum speed in degrees/second
+    @param acceleration: Acceleration in degrees/second^2
+    @param settle_time: Time to settle after the move in seconds
+    @return: The move duration in seconds
+    """
+    distance = abs(distance)
+    if distance == 0:
+        return 0.0
+    if distance <= speed**2 / acceleration:
+        # never reaches full speed
+        return 2.0 * float(np.sqrt(distance / acceleration)) + settle_time
+    return distance / speed + speed / acceleration + settle_time
+
+
+def merge_cards(headers, cards):
+    """
+    Append metadata cards to an image request header list, skipping the
+    keywords it already has.
+
+    @param headers: List of (keyword, value, comment) tuples, changed in place
+    @param cards: Cards to add
+    @return: Number of cards added
+    """
+    present = {card[0] for card in headers}
+    added = 0
+    for card in cards:
+        if card[0] in present and card[0] not in ("COMMENT", "HISTORY"):
+            continue
+        headers.append(tuple(card))
+        present.add(card[0])
+        added += 1
+    return added
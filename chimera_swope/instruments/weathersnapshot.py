@@ -0,0 +1,124 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+MPH_TO_MS = 0.44704  # 1 mph = 0.44704 m/s
+INHG_TO_PA = 3386.389  # 1 inHg = 3386.389 Pa
+
+
+def fahrenheit_to_celsius(fahrenheit):
+    return (fahrenheit - 32) * 5.0 / 9.0
+
+
+def magnus_dew_point(temp_c, humidity):
+    """
+    Magnus formula approximation for dew point in Celsius.
+    Works on scalars and NumPy arrays.
+    """
+    a, b = 17.27, 237.7
+    alpha = ((a * temp_c) / (b + temp_c)) + np.log(humidity / 100.0)
+    return (b * alpha) / (a - alpha)
+
+
+def elevation_to_airmass(elevation):
+    """
+    Airmass from elevation in degrees using the sec(z) approximation,
+    where z is the zenith angle (90 - elevation).
+    """
+    return 1.0 / math.cos(math.radians(90.0 - elevation))
+
+
+def _value(reading, field):
+    # missing readings are NaN on the history buffer
+    value = reading.get(field, math.nan)
+    return None if math.isnan(value) else value
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherSnapshot:
+    """
+    Latest weather reading with all values already converted to the units
+    served by the weather station interface. Missing values are 0.0.
+    """
+
+    timestamp: float | None = None  # unix time
+    temperature: float = 0.0  # Celsius
+    dew_point: float = 0.0  # Celsius
+    humidity: float = 0.0  # percentage
+    pressure: float = 0.0  # Pascal
+    wind_speed: float = 0.0  # m/s
+    wind_direction: float = 0.0  # degrees
+    rain_rate: float = 0.0  # mm/h
+
+    @classmethod
+    def from_reading(cls, reading):
+        """
+        @param reading: Dict with "ts" and the raw API fields, as returned by
+                        TimeSeriesBuffer.latest()
+        """
+        if reading is None:
+            return cls()
+        fahrenheit = _value(reading, "temperature")
+        humidity = _value(reading, "relative_humidity")
+        inhg = _value(reading, "air_pressure")
+        mph = _value(reading, "wind_speed_avg")
+
+        temperature = (
+            fahrenheit_to_celsius(fahrenheit) if fahrenheit is not None else 0.0
+        )
+        dew_point = 0.0
+        if fahrenheit is not None and humidity is not None:
+            dew_point = float(magnus_dew_point(temperature, humidity))
+
+        return cls(
+            timestamp=reading["ts"],
+            temperature=temperature,
+            dew_point=dew_point,
+            humidity=humidity or 0.0,
+            pressure=inhg * INHG_TO_PA if inhg is not None else 0.0,
+            wind_speed=mph * MPH_TO_MS if mph is not None else 0.0,
+            wind_direction=_value(reading, "wind_dir_avg") or 0.0,
+            rain_rate=_value(reading, "rain_intensity") or 0.0,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class SeeingSnapshot:
+    """
+    Latest DIMM seeing reading with airmass and zenith seeing precomputed.
+    Missing values are 0.0.
+    """
+
+    timestamp: float | None = None  # unix time
+    seeing: float = 0.0  # arcseconds
+    seeing_at_zenith: float = 0.0  # arcseconds
+    flux: float = 0.0  # counts
+    airmass: float = 0.0
+
+    @classmethod
+    def from_reading(cls, reading):
+        """
+        @param reading: Dict with "ts" and the raw API fields, as returned by
+                        TimeSeriesBuffer.latest()
+        """
+        if reading is None:
+            return cls()
+        seeing = _value(reading, "seeing")
+        elevation = _value(reading, "elevation")
+
+        airmass = 0.0
+        seeing_at_zenith = 0.0
+        if elevation is not None and elevation > 0:
+            airmass = elevation_to_airmass(elevation)
+            if seeing is not None:
+                # Correct seeing to zenith using the -3/5 power law
+                seeing_at_zenith = seeing * (airmass ** (-3.0 / 5.0))
+
+        return cls(
+            timestamp=reading["ts"],
+            seeing=seeing or 0.0,
+            seeing_at_zenith=seeing_at_zenith,
+            flux=_value(reading, "counts") or 0.0,
+            airmass=airmass,
+        )
@@ -0,0 +1,192 @@
+import numpy as np
+from astropy import units
+from astropy.coordinates import Angle, Longitude
+from astropy.time import Time
+from scipy.spatial import cKDTree
+
+
+def unit_vectors(ra, dec):
+    """
+    @param ra: Right ascension in degrees
+    @param dec: Declination in degrees
+    @return: Array of shape (..., 3) with the cartesian unit vectors
+    """
+    ra, dec = np.radians(ra), np.radians(dec)
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def great_circle_distance(lon1, lat1, lon2, lat2):
+    """
+    Angular distance between points on the sphere (haversine formula).
+    Broadcasts like NumPy; works for (ra, dec) and (az, alt) pairs.
+
+    @return: Distance in degrees
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0, 1))))
+
+
+def chord_to_angle(chord):
+    """Angle in degrees subtended by a chord of the unit sphere."""
+    return np.degrees(2 * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1)))
+
+
+def angle_to_chord(angle):
+    """Chord of the unit sphere subtending an angle in degrees."""
+    return 2 * np.sin(np.radians(angle) / 2)
+
+
+def local_sidereal_time(longitude, time=None):
+    """
+    @param longitude: Site longitude, in degrees or a sexagesimal string
+    @param time: astropy Time, defaults to now
+    @return: Local mean sidereal time in degrees
+    """
+    time = Time.now() if time is None else time
+    longitude = Longitude(Angle(longitude, unit=units.deg))
+    return time.sidereal_time("mean", longitude).to_value(units.deg)
+
+
+def radec_to_altaz(ra, dec, lst, latitude):
+    """
+    Vectorized horizontal coordinates, without refraction nor precession.
+
+    @param ra: Right ascension in degrees
+    @param dec: Declination in degrees
+    @param lst: Local sidereal time in degrees
+    @param latitude: Site latitude in degrees
+    @return: (alt, az) in degrees, azimuth from north through east
+    """
+    ha = np.radians(lst - np.asarray(ra))
+    dec, lat = np.radians(dec), np.radians(latitude)
+    sin_alt = np.sin(dec) * np.sin(lat) + np.cos(dec) * np.cos(lat) * np.cos(ha)
+    alt = np.arcsin(np.clip(sin_alt, -1, 1))
+    az = np.arctan2(
+        -np.cos(dec) * np.sin(ha),
+        np.sin(dec) * np.cos(lat) - np.cos(dec) * np.sin(lat) * np.cos(ha),
+    )
+    return np.degrees(alt), np.degrees(az) % 360.0
+
+
+def altaz_to_radec(alt, az, lst, latitude):
+    """
+    Inverse of radec_to_altaz.
+
+    @return: (ra, dec) in degrees
+    """
+    alt, az, lat = np.radians(alt), np.radians(az), np.radians(latitude)
+    sin_dec = np.sin(alt) * np.sin(lat) + np.cos(alt) * np.cos(lat) * np.cos(az)
+    dec = np.arcsin(np.clip(sin_dec, -1, 1))
+    ha = np.arctan2(
+        -np.cos(alt) * np.sin(az),
+        np.sin(alt) * np.cos(lat) - np.cos(alt) * np.sin(lat) * np.cos(az),
+    )
+    return (lst - np.degrees(ha)) % 360.0, np.degrees(dec)
+
+
+def airmass(alt):
+    """
+    Plane-parallel airmass, infinite below the horizon.
+
+    @param alt: Altitude in degrees
+    """
+    sin_alt = np.sin(np.radians(alt))
+    with np.errstate(divide="ignore"):
+        return np.where(sin_alt > 0, 1.0 / sin_alt, np.inf)
+
+
+def _sexagesimal(value):
+    # "hh:mm:ss.s" or "dd:mm:ss" string to hours or degrees
+    parts = [abs(float(p)) for p in value.split(":")]
+    sign = -1.0 if value.strip().startswith("-") else 1.0
+    return sign * sum(p / 60**i for i, p in enumerate(parts))
+
+
+class StarCatalog:
+    """
+    Star catalog held in NumPy arrays with a KD-tree on the unit vectors of
+    the equatorial coordinates, so nearest star queries use true great-circle
+    distances and are independent of the observing time.
+    """
+
+    def __init__(self, names, ra, dec, mag):
+        """
+        @param names: Star names
+        @param ra: J2000 right ascension in degrees
+        @param dec: J2000 declination in degrees
+        @param mag: Magnitudes
+        """
+        self.names = np.asarray(names)
+        self.ra = np.asarray(ra, dtype=float)
+        self.dec = np.asarray(dec, dtype=float)
+        self.mag = np.asarray(mag, dtype=float)
+        self._tree = cKDTree(unit_vectors(self.ra, self.dec)) if len(self) else None
+
+    def __len__(self):
+        return len(self.ra)
+
+    @classmethod
+    def from_edb(cls, filename):
+        """
+        Read the fixed objects of an XEphem database (.edb) file, such as
+        the SAO catalog.
+        """
+        names, ras, decs, mags = [], [], [], []
+        with open(filename) as f:
+            for line in f:
+                if line.startswith("#") or not line.strip():
+                    continue
+                fields = line.split(",")
+                if len(fields) < 5 or not fields[1].startswith("f"):
+                    continue
+                names.append(fields[0].strip())
+                # proper motions follow the coordinates after a "|"
+                ras.append(15.0 * _sexagesimal(fields[2].split("|")[0]))
+                decs.append(_sexagesimal(fields[3].split("|")[0]))
+                mags.append(float(fields[4]) if fields[4].strip() else np.nan)
+        return cls(names, ras, decs, mags)
+
+    def select(self, mag_min=None, mag_max=None):
+        """
+        @param mag_min: Brightest magnitude kept
+        @param mag_max: Faintest magnitude kept
+        @return: A new StarCatalog with the stars in the magnitude range
+        """
+        mask = np.isfinite(self.mag)
+        if mag_min is not None:
+            mask &= self.mag >= mag_min
+        if mag_max is not None:
+            mask &= self.mag <= mag_max
+        return StarCatalog(
+            self.names[mask], self.ra[mask], self.dec[mask], self.mag[mask]
+        )
+
+    def nearest(self, ra, dec, k=1, max_distance=None):
+        """
+        @param ra: Right ascension in degrees
+        @param dec: Declination in degrees
+        @param k: Number of stars returned
+        @param max_distance: Maximum distance in degrees
+        @return: (indices, distances in degrees), closest first. Missing
+                 neighbours are dropped.
+        """
+        if self._tree is None:
+            return np.empty(0, dtype=int), np.empty(0)
+        upper = angle_to_chord(max_distance) if max_distance is not None else np.inf
+        chords, indices = self._tree.query(
+            unit_vectors(ra, dec), k=k, distance_upper_bound=upper
+        )
+        chords, indices = np.atleast_1d(chords), np.atleast_1d(indices)
+        found = np.isfinite(chords)
+        return indices[found], chord_to_angle(chords[found])
+
+    def altaz(self, lst, latitude):
+        """
+        @return: (alt, az) of all stars in degrees
+        """
+        return radec_to_altaz(self.ra, self.dec, lst, latitude)
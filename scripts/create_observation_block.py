@@ -1,27 +1,8 @@
-import jinja2
+# Batch version: chimera-obsblocks targets.csv --template observing_sequence.j2
+from chimera_swope.cli.obsblocks import main
 
-with open("observing_sequence.j2") as f:
-    template_content = f.read()
-
-template = jinja2.Template(template_content)
-observation_data = {
-    "program_name": "TOI-620 b",
-    "pi_name": "Jason Williams",
-    "priority": 1,
-    "target": {
-        "name": "TOI-620 b",
-        "ra": "09:28:41.6",
-        "dec": "-12:09:55.8",
-        # "epoch": "J2000",
-        "pa": 45,
-        "offsets": {"south": 20, "east": 10},
-    },
-}
-
-output_content = template.render(observation=observation_data)
-output_file = "observing_sequence.yaml"
-with open(output_file, "w") as f:
-    f.write(output_content)
+if __name__ == "__main__":
+    main()
 
 
 # henrietta@henrietta-spreadsheets.iam.gserviceaccount.com
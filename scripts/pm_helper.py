@@ -5,7 +5,16 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 plt.ion()
-from astropy.io import fits
+from astropy import units
+from astropy.coordinates import Angle
+
+from chimera_swope.cli.pointingplan import load_sessions, remove_measured
+from chimera_swope.sky import (
+    StarCatalog,
+    altaz_to_radec,
+    local_sidereal_time,
+    radec_to_altaz,
+)
 
 pointings = 50
 skip = 18  # Use this to skip N first pointings to resume a model session
@@ -17,7 +26,9 @@ plot = True
 save_file_pointings = None  # 'dome_pointing.txt'  # None
 save_file_done = "pointings_done.txt"
 # load_file = "pointings_done.txt"  # "m2controllaw_table6_064.fits"  # None #'pointings_done.txt'  # 'lna_dome_model_data.txt'  # None
+# Previous sessions can be merged with a list: ["night1.txt", "night2.txt"]
 load_file = None
+skip_distance = 4  # degrees, planned points closer to a loaded one are skipped
 interactive = False  # Set to False to run without user interaction
 
 use_starname = True  # Use this if the method does not support pointing by chimera
@@ -56,25 +67,29 @@ chimera_pverify = "ssh puma '. ~/.zshrc && chimera-pverify'"
 
 star_catalogfile = "SAO.edb"
 # star_catalogfile = 'NGC.edb'
+star_mag_min = None  # brightest star magnitude to use, None for no limit
+star_mag_max = None  # faintest star magnitude to use, None for no limit
 
 if use_starname:
-    import ephem
-
-    with open(star_catalogfile) as f:
-        star_catalog = [ephem.readdb(l) for l in f.readlines() if not l.startswith("#")]
+    star_catalog = StarCatalog.from_edb(star_catalogfile).select(
+        star_mag_min, star_mag_max
+    )
 
 
 def get_nearby_star(catalog, alt, az):
-    obs = ephem.Observer()
-    obs.lat = obs_lat
-    obs.long = obs_long
-    obs.elevation = obs_elev
-    dist = []
-    for star in star_catalog:
-        star.compute(obs)
-        dist.append(np.sqrt((alt - star.alt.real) ** 2 + (az - star.az.real) ** 2))
-    nearby_star = np.argmin(dist)
-    return star_catalog[nearby_star], dist[nearby_star]
+    """
+    Nearest catalog star to an horizontal position, now.
+
+    @param alt: Altitude in degrees
+    @param az: Azimuth in degrees
+    @return: (star index, star alt, star az, great-circle distance), in degrees
+    """
+    lst = local_sidereal_time(obs_long)
+    latitude = Angle(obs_lat, unit=units.deg).deg
+    ra, dec = altaz_to_radec(alt, az, lst, latitude)
+    (idx,), (distance,) = catalog.nearest(ra, dec)
+    star_alt, star_az = radec_to_altaz(catalog.ra[idx], catalog.dec[idx], lst, latitude)
+    return idx, float(star_alt), float(star_az), float(distance)
 
 
 def angin2pi(angle):
@@ -103,27 +118,9 @@ map_points[:, 1] = radius
 map_points = map_points[np.lexsort((map_points[:, 1], map_points[:, 0]))]
 
 if load_file is not None:
-    skip_too_close = list()
-    # points_save = list()
-    if load_file.endswith(".txt"):
-        load_model = np.loadtxt(load_file, dtype=[("AZ", float), ("ALT", float)])
-    else:
-        load_model = fits.getdata(load_file)
-    for point_load in load_model:
-        offset = 0
-        for i in range(len(map_points)):
-            map_point = map_points[i - offset]
-            if (
-                np.sqrt(
-                    (point_load["ALT"] - map_point[0]) ** 2
-                    + (point_load["AZ"] - map_point[1]) ** 2
-                )
-                < 4
-            ):
-                skip_too_close.append(map_point)
-                map_points = np.delete(map_points, i, axis=0)
-                offset += 1
-    skip_too_close = np.array(skip_too_close)
+    load_files = [load_file] if isinstance(load_file, str) else load_file
+    load_model = load_sessions(load_files)  # (az, alt) columns
+    map_points, skip_too_close = remove_measured(map_points, load_model, skip_distance)
     print(
         f"Loaded {len(load_model)} points, skipped {len(skip_too_close)} too close points."
     )
@@ -142,8 +139,8 @@ if plot:
     )
     if load_file is not None:
         ax.scatter(
-            load_model["AZ"] * np.pi / 180.0,
-            90 - load_model["ALT"],
+            load_model[:, 0] * np.pi / 180.0,
+            90 - load_model[:, 1],
             color="green",
             s=20,
         )
@@ -171,19 +168,18 @@ for point in map_points[skip:]:
     print(f"Point: # {i} (alt, az): {alt:.2f} {az:.2f}")
     # If a star name is needed to the method of pointing model, get the nearest star from the desired point.
     if use_starname:
-        star, distance = get_nearby_star(
-            star_catalog, alt * np.pi / 180, az * np.pi / 180
-        )
-        alt, az = star.alt.real * 180 / np.pi, star.az.real * 180 / np.pi
-        os.system(f"echo {star.name} | pbcopy")
+        idx, alt, az, distance = get_nearby_star(star_catalog, alt, az)
+        star_name = star_catalog.names[idx]
+        if use_mac_clipboard:
+            os.system(f"echo {star_name} | pbcopy")
         if interactive:
             s = input(
-                f"Point Telescope to star {star.name} (ra, dec, alt, az, dist): {star.ra}, {star.dec}, {star.alt}, {star.az}, {distance:.2f} and press ENTER to verify, S to slew, X to skip. E to exit."
+                f"Point Telescope to star {star_name} (ra, dec, alt, az, dist): {star_catalog.ra[idx]:.4f}, {star_catalog.dec[idx]:.4f}, {alt:.2f}, {az:.2f}, {distance:.2f} and press ENTER to verify, S to slew, X to skip. E to exit."
             )
         else:
             s = "S"
         if s == "S":
-            os.system(f"{chimera_tel} --slew --object {star.name.replace(' ', '')}")
+            os.system(f"{chimera_tel} --slew --object {star_name.replace(' ', '')}")
         elif s == "X":
             continue
         elif s == "E":
@@ -202,7 +198,7 @@ for point in map_points[skip:]:
     if expose_star:
         print("Taking exposure...")
         os.system(
-            f"{chimera_cam} --expose --exptime {exptime} --filter {filter_name} --object '{star.name.replace(' ', '') if use_starname else f'alt{alt:.2f}_az{az:.2f}'}_pmhelper'"
+            f"{chimera_cam} --expose --exptime {exptime} --filter {filter_name} --object '{star_name.replace(' ', '') if use_starname else f'alt{alt:.2f}_az{az:.2f}'}_pmhelper'"
         )
 
     print("\a")  # Ring a bell when done.
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from chimera_swope.cli.commands import (
+    CommandExecutor,
+    CommandQueueFullError,
+    NudgeCoalescer,
+)
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_commands_are_serialized_per_device():
+    executor = CommandExecutor(log=lambda msg: None)
+    release = threading.Event()
+    order = []
+
+    def move(name):
+        release.wait()
+        order.append(name)
+
+    first = executor.submit("focuser", "first", move, "first")
+    second = executor.submit("focuser", "second", move, "second")
+    other = executor.submit("rotator", "other", lambda: order.append("other"))
+
+    other.future.result(timeout=1)  # other devices are not held
+    assert (first.state, second.state) == ("running", "queued")
+    release.set()
+    second.future.result(timeout=1)
+    assert order == ["other", "first", "second"]
+    assert first.state == second.state == "done"
+    executor.shutdown()
+
+
+def test_failures_and_queue_bound():
+    executor = CommandExecutor(max_pending=1, log=lambda msg: None)
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise RuntimeError("limit switch")
+
+    running = executor.submit("rotator", "move", fail)
+    executor.submit("rotator", "queued", lambda: None)
+    with pytest.raises(CommandQueueFullError):
+        executor.submit("rotator", "too many", lambda: None)
+
+    release.set()
+    with pytest.raises(RuntimeError):
+        running.future.result(timeout=1)
+    assert running.state == "failed"
+    assert "limit switch" in running.error
+    executor.shutdown()
+
+
+def test_cancel_drops_queued_and_aborts_running():
+    executor = CommandExecutor(log=lambda msg: None)
+    release = threading.Event()
+    states = []
+    executor.subscribe(
+        lambda command: states.append((command.description, command.state))
+    )
+
+    running = executor.submit("telescope", "slew", release.wait, abort=release.set)
+    queued = executor.submit("telescope", "offset", lambda: None)
+    executor.cancel("telescope")
+
+    running.future.result(timeout=1)
+    assert running.state == "cancelled"
+    assert queued.state == "cancelled"
+    assert queued.future.cancelled()
+    assert ("offset", "running") not in states
+    assert not executor.busy("telescope")
+    executor.shutdown()
+
+
+def test_nudges_are_coalesced():
+    executor = CommandExecutor(log=lambda msg: None)
+    release = threading.Event()
+    moves = []
+
+    def move(north, east):
+        moves.append((north, east))
+        release.wait()
+
+    nudge = NudgeCoalescer(executor, "telescope", move)
+    nudge.add(north=1)
+    assert wait_for(lambda: len(moves) == 1)
+    # key held while the first offset runs
+    for _ in range(5):
+        nudge.add(north=1)
+    last = nudge.add(east=-1)
+    release.set()
+    last.future.result(timeout=1)
+    assert moves == [(1, 0), (5, -1)]
+    executor.shutdown()
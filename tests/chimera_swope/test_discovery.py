@@ -0,0 +1,96 @@
+import threading
+import time
+
+from chimera_swope.cli.discovery import InstrumentDiscovery, config_hash
+
+CLASSES = ["Telescope", "Camera", "Focuser"]
+
+
+class InstrumentStandIn:
+    def __init__(self, features=(), hang=None, fail=False):
+        self._features = set(features)
+        self.hang = hang
+        self.fail = fail
+        self.feature_calls = 0
+
+    def ping(self):
+        if self.hang is not None:
+            self.hang.wait()
+        if self.fail:
+            raise ConnectionRefusedError("offline")
+        return True
+
+    def features(self, cls):
+        self.feature_calls += 1
+        return cls in self._features
+
+
+def make_discovery(instruments, connected, tmp_path, **kwargs):
+    return InstrumentDiscovery(
+        lambda name: instruments[name],
+        CLASSES,
+        lambda name, proxy, cls: connected.append((name, cls)),
+        cache_file=str(tmp_path / "instruments.json"),
+        log=lambda msg: None,
+        **kwargs,
+    )
+
+
+def test_discovery_is_concurrent_with_timeout(tmp_path):
+    hang = threading.Event()
+    instruments = {
+        "/Telescope/0": InstrumentStandIn(["Telescope"]),
+        "/Camera/0": InstrumentStandIn(["Camera"]),
+        "/Focuser/0": InstrumentStandIn(["Focuser"], hang=hang),
+        "/Other/0": InstrumentStandIn(),
+    }
+    connected = []
+    discovery = make_discovery(instruments, connected, tmp_path, timeout=0.3)
+    start = time.time()
+    try:
+        unreachable = discovery.discover({name: {} for name in instruments})
+        assert time.time() - start < 1.0
+        assert unreachable == {"/Focuser/0"}
+        assert sorted(connected) == [
+            ("/Camera/0", "Camera"),
+            ("/Other/0", None),
+            ("/Telescope/0", "Telescope"),
+        ]
+    finally:
+        hang.set()
+        discovery.stop()
+
+
+def test_unreachable_instruments_are_retried(tmp_path):
+    instruments = {"/Focuser/0": InstrumentStandIn(["Focuser"], fail=True)}
+    connected = []
+    discovery = make_discovery(instruments, connected, tmp_path, retry_interval=0.05)
+    try:
+        assert discovery.discover({"/Focuser/0": {}}) == {"/Focuser/0"}
+        instruments["/Focuser/0"].fail = False
+        end = time.time() + 2
+        while discovery.unreachable and time.time() < end:
+            time.sleep(0.01)
+        assert connected == [("/Focuser/0", "Focuser")]
+    finally:
+        discovery.stop()
+
+
+def test_classification_is_cached_by_config(tmp_path):
+    config = {"/Camera/0": {"type": "SwopeCamera"}}
+    instruments = {"/Camera/0": InstrumentStandIn(["Camera"])}
+
+    connected = []
+    make_discovery(instruments, connected, tmp_path).discover(config)
+    calls = instruments["/Camera/0"].feature_calls
+    assert calls == 2
+
+    make_discovery(instruments, connected, tmp_path).discover(config)
+    assert instruments["/Camera/0"].feature_calls == calls
+    assert connected == [("/Camera/0", "Camera")] * 2
+
+    # a different configuration is classified again
+    changed = {"/Camera/0": {"type": "FakeCamera"}}
+    assert config_hash(changed, CLASSES) != config_hash(config, CLASSES)
+    make_discovery(instruments, connected, tmp_path).discover(changed)
+    assert instruments["/Camera/0"].feature_calls == 2 * calls
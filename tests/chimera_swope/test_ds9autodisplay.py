@@ -0,0 +1,106 @@
+import math
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+pytest.importorskip("chimera")
+pytest.importorskip("photutils")
+
+from chimera.interfaces.camera import CameraStatus
+
+from chimera_swope.controllers.ds9autodisplay import Ds9AutoDisplay
+from chimera_swope.controllers.sourcedetection import SourceCatalog
+
+
+class DispatcherStandIn:
+    def __init__(self):
+        self.displayed = []
+
+    def ensure_connected(self, force=False):
+        return True
+
+    def display(self, filename):
+        self.displayed.append(filename)
+
+
+class DetectorStandIn:
+    def __init__(self, catalog=None):
+        self.catalog = catalog
+        self.submitted = []
+
+    def submit(self, frame_id, filename):
+        self.submitted.append(frame_id)
+
+    def get(self, frame_id, filename=None, timeout=None):
+        return self.catalog
+
+
+class ClientStandIn:
+    """Answers the imexam requests with the given points."""
+
+    def __init__(self, points):
+        self.points = list(points)
+        self.regions = []
+
+    def ecall_and_wait(self, client, method, timeout, cmd):
+        if method == "ds9.get":
+            x, y = self.points.pop(0)
+            return {"samp.result": {"value": f"{x} {y}"}}
+        self.regions.append(cmd)
+
+
+class Image:
+    def __init__(self, filename):
+        self.filename = filename
+
+
+@pytest.fixture
+def display():
+    display = Ds9AutoDisplay()
+    display.ds9_dispatcher = DispatcherStandIn()
+    display.source_detector = DetectorStandIn()
+    display.pas = []
+    display.update_pa = display.pas.append
+    return display
+
+
+def test_readout_displays_and_detects(display):
+    # full mode by default, the catalog is ready when the PA is asked for
+    display._on_readout(Image("a.fits"), CameraStatus.OK)
+    display._on_readout(Image("b.fits"), CameraStatus.ABORTED)
+    assert display.ds9_dispatcher.displayed == ["a.fits"]
+    assert display.source_detector.submitted == ["a.fits"]
+    assert display.image_fname == "a.fits"
+
+    display["detection_mode"] = "window"
+    display._on_readout(Image("c.fits"), CameraStatus.OK)
+    assert display.ds9_dispatcher.displayed == ["a.fits", "c.fits"]
+    assert display.source_detector.submitted == ["a.fits"]
+
+
+def test_pa_snaps_to_the_nearest_stars(display, tmp_path):
+    stars = [(60.0, 50.0), (140.0, 110.0)]
+    y, x = np.indices((200, 200))
+    data = np.random.default_rng(1).normal(100.0, 5.0, (200, 200))
+    for sx, sy in stars:
+        data += 5000.0 * np.exp(-((x - sx) ** 2 + (y - sy) ** 2) / (2 * 1.3**2))
+    display.image_fname = str(tmp_path / "frame.fits")
+    fits.writeto(display.image_fname, data)
+
+    # clicks a few pixels away from the stars
+    display["detection_mode"] = "window"
+    display.ds9_client = ClientStandIn([(62.0, 47.0), (137.0, 112.0)])
+    display.get_pa()
+    expected = math.degrees(math.atan2(60.0, 80.0))
+    assert display.pas == [pytest.approx(expected, abs=0.5)]
+    assert len(display.ds9_client.regions) == 2
+
+    # full mode uses the background catalog
+    display["detection_mode"] = "full"
+    display.source_detector.catalog = SourceCatalog(
+        np.array([0.0, 100.0]), np.array([0.0, 0.0]), np.ones(2)
+    )
+    display.ds9_client = ClientStandIn([(1.0, 1.0), (99.0, 2.0)])
+    display.get_pa()
+    assert display.pas[-1] == pytest.approx(0.0)
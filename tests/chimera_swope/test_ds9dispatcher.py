@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+from astropy.samp import SAMPHubError
+
+from chimera_swope.controllers.ds9dispatcher import Ds9Dispatcher
+
+
+class Ds9StandIn:
+    """Records the commands a SAMPIntegratedClient would send to DS9."""
+
+    def __init__(self, running=True):
+        self.running = running
+        self.client = None
+        self.commands = []
+        self.release = threading.Event()
+        self.release.set()
+
+    @property
+    def is_connected(self):
+        return self.client is not None
+
+    def connect(self):
+        if not self.running:
+            raise SAMPHubError("no hub")
+        self.client = object()
+
+    def disconnect(self):
+        self.client = None
+
+    def ping(self):
+        return "OK"
+
+    def ecall_and_wait(self, recipient, mtype, timeout, cmd):
+        self.release.wait()
+        self.commands.append(cmd)
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def make_dispatcher(client):
+    dispatcher = Ds9Dispatcher(client, logging.getLogger("test"), health_interval=0.05)
+    dispatcher.start()
+    return dispatcher
+
+
+def test_display_sends_frame():
+    client = Ds9StandIn()
+    dispatcher = make_dispatcher(client)
+    try:
+        dispatcher.display("/data/a.fits")
+        assert wait_for(lambda: len(client.commands) == 3)
+        assert client.commands == ["frame clear", "url file:///data/a.fits", "zscale"]
+        assert dispatcher.connected
+    finally:
+        dispatcher.stop()
+
+
+def test_burst_is_coalesced_to_newest_frame():
+    client = Ds9StandIn()
+    dispatcher = make_dispatcher(client)
+    try:
+        client.release.clear()  # DS9 busy
+        dispatcher.display("/data/a.fits")
+        assert wait_for(lambda: dispatcher._next_frame is None)
+
+        start = time.time()
+        for name in "bcd":
+            dispatcher.display(f"/data/{name}.fits")
+        assert time.time() - start < 0.1  # never blocks the caller
+
+        client.release.set()
+        assert wait_for(lambda: "url file:///data/d.fits" in client.commands)
+        time.sleep(0.1)
+        loaded = [c for c in client.commands if c.startswith("url")]
+        # the stale frame being sent is abandoned, b and c are never loaded
+        assert loaded == ["url file:///data/d.fits"]
+    finally:
+        dispatcher.stop()
+
+
+def test_reconnects_when_ds9_comes_up():
+    client = Ds9StandIn(running=False)
+    dispatcher = make_dispatcher(client)
+    try:
+        dispatcher.display("/data/a.fits")
+        time.sleep(0.1)
+        assert not dispatcher.connected
+        assert client.commands == []
+
+        client.running = True
+        assert dispatcher.ensure_connected(force=True)
+        dispatcher.display("/data/b.fits")
+        assert wait_for(lambda: "url file:///data/b.fits" in client.commands)
+    finally:
+        dispatcher.stop()
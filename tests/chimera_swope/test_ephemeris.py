@@ -0,0 +1,63 @@
+import calendar
+
+import numpy as np
+import pytest
+from astropy.time import Time
+
+from chimera_swope.ephemeris import EphemerisCache, NightEphemeris, night_date
+from chimera_swope.sky import local_sidereal_time, radec_to_altaz
+
+LATITUDE = -29.012
+LONGITUDE = -70.700
+
+
+@pytest.fixture(scope="module")
+def night():
+    return NightEphemeris("2026-03-01", LONGITUDE, LATITUDE)
+
+
+def test_twilights(night):
+    civil, nautical, astronomical = (
+        night.twilights[name] for name in ("civil", "nautical", "astronomical")
+    )
+    assert civil[0] < nautical[0] < astronomical[0]
+    assert astronomical[1] < nautical[1] < civil[1]
+    # summer night at Las Campanas: sunset ~23:30 UT
+    evening = calendar.timegm((2026, 3, 1, 23, 0, 0))
+    assert evening < civil[0] < evening + 2 * 3600
+    assert night.is_night(nautical[0] + 60)
+    assert not night.is_night(nautical[0] - 60)
+
+
+def test_interpolation_matches_direct_computation(night):
+    t = night.t[0] + 12345.6
+    lst = local_sidereal_time(LONGITUDE, Time(t, format="unix"))
+    assert night.lst_at(t) == pytest.approx(lst, abs=1e-4)
+
+    night.add_targets(["a", "b"], [lst, 10.0], [-60.0, 5.0])
+    for name, ra, dec in [("a", lst, -60.0), ("b", 10.0, 5.0)]:
+        alt, az = radec_to_altaz(ra, dec, lst, LATITUDE)
+        values = night.target(name, t)
+        assert values["alt"] == pytest.approx(alt, abs=0.05)
+        assert values["az"] == pytest.approx(az, abs=0.1)
+    assert 0 <= night.moon(t)["illumination"] <= 1
+    assert night.airmass_grid(["b"]).shape == (1, len(night.t))
+    with pytest.raises(KeyError):
+        night.target("c", t)
+
+
+def test_cache_by_date():
+    t = calendar.timegm((2026, 3, 2, 3, 0, 0))  # local night of March 1st
+    assert night_date(LONGITUDE, t) == "2026-03-01"
+    assert night_date(LONGITUDE, t + 15 * 3600) == "2026-03-02"
+
+    cache = EphemerisCache(LONGITUDE, LATITUDE, step=30.0, max_nights=2)
+    first = cache.get(t=t)
+    assert cache.get(date="2026-03-01") is first
+    cache.add_targets(["x"], [100.0], [-30.0])
+    assert first.targets == ["x"]
+    second = cache.get(date="2026-03-02")
+    assert second.targets == ["x"]
+    cache.get(date="2026-03-03")
+    assert cache.get(date="2026-03-01") is not first
+    assert np.isfinite(second.target("x", second.t[10])["alt"])
@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from chimera_swope.controllers.exposuresequence import (
+    SequenceEngine,
+    plan_frames,
+    read_steps,
+)
+
+
+def test_plan_frames_moves_only_what_changes():
+    steps = read_steps(
+        [
+            ({"grism": "R-J", "slit": "10"}, {"east": 5, "south": 2}, 30, 2),
+            {"setup": {"grism": "R-J", "slit": "20"}, "offset": (-5, 0), "exptime": 30},
+        ]
+    )
+    assert steps[0].offset == (5.0, -2.0)
+    frames = plan_frames(steps, setup={"slit": "10"})
+    assert [f.moves for f in frames] == [{"grism": "R-J"}, {}, {"slit": "20"}]
+    assert [f.offset for f in frames] == [(5.0, -2.0), (0.0, 0.0), (-10.0, 2.0)]
+    assert [(f.step_index, f.exposure) for f in frames] == [(0, 0), (0, 1), (1, 0)]
+
+    with pytest.raises(ValueError):
+        read_steps([{"exptime": 1, "offset": {"up": 3}}])
+    with pytest.raises(ValueError):
+        read_steps([{"exptime": 1, "nexp": 0}])
+
+
+def test_shutter_closed_for_darks_and_biases():
+    steps = read_steps(
+        [
+            {"exptime": 0, "image_type": "BIAS"},
+            {"exptime": 10, "image_type": "dark"},
+            {"exptime": 10, "image_type": "FLAT"},
+            {"exptime": 10},
+        ]
+    )
+    assert [step.shutter for step in steps] == ["CLOSE", "CLOSE", "OPEN", "OPEN"]
+
+
+def test_setup_overlaps_readout():
+    frames = plan_frames(
+        read_steps(
+            [({"slit": "10"}, (0, 0), 0.0, 1), ({}, (5, 0), 0.0, 1), ({}, (0, 5), 0, 1)]
+        )
+    )
+    index = {id(frame): n for n, frame in enumerate(frames)}
+    events = []
+    log = []
+    moving = threading.Event()
+
+    def expose(frame):
+        n = index[id(frame)]
+        log.append(("expose", n))
+        # a late event of the previous frame does not start the next setup
+        if n > 0:
+            engine.exposure_finished(frames[n - 1])
+            assert not moving.wait(0.2)
+        engine.exposure_finished(frame)
+        if n + 1 < len(frames):
+            # written only once the next frame started moving
+            assert moving.wait(5)
+            moving.clear()
+        log.append(("written", n))
+        return f"frame{n}"
+
+    def move_wheels(frame):
+        if frame.moves:
+            log.append(("wheels", index[id(frame)]))
+
+    def move_telescope(frame):
+        if frame.offset != (0.0, 0.0):
+            log.append(("telescope", index[id(frame)]))
+            moving.set()
+
+    engine = SequenceEngine(
+        expose, [move_wheels, move_telescope], lambda *e: events.append(e)
+    )
+    results = engine.run(frames)
+
+    assert results == ["frame0", "frame1", "frame2"]
+    assert log == [
+        ("wheels", 0),
+        ("expose", 0),
+        ("telescope", 1),
+        ("written", 0),
+        ("expose", 1),
+        ("telescope", 2),
+        ("written", 1),
+        ("expose", 2),
+        ("written", 2),
+    ]
+    names = [name for name, _ in events]
+    assert names.count("frame_complete") == 3
+    assert names.count("step_complete") == 3
+    assert names[-1] == "sequence_complete"
+    assert events[-1][1]["status"] == "completed"
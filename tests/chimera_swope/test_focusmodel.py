@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from chimera_swope.instruments.focusmodel import FocusModel
+
+
+class TestFocusModel:
+    """Test suite for the temperature compensated focus model."""
+
+    @staticmethod
+    def true_focus(temperature, filter_name, altitude):
+        offsets = {"V": 0.0, "B": 35.0, "r": -20.0}
+        return (
+            24000.0
+            - 12.0 * temperature
+            + 40.0 * np.sin(np.radians(altitude))
+            + offsets[filter_name]
+        )
+
+    @pytest.fixture
+    def model_file(self, tmp_path):
+        return str(tmp_path / "focus_model.dat")
+
+    def test_not_fitted_without_data(self, model_file):
+        """Test that an empty store cannot be fitted."""
+        model = FocusModel(model_file)
+        assert not model.fit()
+        assert model.predict(10.0, "V", 60.0) is None
+
+    def test_fit_and_predict(self, model_file):
+        """Test that the model recovers temperature, altitude and filter terms."""
+        model = FocusModel(model_file)
+        rng = np.random.default_rng(42)
+        for i in range(30):
+            filter_name = ["V", "V", "B", "r"][i % 4]
+            temperature = rng.uniform(0, 20)
+            altitude = rng.uniform(30, 90)
+            position = self.true_focus(temperature, filter_name, altitude)
+            model.add(position, temperature, filter_name, altitude, fwhm=1.2)
+
+        assert model.fit()
+        for filter_name in ("V", "B", "r"):
+            assert model.predict(12.0, filter_name, 50.0) == pytest.approx(
+                self.true_focus(12.0, filter_name, 50.0)
+            )
+        assert model.predict(12.0, "unknown", 50.0) is None
+
+    def test_persistence(self, model_file):
+        """Test that measurements are reloaded from disk."""
+        model = FocusModel(model_file)
+        for temperature in range(6):
+            model.add(24000 + temperature, temperature, "V", 60.0 + temperature, 1.0)
+
+        reloaded = FocusModel(model_file)
+        assert len(reloaded.records) == 6
+        np.testing.assert_array_equal(reloaded.records, model.records)
+        assert reloaded.fit()
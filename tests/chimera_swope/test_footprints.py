@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from astropy import units
+from astropy.coordinates import SkyCoord
+
+from chimera_swope.cli.footprints import (
+    FootprintCache,
+    detector_footprint,
+    pixel_scale,
+    slit_footprint,
+)
+
+
+def test_swope_ccd_geometry():
+    assert pixel_scale(15.0) == pytest.approx(0.442, abs=1e-3)
+    ccd = detector_footprint("ccd", (4112, 4096), (15.0, 15.0))
+    assert ccd.width == pytest.approx(4112 * pixel_scale(15.0))
+
+
+def test_footprint_rotation_and_projection():
+    slit = slit_footprint("slit", 60.0, 1.0)
+    cache = FootprintCache([slit])
+
+    ((_, corners),) = cache.offsets(0.0)
+    np.testing.assert_allclose(np.abs(corners * 3600), [[0.5, 30.0]] * 4)
+    ((_, rotated),) = cache.offsets(90.0)
+    # the slit length points east at PA 90
+    np.testing.assert_allclose(np.abs(rotated * 3600), [[30.0, 0.5]] * 4, atol=1e-9)
+
+    ((_, vertices),) = cache.polygons(150.0, -60.0, 90.0)
+    center = SkyCoord(150.0 * units.deg, -60.0 * units.deg)
+    corners = SkyCoord(np.array(vertices) * units.deg)
+    separations = center.separation(corners).arcsec
+    np.testing.assert_allclose(separations, np.hypot(30.0, 0.5), rtol=1e-6)
+
+
+def test_offsets_are_cached_per_pa():
+    cache = FootprintCache([slit_footprint("slit", 60.0, 1.0)], pa_resolution=0.1)
+    assert cache.offsets(10.01) is cache.offsets(10.04)
+    assert cache.offsets(10.01) is not cache.offsets(10.2)
+    cache.add(detector_footprint("ccd", (2048, 2048), (18.0, 18.0)))
+    assert len(cache.offsets(10.01)) == 2
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from chimera_swope.controllers.framestats import (
+    find_stars,
+    frame_statistics,
+    read_subsample,
+)
+
+
+def make_frame(shape=(512, 512), sky=1000.0, noise=10.0, fwhm=4.0, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.normal(sky, noise, shape)
+    sigma = fwhm / (2.0 * np.sqrt(2.0 * np.log(2.0)))
+    y, x = np.mgrid[: shape[0], : shape[1]]
+    stars = [(100, 120), (300, 250), (400, 60), (250, 420)]
+    for sy, sx in stars:
+        data += 5000 * np.exp(-((x - sx) ** 2 + (y - sy) ** 2) / (2 * sigma**2))
+    return data, stars
+
+
+def test_find_stars_counts_and_fwhm():
+    data, stars = make_frame()
+    n, fwhm = find_stars(data, 1000.0, 10.0, box=11)
+    assert n == len(stars)
+    assert np.median(fwhm) == pytest.approx(4.0, rel=0.1)
+
+
+def test_frame_statistics():
+    data, stars = make_frame()
+    data[:8, :8] = 65535.0
+    stats = frame_statistics(data[::2, ::2], data, saturation=65000.0)
+    assert stats["sky"] == pytest.approx(1000.0, abs=1)
+    assert stats["noise"] == pytest.approx(10.0, rel=0.1)
+    assert stats["saturated_fraction"] == pytest.approx(16 / (256 * 256))
+    assert stats["n_stars"] >= len(stars)
+    assert stats["fwhm"] == pytest.approx(4.0, rel=0.2)
+
+    data[256:, :256] += 50  # brighter upper left quadrant
+    stats = frame_statistics(data[::2, ::2], data, saturation=65000.0)
+    assert stats["median_ul"] - stats["median_ll"] == pytest.approx(50, abs=2)
+    assert stats["std_ul"] == pytest.approx(10.0, rel=0.1)
+
+
+def test_read_subsample_applies_scaling(tmp_path):
+    data = np.arange(64 * 64, dtype=np.int32).reshape(64, 64) % 60000
+    hdu = fits.PrimaryHDU(data.astype(np.float64))
+    hdu.scale("int16", bzero=32768)
+    filename = tmp_path / "frame.fits"
+    hdu.writeto(filename)
+
+    subsample, center = read_subsample(filename, step=4, region=16)
+    np.testing.assert_allclose(subsample, data[::4, ::4])
+    np.testing.assert_allclose(center, data[24:40, 24:40])
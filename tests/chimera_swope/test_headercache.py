@@ -0,0 +1,38 @@
+from chimera_swope.controllers.headercache import HeaderCache, render_cards
+
+
+def test_render_cards_drops_invalid():
+    cards, invalid = render_cards(
+        [
+            ("RA", "10:00:00", "Right ascension"),
+            ("AIRMASS", 1.2, "Airmass"),
+            ("BAD KEY", 1, ""),
+            ("OBSERVER", "Jos\u00e9", "Not ASCII"),
+            ("FLAG", True, ""),
+        ]
+    )
+    assert [card[0] for card in cards] == ["RA", "AIRMASS", "FLAG"]
+    assert cards[1] == ("AIRMASS", 1.2, "Airmass")
+    assert len(invalid) == 2
+
+
+def test_header_merge_and_staleness():
+    cache = HeaderCache(["telescope", "dome", "weather"], max_age=10.0)
+    cache.update("weather", [("TEMP", 10.0, ""), ("DOME", "x", "")], timestamp=100.0)
+    cache.update("telescope", [("RA", 1.0, ""), ("COMMENT", "a", "")], timestamp=95.0)
+    cache.update("dome", [("DOME", "open", ""), ("COMMENT", "b", "")], timestamp=98.0)
+
+    header = cache.header(now=101.0)
+    # source order, first source wins, comments repeat
+    assert header == [
+        ("RA", 1.0, ""),
+        ("COMMENT", "a", ""),
+        ("DOME", "open", ""),
+        ("COMMENT", "b", ""),
+        ("TEMP", 10.0, ""),
+    ]
+    assert cache.stale(now=101.0) == []
+
+    # the telescope and dome cards get stale, the weather DOME shows up
+    assert cache.header(now=108.5) == [("TEMP", 10.0, ""), ("DOME", "x", "")]
+    assert cache.stale(now=108.5) == ["telescope", "dome"]
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from chimera_swope.instruments.httpfetcher import SingleFlightFetcher
+
+
+class EnvApiStandIn:
+    """Local stand-in for the env-api HTTP endpoints."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = set()
+        self.delay = 0.0
+        self.fail = False
+        self.payload = {"results": [{"ts": "2025-01-01T00:00:00Z", "seeing": 0.8}]}
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                standin.requests += 1
+                standin.connections.add(self.client_address)
+                time.sleep(standin.delay)
+                if standin.fail:
+                    self.send_response(503)
+                    body = b"unavailable"
+                else:
+                    self.send_response(200)
+                    body = json.dumps(standin.payload).encode()
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/metrics/seeing"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestSingleFlightFetcher:
+    """Test suite for the weather station HTTP fetch layer."""
+
+    @pytest.fixture
+    def env_api(self):
+        standin = EnvApiStandIn()
+        yield standin
+        standin.stop()
+
+    @pytest.fixture
+    def fetcher(self, env_api):
+        fetcher = SingleFlightFetcher(
+            lambda: env_api.url + "?start_ts=2025-01-01T00:00:00",
+            timeout=2.0,
+            backoff_initial=0.2,
+            backoff_max=1.0,
+        )
+        yield fetcher
+        fetcher.close()
+
+    def test_fetch_and_cache(self, env_api, fetcher):
+        result = fetcher.fetch(max_age=60)
+        assert result.data == env_api.payload
+        assert not result.stale and result.error is None
+        assert result.age < 1.0
+        fetcher.fetch(max_age=60)
+        assert env_api.requests == 1
+
+    def test_keep_alive(self, env_api, fetcher):
+        """Test that consecutive requests reuse the same connection."""
+        for _ in range(5):
+            fetcher.fetch(max_age=0)
+        assert env_api.requests == 5
+        assert len(env_api.connections) == 1
+
+    def test_single_flight(self, env_api, fetcher):
+        """Test that concurrent callers trigger a single request."""
+        env_api.delay = 0.3
+        results = []
+
+        def worker():
+            results.append(fetcher.fetch(max_age=60))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert env_api.requests == 1
+        assert all(r.data == env_api.payload for r in results)
+
+    def test_stale_during_outage(self, env_api, fetcher):
+        """Test that old data is served, flagged stale, with backoff."""
+        fetcher.fetch(max_age=0)
+        env_api.fail = True
+
+        result = fetcher.fetch(max_age=0)
+        assert result.stale
+        assert result.data == env_api.payload
+        assert "503" in result.error
+        assert env_api.requests == 2
+
+        # within the backoff delay no new request is made
+        t0 = time.time()
+        result = fetcher.fetch(max_age=0)
+        assert time.time() - t0 < 0.1
+        assert result.stale
+        assert env_api.requests == 2
+
+        # after the backoff it retries and recovers
+        env_api.fail = False
+        time.sleep(0.25)
+        result = fetcher.fetch(max_age=0)
+        assert not result.stale and result.error is None
+        assert env_api.requests == 3
+
+    def test_handler_rejects_data(self, env_api):
+        def handler(data):
+            raise ValueError("invalid")
+
+        fetcher = SingleFlightFetcher(lambda: env_api.url, handler=handler)
+        result = fetcher.fetch()
+        assert result.stale and result.data is None
+        assert "invalid" in result.error
+        fetcher.close()
+
+    def test_unreachable(self):
+        fetcher = SingleFlightFetcher(lambda: "http://127.0.0.1:1/", timeout=1.0)
+        result = fetcher.fetch()
+        assert result.stale and result.data is None and result.age is None
@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("chimera")
+pytest.importorskip("henrietta")
+
+from chimera_swope.controllers.headercache import HeaderCache
+from chimera_swope.controllers.metadatacollector import MetadataCollector
+from chimera_swope.instruments.henriettainstrument import (
+    HenriettaDiffuserWheel,
+    HenriettaFilterWheel,
+    HenriettaGrismWheel,
+    HenriettaSlideWheel,
+    HenriettaSlitWheel,
+)
+from chimera_swope.instruments.util import merge_cards
+
+
+class HenriettaStandIn:
+    def get_wheels(self):
+        return {
+            "slit": "20",
+            "grism": "R-J",
+            "diffuser": "open",
+            "filter": "J-K",
+            "slide": "In",
+        }
+
+
+class DeviceStandIn:
+    def get_metadata(self, request):
+        return [("DEVICE", "ok", "")]
+
+
+def make_wheel(cls, name, filters):
+    wheel = cls()
+    wheel["filters"] = wheel["filters_gui"] = filters
+    wheel.wheel_name = name
+    wheel.henrietta = HenriettaStandIn()
+    return wheel
+
+
+@pytest.fixture
+def collector():
+    collector = MetadataCollector()
+    collector._cache = HeaderCache(collector["devices"], max_age=collector["max_age"])
+    collector._executor = ThreadPoolExecutor(max_workers=len(collector["devices"]))
+    wheels = {
+        "/HenriettaSlitWheel/0": make_wheel(HenriettaSlitWheel, "slit", "10 20"),
+        "/HenriettaGrismWheel/0": make_wheel(HenriettaGrismWheel, "grism", "R-J J-K"),
+        "/HenriettaDiffuserWheel/0": make_wheel(
+            HenriettaDiffuserWheel, "diffuser", "open R-J+eng"
+        ),
+        "/HenriettaFilterWheel/0": make_wheel(HenriettaFilterWheel, "filter", "J-K"),
+        "/HenriettaSlideWheel/0": make_wheel(HenriettaSlideWheel, "slide", "Out In"),
+    }
+    collector._proxies = {
+        location: wheels.get(location, DeviceStandIn())
+        for location in collector["devices"]
+    }
+    yield collector
+    collector._executor.shutdown()
+
+
+def test_wheel_positions_reach_the_henrietta_header(collector):
+    collector.refresh()
+    # chimera's own per-device collection is off, the camera only adds its cards
+    headers = [("EXPTIME", 10.0, "exposure time in seconds")]
+    merge_cards(headers, collector.get_metadata())
+
+    cards = {card[0]: card[1] for card in headers}
+    assert cards["SLIT"] == "20"
+    assert cards["GRISM"] == "R-J"
+    assert cards["DIFFUSER"] == "open"
+    assert cards["FILTER"] == "J-K"
+    assert cards["SLIDE"] == "In"
+    assert "MDSTALE" not in cards
@@ -0,0 +1,80 @@
+import os
+
+import jinja2
+import numpy as np
+import pytest
+
+from chimera_swope.cli.obsblocks import (
+    observation,
+    parse_coordinates,
+    read_targets,
+    render_programs,
+    visibility_windows,
+    write_schedule,
+)
+from chimera_swope.cli.schedconsole import validate_schedule
+
+TEMPLATE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "scripts", "observing_sequence.j2"
+)
+
+
+def test_read_targets_and_coordinates(tmp_path):
+    csv = tmp_path / "targets.csv"
+    csv.write_text(
+        "name,ra,dec,pa,offset_east\nA,09:28:41.6,-12:09:55.8,45,10\nB,150,-30,,\n"
+    )
+    yml = tmp_path / "targets.yaml"
+    yml.write_text("targets:\n  - {name: C, ra: '01:00:00', dec: '+05:00:00'}\n")
+
+    a, b = read_targets(str(csv))
+    assert a["pa"] == 45 and a["offset_east"] == 10
+    assert "pa" not in b
+    (c,) = read_targets(str(yml))
+    assert c["name"] == "C"
+
+    assert parse_coordinates(a["ra"], a["dec"]) == pytest.approx(
+        (142.1733, -12.1655), abs=1e-3
+    )
+    assert parse_coordinates(b["ra"], b["dec"]) == (150.0, -30.0)
+    for ra, dec in [("25:00:00", "0"), ("10:00:00", "95"), ("x", "0")]:
+        with pytest.raises(ValueError):
+            parse_coordinates(ra, dec)
+
+
+def test_visibility_windows():
+    lst = np.arange(0.0, 180.0, 1.0)
+    first, last, best, min_airmass = visibility_windows(
+        [90.0, 90.0, 0.0], [-29.0, 80.0, -29.0], lst, -29.0, max_airmass=2.0
+    )
+    # transits at the zenith at lst 90, above 30 deg for +-70 deg of hour angle
+    assert min_airmass[0] == pytest.approx(1.0)
+    assert best[0] == 90
+    assert first[0] == 21 and last[0] == 159
+    assert first[1] == last[1] == best[1] == -1
+    # already setting at the start of the grid
+    assert first[2] == 0 and best[2] == 0
+
+
+def test_render_programs_in_parallel(tmp_path):
+    observations = [
+        observation({"name": f"T{i}", "offsets": {"south": 5}}, 15.0 * i, -30.0)
+        for i in range(12)
+    ]
+    output = tmp_path / "schedule.yaml"
+    n = write_schedule(output, render_programs(TEMPLATE, observations, workers=2))
+    assert n == 12
+    text = output.read_text()
+    assert validate_schedule(text) == (12, 12 * 6)
+    names = [
+        line.split()[-1]
+        for line in text.splitlines()
+        if line.strip().startswith("name: T")
+    ]
+    assert names[:3] == ["T0", "T1", "T2"]
+
+    # the template still renders a single observation
+    with open(TEMPLATE) as f:
+        single = jinja2.Template(f.read()).render(observation=observations[3])
+    assert validate_schedule(single) == (1, 6)
+    assert "ra: 03:00:00.00" in single
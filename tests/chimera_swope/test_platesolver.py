@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from astropy import units
+from astropy.coordinates import SkyCoord
+from astropy.wcs import WCS
+
+from chimera_swope.controllers.platesolver import (
+    PlateSolver,
+    pair_offsets,
+    pixel_scale,
+)
+
+SCALE = 0.435  # arcsec/pixel
+
+
+def make_wcs(rotation=0.0):
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = ["RA---TAN", "DEC--TAN"]
+    wcs.wcs.crval = [150.0, -30.0]
+    wcs.wcs.crpix = [1024.5, 1024.5]
+    theta = np.radians(rotation)
+    cd = (
+        SCALE
+        / 3600
+        * np.array([[-np.cos(theta), np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    )
+    wcs.wcs.cd = cd
+    return wcs
+
+
+def test_pixel_scale():
+    assert pixel_scale(make_wcs(30)) == pytest.approx(SCALE)
+
+
+def test_pair_offsets_aligned_and_centered():
+    wcs = make_wcs()
+    east, west = wcs.pixel_to_world([1000, 1047], [1023.5, 1023.5])
+    pa, offset_ra, offset_dec = pair_offsets(wcs, east, west, 1023.5, 1023.5)
+    assert pa == pytest.approx(0.0, abs=1e-6)
+    assert offset_ra == pytest.approx(0.0, abs=1e-3)
+    assert offset_dec == pytest.approx(0.0, abs=1e-3)
+
+
+def test_pair_offsets_rotated_and_shifted():
+    wcs = make_wcs()
+    # pair 45 degrees on the detector, middle point 10 pixels north of the slit
+    east, west = wcs.pixel_to_world([1013.5, 1033.5], [1023.5, 1043.5])
+    pa, offset_ra, offset_dec = pair_offsets(wcs, east, west, 1023.5, 1023.5)
+    assert pa == pytest.approx(45.0, abs=1e-3)
+    assert offset_ra == pytest.approx(0.0, abs=1e-2)
+    assert offset_dec == pytest.approx(10 * SCALE, abs=1e-2)
+
+
+def test_command_uses_hint_and_previous_scale():
+    solver = PlateSolver(config="/opt/astrometry/local.cfg", hint_radius=0.5)
+    hint = SkyCoord(150 * units.deg, -30 * units.deg)
+
+    blind = solver._command("s.xyls", "s.wcs", 2048, 2048)
+    assert "--ra" not in blind
+    assert blind[blind.index("--scale-low") + 1] == str(solver.scale_low)
+
+    hinted = solver._command("s.xyls", "s.wcs", 2048, 2048, hint, SCALE)
+    assert float(hinted[hinted.index("--ra") + 1]) == pytest.approx(150.0)
+    assert float(hinted[hinted.index("--radius") + 1]) == 0.5
+    assert float(hinted[hinted.index("--scale-high") + 1]) == pytest.approx(
+        SCALE * 1.05
+    )
+    assert hinted[hinted.index("--config") + 1] == "/opt/astrometry/local.cfg"
+
+
+def test_solve_prefers_the_caller_hint_after_a_slew():
+    solver = PlateSolver(hint_radius=1.0)
+    solver.last_wcs = make_wcs()
+    runs = []
+
+    def run(catalog, width, height, hint, scale):
+        runs.append((hint, scale))
+        return make_wcs()
+
+    solver._run = run
+    catalog = [None] * 10
+
+    # same field: the previous solution center is the better hint
+    solver.solve(catalog, 2048, 2048, hint=SkyCoord(150.3, -30.2, unit="deg"))
+    hint, scale = runs[-1]
+    assert hint.ra.deg == pytest.approx(150.0, abs=1e-3)
+    assert scale == pytest.approx(SCALE)
+
+    # new field: the caller hint is kept, the pixel scale still helps
+    solver.solve(catalog, 2048, 2048, hint=SkyCoord(40.0, -60.0, unit="deg"))
+    hint, scale = runs[-1]
+    assert hint.ra.deg == pytest.approx(40.0)
+    assert scale == pytest.approx(SCALE)
+
+    solver.solve(catalog, 2048, 2048)
+    assert runs[-1][0].dec.deg == pytest.approx(-30.0, abs=1e-3)
@@ -0,0 +1,96 @@
+import json
+
+import numpy as np
+import pytest
+from astropy.table import Table
+
+from chimera_swope.cli.pointingplan import (
+    Checkpoint,
+    SlewCostModel,
+    load_sessions,
+    order_points,
+    remove_measured,
+    vogel_points,
+)
+
+
+def test_vogel_points_cover_altitude_range():
+    points = vogel_points(50, 30.0, 85.0)
+    assert points.shape == (50, 2)
+    assert points[:, 1].max() == pytest.approx(85.0)
+    assert points[:, 1].min() > 30.0
+    assert ((points[:, 0] >= 0) & (points[:, 0] < 360)).all()
+
+
+def test_order_points_is_cheaper_than_azimuth_sort():
+    model = SlewCostModel(latitude=-29.0, dome_rate=0.0, settle=0.0)
+    points = vogel_points(40, 30.0, 85.0)
+    order = order_points(points, (0.0, 60.0), model)
+    assert sorted(order) == list(range(40))
+
+    def total(ordered):
+        position, seconds = (0.0, 60.0), 0.0
+        for point in ordered:
+            seconds += model.cost(position, point)[0]
+            position = point
+        return seconds
+
+    by_azimuth = points[np.lexsort((points[:, 1], points[:, 0]))]
+    assert total(points[order]) < total(by_azimuth)
+    # slews across azimuth 0 are short
+    assert model.cost((359.0, 50.0), [(1.0, 50.0)])[0] < 2.0
+
+
+def test_checkpoint_resume(tmp_path):
+    filename = tmp_path / "pm.jsonl"
+    points = vogel_points(5)
+    checkpoint = Checkpoint(filename, points)
+    checkpoint.record(0, "ok", solved_ra=10.0)
+    checkpoint.record(1, "not solved")
+    checkpoint.record(2, "ok")
+    checkpoint.close()
+    with open(filename, "a") as f:
+        f.write('{"index": 3, "sta')  # interrupted while writing
+
+    resumed = Checkpoint(filename, points)
+    assert resumed.done == {0, 2}
+    assert resumed.records[0]["solved_ra"] == 10.0
+    resumed.record(4, "ok")
+    resumed.close()
+    assert Checkpoint(filename, points).done == {0, 2, 4}
+    assert json.loads(open(filename).readline())["points"] == points.tolist()
+
+    with pytest.raises(ValueError):
+        Checkpoint(filename, vogel_points(6))
+
+
+def test_remove_measured_merging_sessions(tmp_path):
+    txt = tmp_path / "night1.txt"
+    txt.write_text("# azimuth (deg)    altitude (deg)\n359.5    40.0\n120.0    60.0\n")
+    table = tmp_path / "night2.fits"
+    Table({"AZ": [200.0], "ALT": [35.0]}).write(table)
+    checkpoint = Checkpoint(str(tmp_path / "night3.jsonl"), vogel_points(3))
+    checkpoint.record(0, "ok", az=10.0, alt=80.0)
+    checkpoint.record(1, "not solved", az=300.0, alt=50.0)
+    checkpoint.close()
+
+    measured = load_sessions([str(txt), str(table), checkpoint.filename])
+    assert measured.tolist() == [
+        [359.5, 40.0],
+        [120.0, 60.0],
+        [200.0, 35.0],
+        [10.0, 80.0],
+    ]
+
+    points = np.array(
+        [
+            [0.5, 40.0],  # across azimuth 0 from a measured one
+            [60.0, 60.0],
+            [200.0, 38.0],
+            [300.0, 50.0],  # only failed there
+            [17.0, 80.5],  # close on the sky near the zenith
+        ]
+    )
+    kept, dropped = remove_measured(points, measured, 4.0)
+    assert kept.tolist() == [[60.0, 60.0], [300.0, 50.0]]
+    assert len(dropped) == 3
@@ -0,0 +1,40 @@
+import pytest
+
+from chimera_swope.instruments.util import (
+    normalize_angle,
+    rotator_move_time,
+    rotator_path,
+)
+
+
+class TestRotatorPath:
+    """Test suite for rotator angle wrapping and move time prediction."""
+
+    @pytest.mark.parametrize(
+        "angle, expected", [(0, 0), (360, 0), (-90, 270), (725, 5), (359.5, 359.5)]
+    )
+    def test_normalize_angle(self, angle, expected):
+        assert normalize_angle(angle) == pytest.approx(expected)
+
+    def test_shortest_path(self):
+        """Test that the equivalent angle closest to the current one is chosen."""
+        assert rotator_path(350, 10, -270, 270) == pytest.approx(10)
+        assert rotator_path(200, 10, -270, 370) == pytest.approx(370)
+        assert rotator_path(-170, 170, -270, 270) == pytest.approx(-190)
+
+    def test_cable_wrap_limits(self):
+        """Test that the short way is not taken when it crosses the limits."""
+        # the short way from 260 to 280 would exceed the upper limit
+        assert rotator_path(260, 280, -270, 270) == pytest.approx(-80)
+
+    def test_unreachable_angle(self):
+        with pytest.raises(ValueError):
+            rotator_path(0, 180, -10, 10)
+
+    def test_move_time(self):
+        """Test the trapezoidal move time model."""
+        assert rotator_move_time(0, 2.0, 1.0, settle_time=1.0) == 0.0
+        # triangular profile: 2 * sqrt(d / a)
+        assert rotator_move_time(1.0, 2.0, 1.0) == pytest.approx(2.0)
+        # trapezoidal profile: d / v + v / a
+        assert rotator_move_time(-90.0, 2.0, 1.0, 1.0) == pytest.approx(48.0)
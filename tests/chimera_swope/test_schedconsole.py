@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from chimera_swope.cli.schedconsole import (
+    ConsoleBuffer,
+    save_schedule,
+    validate_schedule,
+)
+
+SCHEDULE = """
+programs:
+    -   program:
+        name: test
+        actions:
+            -   action: point
+                ra: "10:00:00"
+                dec: "-30:00:00"
+            -   action: expose
+                frames: 2
+"""
+
+
+def test_validate_schedule():
+    assert validate_schedule(SCHEDULE) == (1, 2)
+    with pytest.raises(ValueError, match="Invalid YAML"):
+        validate_schedule("programs: [")
+    with pytest.raises(ValueError, match="programs"):
+        validate_schedule("actions: []")
+    with pytest.raises(ValueError, match="action 1"):
+        validate_schedule("programs:\n  - actions:\n      - frames: 1\n")
+
+
+def test_uploads_get_unique_files(tmp_path):
+    first = save_schedule(SCHEDULE, "night 1.yaml", tmp_path)
+    second = save_schedule(SCHEDULE, "night 1.yaml", tmp_path)
+    assert first != second
+    assert os.path.basename(first).endswith(".yaml")
+    assert " " not in os.path.basename(first)
+    with open(second) as f:
+        assert f.read() == SCHEDULE
+
+
+def test_console_buffer_cursors():
+    console = ConsoleBuffer(max_chunks=3)
+    console.write("a\n")
+    console.write("b\n")
+    text, cursor = console.read()
+    assert text == "a\nb\n"
+    assert console.read(cursor) == ("", cursor)
+
+    for line in "cdef":
+        console.write(f"{line}\n")
+    # a slow client only gets what is still buffered
+    assert console.read(cursor)[0] == "d\ne\nf\n"
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from chimera_swope.sky import (
+    StarCatalog,
+    altaz_to_radec,
+    great_circle_distance,
+    radec_to_altaz,
+)
+
+
+def test_altaz_round_trip():
+    rng = np.random.default_rng(1)
+    ra = rng.uniform(0, 360, 100)
+    dec = rng.uniform(-85, 85, 100)
+    alt, az = radec_to_altaz(ra, dec, 123.4, -29.26)
+    ra2, dec2 = altaz_to_radec(alt, az, 123.4, -29.26)
+    assert great_circle_distance(ra, dec, ra2, dec2).max() < 1e-8
+    # a star on the meridian at the latitude passes through the zenith
+    alt, _ = radec_to_altaz(123.4, -29.26, 123.4, -29.26)
+    assert alt == pytest.approx(90.0)
+
+
+def test_nearest_matches_brute_force():
+    rng = np.random.default_rng(2)
+    n = 2000
+    ra = rng.uniform(0, 360, n)
+    dec = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    catalog = StarCatalog([f"s{i}" for i in range(n)], ra, dec, np.zeros(n))
+    for target_ra, target_dec in [(0.1, 89.0), (359.9, -10.0), (180.0, 0.0)]:
+        (idx,), (distance,) = catalog.nearest(target_ra, target_dec)
+        distances = great_circle_distance(target_ra, target_dec, ra, dec)
+        assert idx == np.argmin(distances)
+        assert distance == pytest.approx(distances.min(), abs=1e-6)
+    indices, _ = catalog.nearest(0.0, 0.0, k=5, max_distance=1e-3)
+    assert len(indices) == 0
+
+
+def test_edb_parse_and_magnitude_filter(tmp_path):
+    edb = tmp_path / "stars.edb"
+    edb.write_text(
+        "# test catalog\n"
+        "SAO 1,f|S|A0,01:30:00.0|1.2,-29:30:00|-3.4,5.5,2000\n"
+        "SAO 2,f|S|K0,12:00:00,45:00:00,8.1,2000\n"
+        "Mars,P\n"
+    )
+    catalog = StarCatalog.from_edb(edb)
+    assert list(catalog.names) == ["SAO 1", "SAO 2"]
+    assert catalog.ra[0] == pytest.approx(22.5)
+    assert catalog.dec[0] == pytest.approx(-29.5)
+    bright = catalog.select(mag_max=7.0)
+    assert list(bright.names) == ["SAO 1"]
+    assert len(catalog.select(mag_min=9.0)) == 0
+    assert len(catalog.select(mag_min=9.0).nearest(0.0, 0.0)[0]) == 0
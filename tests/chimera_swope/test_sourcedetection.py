@@ -0,0 +1,117 @@
+import threading
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+pytest.importorskip("photutils")
+
+from chimera_swope.controllers.sourcedetection import (
+    SourceCatalog,
+    SourceDetector,
+    detect_sources,
+    detect_sources_tiled,
+)
+
+
+def make_image(stars, shape=(256, 256), sigma=1.3, flux=5000.0, seed=1):
+    rng = np.random.default_rng(seed)
+    data = rng.normal(100.0, 5.0, shape)
+    y, x = np.indices(shape)
+    for sx, sy in stars:
+        data += flux * np.exp(-((x - sx) ** 2 + (y - sy) ** 2) / (2 * sigma**2))
+    return data
+
+
+def test_tiled_detection_finds_border_stars_once():
+    # stars on, and half a pixel around, the 64 pixel tile borders
+    stars = [
+        (63.6, 40.0),
+        (64.4, 100.0),
+        (128.0, 128.0),
+        (127.5, 191.7),
+        (192.2, 64.0),
+        (30.0, 30.0),
+        (200.0, 220.0),
+    ]
+    data = make_image(stars)
+
+    catalog = detect_sources_tiled(data, tile_size=64, workers=4)
+    assert len(catalog) == len(stars)
+    found = np.column_stack([catalog.x, catalog.y])
+    for star in stars:
+        distances = np.hypot(*(found - star).T)
+        assert np.count_nonzero(distances < 1.0) == 1
+
+    full = detect_sources(data)
+    assert len(full) == len(catalog)
+
+
+def write_frames(tmp_path, names):
+    filenames = {}
+    for value, name in enumerate(names):
+        filenames[name] = str(tmp_path / f"{name}.fits")
+        fits.writeto(filenames[name], np.full((4, 4), float(value)))
+    return filenames
+
+
+class BlockingDetect:
+    """Detection that waits to be released, recording the frames it saw."""
+
+    def __init__(self):
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+        self.frames = []
+
+    def __call__(self, data):
+        self.frames.append(int(data[0, 0]))
+        self.started.release()
+        self.release.wait(5)
+        return SourceCatalog(np.array([data[0, 0]]), np.zeros(1), np.ones(1))
+
+
+def test_detector_skips_stale_frames(tmp_path):
+    filenames = write_frames(tmp_path, ["a", "b", "c"])
+    detect = BlockingDetect()
+    detector = SourceDetector(detect)
+    detector.start()
+    try:
+        detector.submit("a", filenames["a"])
+        assert detect.started.acquire(timeout=5)
+        # b and c arrive while a is being detected, b gets stale
+        detector.submit("b", filenames["b"])
+        detector.submit("c", filenames["c"])
+        detect.release.set()
+        assert detector.get("c", timeout=5).x[0] == 2
+        assert detect.frames == [0, 2]
+        assert detector.get("b") is None
+        # asked for with its filename, the skipped frame is detected now
+        assert detector.get("b", filenames["b"], timeout=5).x[0] == 1
+    finally:
+        detector.stop()
+
+
+def test_detector_keeps_frames_with_waiters(tmp_path):
+    filenames = write_frames(tmp_path, ["a", "b", "c"])
+    detect = BlockingDetect()
+    detector = SourceDetector(detect)
+    detector.start()
+    try:
+        detector.submit("a", filenames["a"])
+        assert detect.started.acquire(timeout=5)
+        detector.submit("b", filenames["b"])
+        result = {}
+        waiter = threading.Thread(
+            target=lambda: result.update(b=detector.get("b", timeout=5))
+        )
+        waiter.start()
+        while "b" not in detector._waiters:
+            threading.Event().wait(0.01)
+        detector.submit("c", filenames["c"])
+        detect.release.set()
+        waiter.join(5)
+        # c is newer and goes first, but b is not skipped
+        assert detect.frames == [0, 2, 1]
+        assert result["b"].x[0] == 1
+    finally:
+        detector.stop()
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from chimera_swope.instruments.timeseries import (
+    TimeSeriesArchive,
+    TimeSeriesBuffer,
+    trend_slope,
+)
+
+
+class TestTimeSeriesBuffer:
+    """Test suite for the columnar weather history ring buffer."""
+
+    @pytest.fixture
+    def buffer(self):
+        return TimeSeriesBuffer(("temperature", "humidity"), capacity=5)
+
+    def test_empty(self, buffer):
+        assert len(buffer) == 0
+        assert buffer.last_timestamp is None
+        assert buffer.latest() is None
+        ts, columns = buffer.get()
+        assert len(ts) == 0 and len(columns["temperature"]) == 0
+
+    def test_append_drops_old_readings(self, buffer):
+        """Test that overlapping fetches only append newer readings."""
+        assert buffer.append([1, 2, 3], {"temperature": [10, 11, 12]}) == 3
+        assert buffer.append([2, 3, 4], {"temperature": [11, 12, 13]}) == 1
+        ts, columns = buffer.get()
+        np.testing.assert_array_equal(ts, [1, 2, 3, 4])
+        np.testing.assert_array_equal(columns["temperature"], [10, 11, 12, 13])
+        # missing fields are stored as NaN
+        assert np.isnan(columns["humidity"]).all()
+
+    def test_wrap_around(self, buffer):
+        """Test that the oldest readings are overwritten in order."""
+        buffer.append([1, 2, 3, 4], {"temperature": [1, 2, 3, 4]})
+        buffer.append([5, 6, 7], {"temperature": [5, 6, 7]})
+        assert len(buffer) == 5
+        ts, columns = buffer.get()
+        np.testing.assert_array_equal(ts, [3, 4, 5, 6, 7])
+        np.testing.assert_array_equal(columns["temperature"], [3, 4, 5, 6, 7])
+        latest = buffer.latest()
+        assert latest["ts"] == 7.0 and latest["temperature"] == 7.0
+
+    def test_append_more_than_capacity(self, buffer):
+        buffer.append(np.arange(12), {"temperature": np.arange(12) * 2})
+        ts, columns = buffer.get(fields=["temperature"])
+        np.testing.assert_array_equal(ts, [7, 8, 9, 10, 11])
+        np.testing.assert_array_equal(columns["temperature"], [14, 16, 18, 20, 22])
+        assert buffer.last_timestamp == 11
+
+    def test_since(self, buffer):
+        buffer.append([1, 2, 3, 4, 5, 6], {"temperature": [1, 2, 3, 4, 5, 6]})
+        ts, columns = buffer.get(since=4)
+        np.testing.assert_array_equal(ts, [5, 6])
+        np.testing.assert_array_equal(columns["temperature"], [5, 6])
+
+
+class TestTimeSeriesArchive:
+    """Test suite for the append-only on-disk weather archive."""
+
+    @pytest.fixture
+    def filename(self, tmp_path):
+        return str(tmp_path / "archive" / "weather.dat")
+
+    def test_warm_start(self, filename):
+        """Test that a new buffer is filled from the archive."""
+        archive = TimeSeriesArchive(filename, ("temperature",))
+        buffer = TimeSeriesBuffer(("temperature",), capacity=3, archive=archive)
+        buffer.append([1, 2, 3, 4], {"temperature": [10, 11, 12, 13]})
+        buffer.append([4, 5], {"temperature": [13, 14]})
+
+        archive = TimeSeriesArchive(filename, ("temperature",))
+        assert len(archive.read()) == 5
+        buffer = TimeSeriesBuffer(("temperature",), capacity=3, archive=archive)
+        ts, columns = buffer.get()
+        np.testing.assert_array_equal(ts, [3, 4, 5])
+        np.testing.assert_array_equal(columns["temperature"], [12, 13, 14])
+
+        # appending continues after the archived readings
+        assert buffer.append([5, 6], {"temperature": [14, 15]}) == 1
+        np.testing.assert_array_equal(archive.read()["ts"], [1, 2, 3, 4, 5, 6])
+
+    def test_partial_record(self, filename):
+        """Test that a truncated trailing record is dropped."""
+        archive = TimeSeriesArchive(filename, ("temperature",))
+        archive.append([1, 2], {"temperature": [10, 11]})
+        with open(filename, "ab") as f:
+            f.write(b"\x00\x01\x02")
+
+        archive = TimeSeriesArchive(filename, ("temperature",))
+        records = archive.read()
+        np.testing.assert_array_equal(records["temperature"], [10, 11])
+        assert archive.append([3], {}) == 1
+        assert np.isnan(archive.read()["temperature"][-1])
+
+
+class TestTrendSlope:
+    """Test suite for the vectorized trend estimation."""
+
+    def test_linear_trend(self):
+        ts = np.arange(0, 3600, 60.0)
+        values = 40 + ts / 3600.0 * 10  # 10 units per hour
+        values[5] = np.nan
+        assert trend_slope(ts, values) * 3600 == pytest.approx(10.0)
+
+    def test_not_enough_data(self):
+        assert np.isnan(trend_slope(np.array([1.0]), np.array([2.0])))
+        assert np.isnan(trend_slope(np.array([1.0, 2.0]), np.array([np.nan, 3.0])))
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from chimera_swope.cli.uistate import StateWorker
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_only_changed_values_are_published():
+    worker = StateWorker()
+    published = []
+    worker.subscribe(published.append)
+    values = {"ra": 1.0, "dec": -30.0}
+    worker.add_source("telescope", lambda: dict(values), interval=0.02)
+    worker.start()
+    try:
+        assert wait_for(lambda: len(published) == 1)
+        assert published[0] == {"ra": 1.0, "dec": -30.0}
+        time.sleep(0.1)
+        assert len(published) == 1  # nothing changed
+
+        values["ra"] = 2.0
+        assert wait_for(lambda: len(published) == 2)
+        assert published[1] == {"ra": 2.0}
+        assert worker.snapshot() == {"ra": 2.0, "dec": -30.0}
+    finally:
+        worker.stop()
+
+
+def test_refresh_fetches_event_only_source():
+    worker = StateWorker()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"pa": len(calls)}
+
+    worker.add_source("rotator", fetch, interval=None)
+    worker.start()
+    try:
+        assert wait_for(lambda: len(calls) == 1)
+        time.sleep(0.1)
+        assert len(calls) == 1
+        worker.refresh("rotator")
+        assert wait_for(lambda: len(calls) == 2)
+        assert wait_for(lambda: worker.snapshot()["pa"] == 2)
+    finally:
+        worker.stop()
+
+
+def test_slow_source_does_not_hold_the_others():
+    worker = StateWorker(log=lambda msg: None)
+    release = threading.Event()
+    slow_calls = []
+
+    def slow():
+        slow_calls.append(1)
+        release.wait()
+        return {"slow": 1}
+
+    def failing():
+        raise TimeoutError("unreachable")
+
+    worker.add_source("slow", slow, interval=0.01)
+    worker.add_source("failing", failing, interval=0.01)
+    worker.add_source("fast", lambda: {"ut": time.time()}, interval=0.01)
+    worker.start()
+    try:
+        start = time.time()
+        assert wait_for(lambda: "ut" in worker.snapshot())
+        assert time.time() - start < 0.5
+        first = worker.snapshot()["ut"]
+        assert wait_for(lambda: worker.snapshot()["ut"] != first)
+        assert len(slow_calls) == 1  # not fetched again while running
+    finally:
+        release.set()
+        worker.stop()